@@ -0,0 +1,249 @@
+import sys
+
+from antlr4.ParserRuleContext import ParserRuleContext
+from antlr4.Token import CommonToken, Token
+from antlr4.tree.Tree import TerminalNodeImpl
+
+
+class CompactToken(Token):
+    """
+    This class is a token that stores only its own fields. Unlike
+    ``CommonToken``, it has no instance dictionary, and it does not refer to
+    its lexer or to its input stream, so that a parse tree made of compact
+    tokens does not keep the lexer, the token stream, and the tokens of the
+    hidden channel alive.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, tokenType: int, channel: int, start: int, stop: int, line: int, column: int,
+                 tokenIndex: int, text: str):
+        """
+        Initializes the CompactToken object.
+
+        :param tokenType: The type of the token.
+        :type tokenType: int
+        :param channel: The channel of the token.
+        :type channel: int
+        :param start: The offset of the first character of the token.
+        :type start: int
+        :param stop: The offset of the last character of the token.
+        :type stop: int
+        :param line: The line of the token, starting from 1.
+        :type line: int
+        :param column: The column of the token, starting from 0.
+        :type column: int
+        :param tokenIndex: The index of the token in the token stream.
+        :type tokenIndex: int
+        :param text: The text of the token. Short texts, such as keywords,
+                     operators, and identifiers, are interned, so that the
+                     tokens with the same text share it.
+        :type text: str
+        """
+        self.source = CommonToken.EMPTY_SOURCE
+        self.type = tokenType
+        self.channel = channel
+        self.start = start
+        self.stop = stop
+        self.line = line
+        self.column = column
+        self.tokenIndex = tokenIndex
+        self._text = sys.intern(text) if text is not None and len(text) <= 32 else text
+
+    @classmethod
+    def fromToken(cls, token: Token):
+        """
+        Creates a compact copy of a token.
+
+        :param token: The token to copy.
+        :type token: antlr4.Token.Token
+        :return: The compact token.
+        :rtype: CompactToken
+        """
+        return cls(token.type, token.channel, token.start, token.stop, token.line, token.column, token.tokenIndex,
+                   token.text)
+
+    def __str__(self):
+        return CommonToken.__str__(self)
+
+
+class CompactTree(object):
+    """
+    This class converts the parse trees created by ANTLR to a compact form.
+    Each node of the tree is replaced by an instance of a subclass of its own
+    context class, which stores the children, the parent, the start and stop
+    tokens, the labels of the grammar, and the ``nodeIndex`` in slots, and
+    each token is replaced by a ``CompactToken``. Since the generated context
+    classes and ``ParserRuleContext`` define no ``__slots__``, the nodes still
+    have an instance dictionary, which stays empty unless an attribute
+    without a slot is set, such as the ``nodeTable`` of the root; only the
+    tokens have none. The compact classes have the same names as the
+    generated classes, and the mutation operators and the helpers of
+    ``JavaParse`` work on the compact tree without changes, while the parser,
+    the token stream, and the ANTLR nodes can be freed.
+    """
+
+    _compactClasses = dict()
+
+    @classmethod
+    def getCompactClass(cls, nodeClass: type) -> type:
+        """
+        Returns the compact subclass of a context class, or of a terminal node
+        class, and creates it on first use. The attributes that the generated
+        class sets on its instances, such as the labels of the grammar, are
+        given their own slots.
+
+        :param nodeClass: The generated context class, or the terminal node
+                          class.
+        :type nodeClass: type
+        :return: The compact class.
+        :rtype: type
+        """
+        if getattr(nodeClass, '_isCompact', False):
+            return nodeClass
+
+        compactClass = cls._compactClasses.get(nodeClass)
+        if compactClass is None:
+            if issubclass(nodeClass, ParserRuleContext):
+                labelNames = tuple(name for name in vars(nodeClass(None)).keys() if name != 'nodeIndex')
+            else:
+                labelNames = tuple()
+
+            compactClass = type(nodeClass.__name__, (nodeClass,), {
+                '__slots__': ('nodeIndex',) + labelNames,
+                '__module__': nodeClass.__module__,
+                '__qualname__': nodeClass.__qualname__,
+                '_isCompact': True,
+                'labelNames': labelNames,
+            })
+            cls._compactClasses[nodeClass] = compactClass
+
+        return compactClass
+
+    @classmethod
+    def createRuleNode(cls, compactClass: type, parent, start: Token, stop: Token):
+        """
+        Creates a compact context node without running the constructor of the
+        generated class.
+
+        :param compactClass: The compact context class.
+        :type compactClass: type
+        :param parent: The parent of the node, or None for the root.
+        :type parent: antlr4.ParserRuleContext.ParserRuleContext
+        :param start: The first token of the node.
+        :type start: antlr4.Token.Token
+        :param stop: The last token of the node.
+        :type stop: antlr4.Token.Token
+        :return: The new node, without children.
+        :rtype: antlr4.ParserRuleContext.ParserRuleContext
+        """
+        node = object.__new__(compactClass)
+        node.parser = None
+        node.parentCtx = parent
+        node.invokingState = -1
+        node.children = None
+        node.start = start
+        node.stop = stop
+        node.exception = None
+        for labelName in compactClass.labelNames:
+            setattr(node, labelName, None)
+
+        return node
+
+    @classmethod
+    def createTerminalNode(cls, compactClass: type, parent, symbol: Token):
+        """
+        Creates a compact terminal node.
+
+        :param compactClass: The compact terminal node class.
+        :type compactClass: type
+        :param parent: The parent of the node.
+        :type parent: antlr4.ParserRuleContext.ParserRuleContext
+        :param symbol: The token of the node.
+        :type symbol: antlr4.Token.Token
+        :return: The new node.
+        :rtype: antlr4.tree.Tree.TerminalNodeImpl
+        """
+        node = object.__new__(compactClass)
+        node.parentCtx = parent
+        node.symbol = symbol
+        return node
+
+    @classmethod
+    def convert(cls, tree, parent=None):
+        """
+        Converts a parse tree to its compact form. The ANTLR tree is consumed:
+        the children of each node are released as soon as the node is
+        converted, so that the subtrees that are already converted can be
+        freed while the rest of the tree is built. The attributes that were
+        added to the nodes, such as the ``deferredTokens`` of the placeholder
+        blocks of a lazy parse, are kept, and the ``deferredBlocks`` of the
+        root are replaced by their compact counterparts.
+
+        :param tree: The root of the ANTLR parse tree, or of a subtree.
+        :type tree: antlr4.ParserRuleContext.ParserRuleContext
+        :param parent: The compact node that becomes the parent of the
+                       converted subtree, or None.
+        :type parent: antlr4.ParserRuleContext.ParserRuleContext
+        :return: The root of the compact tree.
+        :rtype: antlr4.ParserRuleContext.ParserRuleContext
+        """
+        tokens = dict()
+        convertedNodes = dict()
+
+        def compactToken(token):
+            if token is None or isinstance(token, CompactToken):
+                return token
+            convertedToken = tokens.get(token.tokenIndex)
+            if convertedToken is None:
+                convertedToken = tokens[token.tokenIndex] = CompactToken.fromToken(token)
+            return convertedToken
+
+        def compactValue(value):
+            if isinstance(value, Token):
+                return compactToken(value)
+            if isinstance(value, list) and len(value) > 0 and isinstance(value[0], Token):
+                return [compactToken(token) for token in value]
+            return value
+
+        deferredBlocks = getattr(tree, 'deferredBlocks', None)
+        deferredBlockIds = set(id(block) for block in deferredBlocks) if deferredBlocks is not None else set()
+        root = None
+        # each item is an ANTLR node, the compact node that becomes its parent, and its position among the children.
+        stack = [(tree, parent, -1)]
+
+        while len(stack) > 0:
+            node, compactParent, position = stack.pop()
+            compactClass = cls.getCompactClass(type(node))
+
+            if isinstance(node, TerminalNodeImpl):
+                compactNode = cls.createTerminalNode(compactClass, compactParent, compactToken(node.symbol))
+
+            else:
+                compactNode = cls.createRuleNode(compactClass, compactParent, compactToken(node.start),
+                                                 compactToken(node.stop))
+                for labelName in compactClass.labelNames:
+                    setattr(compactNode, labelName, compactValue(getattr(node, labelName)))
+
+                if node.children is not None:
+                    compactNode.children = [None] * len(node.children)
+                    stack.extend((node.children[index], compactNode, index)
+                                 for index in range(len(node.children) - 1, -1, -1))
+                    node.children = None
+
+            for name, value in getattr(node, '__dict__', {}).items():
+                if name not in compactClass.labelNames and name != 'deferredBlocks':
+                    setattr(compactNode, name, compactValue(value))
+
+            if root is None:
+                root = compactNode
+            else:
+                compactParent.children[position] = compactNode
+
+            if id(node) in deferredBlockIds:
+                convertedNodes[id(node)] = compactNode
+
+        if deferredBlocks is not None:
+            root.deferredBlocks = [convertedNodes[id(block)] for block in deferredBlocks]
+
+        return root
@@ -0,0 +1,236 @@
+import os
+import xml.etree.ElementTree
+from typing import Dict, List, Tuple
+
+
+class CoverageReport(object):
+    """
+    This class reads the line coverage of the test suite from a JaCoCo or a
+    Clover XML report, so that the mutants on lines that no test executes can
+    be marked as survived without building them.
+
+    The files of the report are matched with the mutated files by the end of
+    their paths, since a JaCoCo report only holds the package and the name of
+    each source file, and a Clover report holds the absolute path of each
+    file at the time of the test run.
+    """
+
+    def __init__(self, reportFile: str = None):
+        """
+        Initializes a CoverageReport object.
+
+        :param reportFile: The path to the JaCoCo or Clover XML report.
+        :type reportFile: str
+        """
+        self.reportFile = reportFile
+        # the number of hits of each line with coverage data, per file, and the files per name.
+        self.lineCoverage = dict()  # type: Dict[str, Dict[int, int]]
+        self.filesPerName = dict()  # type: Dict[str, List[str]]
+
+        if self.reportFile is not None:
+            self.parse()
+
+    def parse(self):
+        """
+        Parses the report, whose format is detected by its root element:
+        ``report`` for JaCoCo and ``coverage`` for Clover.
+        """
+        root = xml.etree.ElementTree.parse(self.reportFile).getroot()
+
+        if root.tag == "report":
+            self.parseJaCoCo(root)
+        elif root.tag == "coverage":
+            self.parseClover(root)
+        else:
+            raise ValueError("Unknown coverage report format: " + root.tag)
+
+    def parseJaCoCo(self, root: xml.etree.ElementTree.Element):
+        """
+        Reads the line coverage of a JaCoCo XML report, in which a line is
+        covered if at least one of its instructions is.
+
+        :param root: The root element of the report.
+        :type root: xml.etree.ElementTree.Element
+        """
+        for packageElement in root.iter("package"):
+            for sourceFileElement in packageElement.iter("sourcefile"):
+                filePath = packageElement.get("name") + "/" + sourceFileElement.get("name")
+                self.addFile(filePath, ((int(lineElement.get("nr")), int(lineElement.get("ci", 0)))
+                                        for lineElement in sourceFileElement.iter("line")))
+
+    def parseClover(self, root: xml.etree.ElementTree.Element):
+        """
+        Reads the line coverage of a Clover XML report. The lines of the
+        branches have a true and a false count instead of a count, and a
+        branch line is covered if the condition was evaluated at all.
+
+        :param root: The root element of the report.
+        :type root: xml.etree.ElementTree.Element
+        """
+        for fileElement in root.iter("file"):
+            filePath = fileElement.get("path", fileElement.get("name"))
+            lines = list()
+            for lineElement in fileElement.iter("line"):
+                if lineElement.get("count") is not None:
+                    hits = int(lineElement.get("count"))
+                else:
+                    hits = int(lineElement.get("truecount", 0)) + int(lineElement.get("falsecount", 0))
+                lines.append((int(lineElement.get("num")), hits))
+
+            self.addFile(filePath, lines)
+
+    def addFile(self, filePath: str, lines):
+        """
+        Adds the coverage of a file. A line that appears more than once keeps
+        its highest number of hits.
+
+        :param filePath: The path of the file in the report.
+        :type filePath: str
+        :param lines: The line number and the number of hits of each line.
+        :type lines: collections.abc.Iterable
+        """
+        filePath = filePath.replace("\\", "/")
+        lineCoverage = self.lineCoverage.setdefault(filePath, dict())
+        for lineNumber, hits in lines:
+            lineCoverage[lineNumber] = max(hits, lineCoverage.get(lineNumber, 0))
+
+        fileName = os.path.basename(filePath)
+        if filePath not in self.filesPerName.setdefault(fileName, list()):
+            self.filesPerName[fileName].append(filePath)
+
+    def findMatchingFile(self, filePath: str) -> Dict[int, int]:
+        """
+        Finds the coverage of a source file, whose path matches the end of the
+        path of a file in the report, or whose path ends with it. If more than
+        one file matches, the longest match is used.
+
+        :param filePath: The path of the source file, such as its path
+                         relative to the source directory.
+        :type filePath: str
+        :return: The number of hits of each line with coverage data, or None
+                 if the file is not in the report.
+        :rtype: dict
+        """
+        filePath = "/" + filePath.replace("\\", "/").lstrip("/")
+        matchingFile = None
+        matchingLength = 0
+
+        for reportFilePath in self.filesPerName.get(os.path.basename(filePath), list()):
+            rootedReportFilePath = "/" + reportFilePath.lstrip("/")
+            if filePath.endswith(rootedReportFilePath) or rootedReportFilePath.endswith(filePath):
+                matchLength = min(len(filePath), len(rootedReportFilePath))
+                if matchLength > matchingLength:
+                    matchingFile = reportFilePath
+                    matchingLength = matchLength
+
+        return None if matchingFile is None else self.lineCoverage[matchingFile]
+
+    @staticmethod
+    def isSpanCovered(lineCoverage: Dict[int, int], startLine: int, endLine: int) -> bool:
+        """
+        Checks whether the tests may execute any of the given lines. A span
+        without coverage data, such as the second line of a statement or a
+        constant expression, is considered covered, since the code it holds
+        may be compiled into another line.
+
+        :param lineCoverage: The number of hits of each line of the file.
+        :type lineCoverage: dict
+        :param startLine: The first line of the span.
+        :type startLine: int
+        :param endLine: The last line of the span.
+        :type endLine: int
+        :return: True if the span may be executed by the tests, False
+                 otherwise.
+        :rtype: bool
+        """
+        spanHits = [lineCoverage[lineNumber] for lineNumber in range(startLine, endLine + 1)
+                    if lineNumber in lineCoverage]
+
+        return not spanHits or any(hits > 0 for hits in spanHits)
+
+    def isCovered(self, filePath: str, lineSpans: List[Tuple[int, int]]) -> bool:
+        """
+        Checks whether the tests may execute a mutant, that is, whether any of
+        the spans of lines of its mutations is covered. A mutant of a file
+        that is not in the report is considered covered, so that it is built.
+
+        :param filePath: The path of the source file.
+        :type filePath: str
+        :param lineSpans: The first and the last line of each mutation.
+        :type lineSpans: list
+        :return: True if the mutant may be executed by the tests, False
+                 otherwise.
+        :rtype: bool
+        """
+        lineCoverage = self.findMatchingFile(filePath)
+        if lineCoverage is None:
+            return True
+
+        return any(self.isSpanCovered(lineCoverage, startLine, endLine) for startLine, endLine in lineSpans)
+
+
+class TestCoverageMap(object):
+    """
+    This class maps the lines of the source files to the tests that execute
+    them, so that each mutant is tested only by the tests that cover it. The
+    map is read from a directory holding a JaCoCo or Clover XML line coverage
+    report for each test, named after the test, such as
+    ``com.example.FactorialTest#testZero.xml``.
+    """
+
+    def __init__(self, reportDirectory: str = None):
+        """
+        Initializes a TestCoverageMap object.
+
+        :param reportDirectory: The path to the directory of the reports.
+        :type reportDirectory: str
+        """
+        self.reportDirectory = reportDirectory
+        self.testReports = dict()  # type: Dict[str, CoverageReport]
+        # the coverage of each test for the file that was matched last, since the mutants are checked file by file.
+        self.lastFilePath = None
+        self.lastFileCoverage = None
+
+        if self.reportDirectory is not None:
+            self.parse()
+
+    @property
+    def testNames(self) -> List[str]:
+        """
+        Returns the names of all the tests, in alphabetical order.
+
+        :return: The names of the tests.
+        :rtype: list
+        """
+        return sorted(self.testReports.keys())
+
+    def parse(self):
+        """
+        Parses the report of each test in the directory.
+        """
+        for fileName in sorted(os.listdir(self.reportDirectory)):
+            if fileName.endswith(".xml"):
+                self.testReports[fileName[:-4]] = CoverageReport(os.path.join(self.reportDirectory, fileName))
+
+    def getCoveringTests(self, filePath: str, lineSpans: List[Tuple[int, int]]) -> List[str]:
+        """
+        Finds the tests that may execute a mutant. A test whose report does
+        not hold the file, or holds no coverage data for the lines of the
+        mutant, is considered to cover it, so that the selected tests kill the
+        mutant whenever the whole test-suite does.
+
+        :param filePath: The path of the source file.
+        :type filePath: str
+        :param lineSpans: The first and the last line of each mutation.
+        :type lineSpans: list
+        :return: The names of the covering tests, in alphabetical order.
+        :rtype: list
+        """
+        if filePath != self.lastFilePath:
+            self.lastFilePath = filePath
+            self.lastFileCoverage = [(testName, self.testReports[testName].findMatchingFile(filePath))
+                                     for testName in self.testNames]
+
+        return [testName for testName, lineCoverage in self.lastFileCoverage if lineCoverage is None or
+                any(CoverageReport.isSpanCovered(lineCoverage, startLine, endLine)
+                    for startLine, endLine in lineSpans)]
@@ -0,0 +1,338 @@
+import hashlib
+import os
+import pickle
+
+from antlr4.PredictionContext import PredictionContext
+from antlr4.atn.ATNSimulator import ATNSimulator
+from antlr4.atn.ATNState import ATNState
+from antlr4.atn.SemanticContext import SemanticContext
+from antlr4.dfa.DFA import DFA
+from antlr4.dfa.DFAState import DFAState
+
+from .JavaParser import JavaParser, serializedATN
+
+try:
+    from importlib.metadata import version
+
+    antlrRuntimeVersion = version("antlr4-python3-runtime")
+except Exception as e:
+    antlrRuntimeVersion = "unknown"
+
+
+class DFAPickler(pickle.Pickler):
+    """
+    This class pickles the states of the prediction DFA. The ATN states and
+    the shared singletons of the ANTLR runtime are stored by reference, so
+    that they are replaced by the objects of the running parser when the
+    states are restored.
+    """
+
+    def persistent_id(self, obj):
+        if isinstance(obj, ATNState):
+            return obj.stateNumber
+        if obj is SemanticContext.NONE:
+            return "SemanticContext.NONE"
+        if obj is PredictionContext.EMPTY:
+            return "PredictionContext.EMPTY"
+        return None
+
+
+class DFAUnpickler(pickle.Unpickler):
+    """
+    This class restores the states pickled by ``DFAPickler``.
+    """
+
+    def persistent_load(self, pid):
+        if pid == "SemanticContext.NONE":
+            return SemanticContext.NONE
+        if pid == "PredictionContext.EMPTY":
+            return PredictionContext.EMPTY
+        return JavaParser.atn.states[pid]
+
+
+class DFACache(object):
+    """
+    This class persists the DFA that the adaptive prediction of the generated
+    parser builds while it parses. The DFA is shared by all parsers of a
+    process, and since it only depends on the grammar, the DFA built on some
+    files can be used to parse any other file. Restoring it at start-up saves
+    the warm-up cost of each new process. The cache is keyed by a fingerprint
+    of the generated parser and of the ANTLR runtime, so it is ignored after
+    the grammar is changed and the parser is generated again.
+    """
+
+    cacheFormatVersion = 1
+    cacheFileName = "JavaParser.dfa"
+    _fingerprint = None
+    # the caches restored in this process, and the number of DFA states at the last load or store of each.
+    _stateCounts = dict()
+
+    def __init__(self, cacheDirectory: str, verbose: bool = False):
+        """
+        Initializes the DFACache object.
+
+        :param cacheDirectory: The directory in which the DFA is stored.
+        :type cacheDirectory: str
+        :param verbose: Whether to print verbose output.
+        :type verbose: bool
+        """
+        self.verbose = verbose
+        self.cacheDirectory = os.path.abspath(cacheDirectory)
+        self.cachePath = os.path.join(self.cacheDirectory, self.cacheFileName)
+
+        if not os.path.exists(self.cacheDirectory):
+            os.makedirs(self.cacheDirectory, exist_ok=True)
+
+    @classmethod
+    def fingerprint(cls) -> str:
+        """
+        Returns a fingerprint of the generated parser and of the ANTLR runtime
+        that restores the DFA.
+
+        :return: The fingerprint.
+        :rtype: str
+        """
+        if cls._fingerprint is None:
+            fingerprintHash = hashlib.sha256()
+            fingerprintHash.update("{}:{}:".format(cls.cacheFormatVersion, antlrRuntimeVersion).encode("utf-8"))
+            fingerprintHash.update(str(serializedATN()).encode("utf-8"))
+            cls._fingerprint = fingerprintHash.hexdigest()
+
+        return cls._fingerprint
+
+    @staticmethod
+    def getStateCount() -> int:
+        """
+        Counts the states of the DFA of the generated parser in this process.
+
+        :return: The number of DFA states.
+        :rtype: int
+        """
+        return sum(len(dfa.states) for dfa in JavaParser.decisionsToDFA)
+
+    @staticmethod
+    def serializeDFA(dfa: DFA) -> tuple:
+        """
+        Converts the DFA of a decision to a list of states whose edges are
+        stored as indices, so that pickling it does not recurse along the
+        edges.
+
+        :param dfa: The DFA of a decision.
+        :type dfa: antlr4.dfa.DFA.DFA
+        :return: A tuple containing the index of the start state (or, for a
+                 precedence DFA, the edges of the start state), and the
+                 states.
+        :rtype: tuple
+        """
+        states = list(dfa.states.values())
+        stateIndices = {id(state): index for index, state in enumerate(states)}
+
+        def serializeEdges(edges):
+            if edges is None:
+                return None
+            # -1 stands for the error state of the simulator.
+            return [-1 if edge is ATNSimulator.ERROR else stateIndices.get(id(edge)) if edge is not None else None
+                    for edge in edges]
+
+        stateData = [(state.configs, serializeEdges(state.edges), state.isAcceptState, state.prediction,
+                      state.requiresFullContext, state.predicates) for state in states]
+
+        if dfa.precedenceDfa:
+            start = serializeEdges(dfa.s0.edges)
+        else:
+            start = stateIndices.get(id(dfa.s0)) if dfa.s0 is not None else None
+
+        return start, stateData
+
+    @staticmethod
+    def restoreDFA(dfa: DFA, data: tuple):
+        """
+        Adds the states of a serialized DFA to the DFA of a decision. The
+        states that the DFA already has are kept, and only the edges that it
+        lacks are added.
+
+        :param dfa: The DFA of a decision.
+        :type dfa: antlr4.dfa.DFA.DFA
+        :param data: The DFA serialized by ``serializeDFA``.
+        :type data: tuple
+        """
+        start, stateData = data
+        states = list()
+
+        for configs, edges, isAcceptState, prediction, requiresFullContext, predicates in stateData:
+            # the hash of a configuration depends on the identity of objects of the runtime, so it is calculated
+            # again in this process.
+            configs.cachedHashCode = -1
+            state = DFAState(configs=configs)
+            state.isAcceptState = isAcceptState
+            state.prediction = prediction
+            state.requiresFullContext = requiresFullContext
+            state.predicates = predicates
+
+            existingState = dfa.states.get(state)
+            if existingState is None:
+                state.stateNumber = len(dfa.states)
+                dfa.states[state] = state
+                existingState = state
+            states.append(existingState)
+
+        def restoreEdges(state, edges):
+            if edges is None:
+                return
+            if state.edges is None:
+                state.edges = [None] * len(edges)
+            elif len(state.edges) < len(edges):
+                state.edges.extend([None] * (len(edges) - len(state.edges)))
+
+            for position, edge in enumerate(edges):
+                if edge is not None and state.edges[position] is None:
+                    state.edges[position] = ATNSimulator.ERROR if edge == -1 else states[edge]
+
+        for state, stateDatum in zip(states, stateData):
+            restoreEdges(state, stateDatum[1])
+
+        if dfa.precedenceDfa:
+            restoreEdges(dfa.s0, start)
+        elif dfa.s0 is None and start is not None:
+            dfa.s0 = states[start]
+
+    def read(self, cachePath: str = None) -> bool:
+        """
+        Reads a cache file, and adds its states to the DFA of this process.
+
+        :param cachePath: The path of the cache file, or None to read the
+                          cache of the directory.
+        :type cachePath: str, optional
+        :return: True if the states were restored, False if there is no
+                 valid cache file.
+        :rtype: bool
+        """
+        cachePath = self.cachePath if cachePath is None else cachePath
+        try:
+            with open(cachePath, 'rb') as cacheFile:
+                unpickler = DFAUnpickler(cacheFile)
+                if unpickler.load() != self.fingerprint():
+                    return False
+                serializedDFAs = unpickler.load()
+
+            for dfa, data in zip(JavaParser.decisionsToDFA, serializedDFAs):
+                self.restoreDFA(dfa, data)
+
+        except FileNotFoundError:
+            return False
+
+        except Exception as e:
+            # a corrupt cache only costs the warm-up, and is overwritten later.
+            if self.verbose:
+                print("--> corrupt DFA cache, ignoring: ", cachePath)
+            return False
+
+        return True
+
+    def write(self, cachePath: str) -> bool:
+        """
+        Writes the DFA of this process to a cache file. The DFA is written to
+        a temporary file first, so that readers never see a partial cache.
+
+        :param cachePath: The path of the cache file.
+        :type cachePath: str
+        :return: True if the DFA was written, False otherwise.
+        :rtype: bool
+        """
+        temporaryPath = "{}.{}.tmp".format(cachePath, os.getpid())
+        try:
+            with open(temporaryPath, 'wb') as cacheFile:
+                pickler = DFAPickler(cacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+                pickler.dump(self.fingerprint())
+                pickler.dump([self.serializeDFA(dfa) for dfa in JavaParser.decisionsToDFA])
+            os.replace(temporaryPath, cachePath)
+
+        except (RecursionError, OSError) as e:
+            if self.verbose:
+                if isinstance(e, RecursionError):
+                    print("--> DFA too deep to be stored, skipping the DFA cache.")
+                else:
+                    print("--> DFA cache could not be stored: ", e)
+            try:
+                os.remove(temporaryPath)
+            except OSError as e:
+                pass
+            return False
+
+        return True
+
+    def load(self):
+        """
+        Restores the DFA from the cache, once per process.
+        """
+        if self.cachePath in self._stateCounts:
+            return
+
+        self.read()
+        self._stateCounts[self.cachePath] = self.getStateCount()
+
+    def hasGrown(self) -> bool:
+        """
+        Checks whether the DFA of this process has grown since it was restored
+        or stored.
+
+        :return: True if the DFA has new states.
+        :rtype: bool
+        """
+        return self.getStateCount() != self._stateCounts.get(self.cachePath, 0)
+
+    def store(self):
+        """
+        Stores the DFA of this process in the cache, if it has grown since it
+        was restored or stored. The states stored in the meantime by an
+        earlier run are merged into it first. Only one process may store the
+        cache at a time: the workers of a run store their states with
+        ``storeWorker``, and the parent merges them with ``mergeWorkers``.
+        """
+        if not self.hasGrown():
+            return
+
+        self.read()
+        if self.write(self.cachePath):
+            self._stateCounts[self.cachePath] = self.getStateCount()
+
+    def getWorkerCachePath(self, pid: int) -> str:
+        """
+        Returns the path of the cache file of a worker process.
+
+        :param pid: The process ID of the worker.
+        :type pid: int
+        :return: The path of the cache file of the worker.
+        :rtype: str
+        """
+        return "{}.{}".format(self.cachePath, pid)
+
+    def storeWorker(self):
+        """
+        Stores the DFA of this worker process in a cache file of its own, if
+        it has grown since it was restored, so that the workers of a pool do
+        not overwrite the states stored by each other.
+        """
+        if not self.hasGrown():
+            return
+
+        if self.write(self.getWorkerCachePath(os.getpid())):
+            self._stateCounts[self.cachePath] = self.getStateCount()
+
+    def mergeWorkers(self):
+        """
+        Adds the states stored by the workers of a pool to the DFA of this
+        process, removes their cache files, and stores the merged DFA in the
+        cache. It must be called after the workers have exited.
+        """
+        workerPrefix = self.cacheFileName + "."
+        for fileName in sorted(os.listdir(self.cacheDirectory)):
+            if fileName.startswith(workerPrefix) and fileName[len(workerPrefix):].isdigit():
+                workerCachePath = os.path.join(self.cacheDirectory, fileName)
+                self.read(workerCachePath)
+                try:
+                    os.remove(workerCachePath)
+                except OSError as e:
+                    pass
+
+        self.store()
@@ -0,0 +1,309 @@
+import re
+import unicodedata
+
+from antlr4 import InputStream
+from antlr4.ListTokenSource import ListTokenSource
+from antlr4.Token import CommonToken, Token
+
+from .JavaLexer import JavaLexer
+
+
+class FastJavaLexerError(Exception):
+    """
+    This exception is raised when the fast lexer reaches input that it does
+    not handle in exactly the same way as the generated lexer, such as a
+    character that starts no token.
+    """
+    pass
+
+
+class FastJavaLexer(object):
+    """
+    This class is a table-driven replacement for the generated ``JavaLexer``.
+    It recognizes the tokens of the same grammar with compiled regular
+    expressions and produces the same ``CommonToken`` objects: the same token
+    types, channels, start and stop offsets, lines, and columns. Like the
+    generated lexer, it follows the longest match rule, and prefers the rule
+    defined first in the grammar when two rules match the same text.
+
+    Whenever the generated lexer would report a token recognition error, this
+    lexer raises ``FastJavaLexerError`` instead, so that the file can be
+    tokenized again with the generated lexer.
+    """
+
+    @staticmethod
+    def getLiteralTypes() -> dict:
+        """
+        Finds the token type of each literal of the grammar (keywords and
+        operators) by tokenizing it with the generated lexer, since the
+        ``literalNames`` of the generated lexer omit the tokens without a
+        literal, and cannot be indexed by token type.
+
+        :return: A dictionary that maps each literal to its token type.
+        :rtype: dict
+        """
+        literalTypes = dict()
+        for literalName in JavaLexer.literalNames[1:]:
+            literal = literalName[1:-1]
+            lexer = JavaLexer(InputStream(literal))
+            lexer.removeErrorListeners()
+            literalTypes[literal] = lexer.nextToken().type
+
+        return literalTypes
+
+    _literalTypes = getLiteralTypes.__func__()
+    keywordTypes = {literal: tokenType for literal, tokenType in _literalTypes.items()
+                    if literal.isalpha() and tokenType != JavaLexer.Identifier}
+    keywordTypes["true"] = JavaLexer.BooleanLiteral
+    keywordTypes["false"] = JavaLexer.BooleanLiteral
+
+    operatorTypes = {literal: tokenType for literal, tokenType in _literalTypes.items()
+                     if not literal[0].isalpha() and literal != "_"}
+
+    _escapeSequence = r"""\\(?:[btnfr"'\\]|[0-3][0-7][0-7]|[0-7][0-7]?|u+[0-9a-fA-F]{4})"""
+
+    # the alternatives are tried in order, and each one is either the only rule that can start with its first
+    # character, or it matches the longest text among the rules that can. numbers are matched separately.
+    tokenPattern = re.compile(r"""
+          (?P<whitespace>[ \t\r\n\f]+)
+        | (?P<comment>/\*.*?\*/|//[^\r\n]*)
+        | (?P<textBlock>\"\"\".*?\"\"\")
+        | (?P<string>"(?:[^"\\]|{escape})*")
+        | (?P<character>'(?:[^'\\]|{escape})')
+        | (?P<identifier>[a-zA-Z$_][a-zA-Z0-9$_]*)
+        | (?P<number>(?=[0-9]|\.[0-9]))
+        | (?P<operator>{operators})
+        """.format(escape=_escapeSequence,
+                   operators="|".join(re.escape(operator) for operator in
+                                      sorted(operatorTypes.keys(), key=len, reverse=True))),
+        re.VERBOSE | re.DOTALL)
+
+    _digits = r"[0-9](?:[0-9_]*[0-9])?"
+    _hexDigits = r"[0-9a-fA-F](?:[0-9a-fA-F_]*[0-9a-fA-F])?"
+    _exponent = r"[eE][+-]?" + _digits
+
+    # each alternative of IntegerLiteral and FloatingPointLiteral, in the order of the grammar.
+    numberPatterns = [(JavaLexer.IntegerLiteral, re.compile(pattern)) for pattern in [
+        r"(?:0|[1-9](?:[0-9_]*[0-9])?)[lL]?",
+        r"0[xX]" + _hexDigits + r"[lL]?",
+        r"0_*[0-7](?:[0-7_]*[0-7])?[lL]?",
+        r"0[bB][01](?:[01_]*[01])?[lL]?",
+    ]] + [(JavaLexer.FloatingPointLiteral, re.compile(pattern)) for pattern in [
+        _digits + r"\.(?:" + _digits + r")?(?:" + _exponent + r")?[fFdD]?",
+        r"\." + _digits + r"(?:" + _exponent + r")?[fFdD]?",
+        _digits + _exponent + r"[fFdD]?",
+        _digits + r"[fFdD]",
+        r"(?:0[xX]" + _hexDigits + r"\.?|0[xX](?:" + _hexDigits + r")?\." + _hexDigits + r")[pP][+-]?" + _digits +
+        r"[fFdD]?",
+    ]]
+
+    def __init__(self, sourceCode: str):
+        """
+        Initializes the FastJavaLexer object.
+
+        :param sourceCode: The Java source code to tokenize.
+        :type sourceCode: str
+        """
+        self.sourceCode = sourceCode
+
+    @staticmethod
+    def isJavaLetter(character: str, isStart: bool) -> bool:
+        """
+        Checks whether a character can appear in an identifier, using the same
+        rules as the grammar: ASCII letters, digits, ``$`` and ``_``, and the
+        characters above U+00FF that Unicode classifies as letters (or as
+        numbers, if the character is not the first one).
+
+        :param character: The character to check.
+        :type character: str
+        :param isStart: Whether the character is the first one of the
+                        identifier.
+        :type isStart: bool
+        :return: True if the character can appear in an identifier.
+        :rtype: bool
+        """
+        codePoint = ord(character)
+        if codePoint < 0x80:
+            return character.isalpha() or character in "$_" or (not isStart and character.isdigit())
+        if codePoint <= 0xFF or 0xD800 <= codePoint <= 0xDBFF:
+            return False
+
+        category = unicodedata.category(character)
+        return 'L' in category or (not isStart and 'N' in category)
+
+    def matchNumber(self, position: int) -> tuple:
+        """
+        Finds the longest number literal that starts at a position.
+
+        :param position: The position in the source code. It must be a digit,
+                         or a dot followed by a digit.
+        :type position: int
+        :return: The token type and the end position of the literal.
+        :rtype: tuple
+        """
+        bestType, bestEnd = None, position
+        for tokenType, pattern in self.numberPatterns:
+            match = pattern.match(self.sourceCode, position)
+            if match is not None and match.end() > bestEnd:
+                bestType, bestEnd = tokenType, match.end()
+
+        return bestType, bestEnd
+
+    def matchUnicodeIdentifier(self, position: int) -> int:
+        """
+        Finds the end of the identifier that starts at a position, checking
+        the characters outside ASCII one by one.
+
+        :param position: The position in the source code.
+        :type position: int
+        :return: The end position of the identifier, or the given position if
+                 no identifier starts there.
+        :rtype: int
+        """
+        end = position
+        while end < len(self.sourceCode) and self.isJavaLetter(self.sourceCode[end], end == position):
+            end += 1
+
+        return end
+
+    def getAllTokens(self) -> list:
+        """
+        Tokenizes the whole source code.
+
+        :return: A list of tokens, ending with an EOF token.
+        :rtype: list
+        :raises FastJavaLexerError: If the source code contains input that
+                                    the generated lexer does not accept.
+        """
+        sourceCode = self.sourceCode
+        length = len(sourceCode)
+        tokens = list()
+        tokenPattern = self.tokenPattern
+        keywordTypes = self.keywordTypes
+        operatorTypes = self.operatorTypes
+
+        position = 0
+        line = 1
+        lineStart = 0
+
+        while position < length:
+            match = tokenPattern.match(sourceCode, position)
+            kind = match.lastgroup if match is not None else None
+
+            if kind == "whitespace" or kind == "comment":
+                end = match.end()
+
+            else:
+                if kind == "identifier" or kind is None:
+                    end = match.end() if kind is not None else position
+                    if end < length and sourceCode[end] > "\x7f":
+                        end = self.matchUnicodeIdentifier(position)
+                    if end == position:
+                        raise FastJavaLexerError("No token at line {}, column {}.".format(line, position - lineStart))
+
+                    tokenType = keywordTypes.get(sourceCode[position:end], JavaLexer.Identifier)
+                    if tokenType == JavaLexer.Identifier and sourceCode.startswith("non-sealed", position) and \
+                            end == position + 3:
+                        tokenType, end = JavaLexer.NON_SEALED, position + 10
+
+                elif kind == "number":
+                    tokenType, end = self.matchNumber(position)
+
+                elif kind == "operator":
+                    end = match.end()
+                    tokenType = operatorTypes[match.group(kind)]
+
+                elif kind == "textBlock":
+                    end = match.end()
+                    tokenType = JavaLexer.TEXT_BLOCK
+
+                elif kind == "string":
+                    end = match.end()
+                    tokenType = JavaLexer.StringLiteral
+
+                else:
+                    end = match.end()
+                    tokenType = JavaLexer.CharacterLiteral
+
+                token = CommonToken(type=tokenType, start=position, stop=end - 1)
+                token.line = line
+                token.column = position - lineStart
+                token.text = sourceCode[position:end]
+                tokens.append(token)
+
+            newLines = sourceCode.count("\n", position, end)
+            if newLines > 0:
+                line += newLines
+                lineStart = sourceCode.rfind("\n", position, end) + 1
+            position = end
+
+        eofToken = CommonToken(type=Token.EOF, start=length, stop=length - 1)
+        eofToken.line = line
+        eofToken.column = length - lineStart
+        eofToken.text = "<EOF>"
+        tokens.append(eofToken)
+
+        return tokens
+
+    def getTokenTexts(self) -> list:
+        """
+        Tokenizes the whole source code like ``getAllTokens``, but only
+        returns the texts of the tokens, which is much faster for callers
+        that do not need the tokens themselves.
+
+        :return: A list of the texts of the tokens, without the EOF token.
+        :rtype: list
+        :raises FastJavaLexerError: If the source code contains input that
+                                    the generated lexer does not accept.
+        """
+        sourceCode = self.sourceCode
+        length = len(sourceCode)
+        tokenTexts = list()
+        tokenPattern = self.tokenPattern
+
+        position = 0
+        while position < length:
+            match = tokenPattern.match(sourceCode, position)
+            kind = match.lastgroup if match is not None else None
+
+            if kind == "whitespace" or kind == "comment":
+                position = match.end()
+                continue
+
+            if kind == "identifier" or kind is None:
+                end = match.end() if kind is not None else position
+                if end < length and sourceCode[end] > "\x7f":
+                    end = self.matchUnicodeIdentifier(position)
+                if end == position:
+                    raise FastJavaLexerError("No token at offset {}.".format(position))
+                if end == position + 3 and sourceCode.startswith("non-sealed", position):
+                    end = position + 10
+
+            elif kind == "number":
+                end = self.matchNumber(position)[1]
+
+            else:
+                end = match.end()
+
+            tokenTexts.append(sourceCode[position:end])
+            position = end
+
+        return tokenTexts
+
+    def getTokenSource(self) -> ListTokenSource:
+        """
+        Tokenizes the whole source code, and returns a token source that can
+        be given to ``CommonTokenStream`` in place of a ``JavaLexer``.
+
+        :return: The token source.
+        :rtype: antlr4.ListTokenSource.ListTokenSource
+        :raises FastJavaLexerError: If the source code contains input that
+                                    the generated lexer does not accept.
+        """
+        tokens = self.getAllTokens()
+        tokenSource = ListTokenSource(tokens, JavaLexer.grammarFileName)
+        source = (tokenSource, None)
+        for token in tokens:
+            token.source = source
+
+        return tokenSource
@@ -4,6 +4,8 @@ import os
 import shutil
 from typing import Dict, List
 
+from .JavaParse import FileMetrics
+
 
 class JavaIO(object):
     """
@@ -115,24 +117,23 @@ class JavaIO(object):
         return normalizedData
 
     def getAggregateComplexityReport(self, mutantDensityPerMethod: Dict[str, int],
-                                     cyclomaticComplexityPerMethod: Dict[str, int],
-                                     linesOfCodePerMethod: Dict[str, int]) -> Dict[str, List[int]]:
+                                     fileMetrics: FileMetrics) -> Dict[str, List[int]]:
         """
         Aggregates complexity metrics for each method in a class.
 
         :param mutantDensityPerMethod: A dictionary mapping method names to the
                                        number of mutants in that method.
         :type mutantDensityPerMethod: dict
-        :param cyclomaticComplexityPerMethod: A dictionary mapping method names
-                                              to their cyclomatic complexity.
-        :type cyclomaticComplexityPerMethod: dict
-        :param linesOfCodePerMethod: A dictionary mapping method names to their
-                                     lines of code.
-        :type linesOfCodePerMethod: dict
+        :param fileMetrics: The metrics of the file, containing the cyclomatic
+                            complexity and the lines of code of each method.
+        :type fileMetrics: littledarwin.JavaParse.FileMetrics
         :return: A dictionary mapping method names to a list containing the
                  mutant density, cyclomatic complexity, and lines of code.
         :rtype: dict
         """
+        cyclomaticComplexityPerMethod = dict(fileMetrics.cyclomaticComplexityPerMethod)
+        linesOfCodePerMethod = dict(fileMetrics.linesOfCodePerMethod)
+
         aggregateReport = dict()
         methodList = set(mutantDensityPerMethod.keys())
         methodList.update(cyclomaticComplexityPerMethod.keys())
@@ -145,18 +146,106 @@ class JavaIO(object):
 
         return aggregateReport
 
+    def getTargetDirectory(self, originalFile: str) -> str:
+        """
+        Creates the directory that holds the mutants of a file, and copies the
+        original file to it.
+
+        :param originalFile: The path to the original file.
+        :type originalFile: str
+        :return: The path to the directory.
+        :rtype: str
+        """
+        originalFileRoot, originalFileName = os.path.split(originalFile)
+
+        targetDir = os.path.join(self.targetDirectory, os.path.relpath(originalFileRoot, self.sourceDirectory),
+                                 originalFileName)
+
+        if not os.path.exists(targetDir):
+            os.makedirs(targetDir)
+        if not os.path.isfile(os.path.join(targetDir, "original.java")):
+            shutil.copyfile(originalFile, os.path.join(targetDir, "original.java"))
+
+        return targetDir
+
+    def generateReports(self, originalFile=None, mutantsPerLine=None, densityReport=None, aggregateComplexity=None):
+        """
+        Writes the reports about the mutants of a file to the directory of its
+        mutants, unless they have been written already.
+
+        :param originalFile: The path to the original file.
+        :type originalFile: str
+        :param mutantsPerLine: A dictionary mapping line numbers to the number
+                               of mutants on that line.
+        :type mutantsPerLine: dict
+        :param densityReport: The HTML report of the mutant density, or an
+                              iterable of its segments.
+        :type densityReport: str
+        :param aggregateComplexity: A dictionary containing the aggregate
+                                    complexity report for the class.
+        :type aggregateComplexity: dict
+        """
+        targetDir = self.getTargetDirectory(originalFile)
+
+        densityPerLineCSVFile = os.path.abspath(os.path.join(targetDir, "MutantDensityPerLine.csv"))
+        complexityPerMethodCSVFile = os.path.abspath(os.path.join(targetDir, "ComplexityPerMethod.csv"))
+        densityReportFile = os.path.abspath(os.path.join(targetDir, "aggregate.html"))
+
+        if not os.path.isfile(complexityPerMethodCSVFile) or not os.path.isfile(
+                densityPerLineCSVFile) or not os.path.isfile(densityReportFile):
+            with open(densityPerLineCSVFile, 'w', encoding="utf-8") as densityFileHandle:
+                for key in sorted(mutantsPerLine.keys()):
+                    densityFileHandle.write(str(key) + ',' + str(mutantsPerLine[key]) + '\n')
+
+            with open(complexityPerMethodCSVFile, 'w', encoding="utf-8") as densityFileHandle:
+                for key in sorted(aggregateComplexity.keys()):
+                    line = [str(key)]
+                    line.extend([str(x) for x in aggregateComplexity[key]])
+                    densityFileHandle.write(";".join(line) + '\n')
+
+            with open(densityReportFile, 'w', encoding="utf-8") as densityFileHandle:
+                if isinstance(densityReport, str):
+                    densityFileHandle.write(densityReport)
+                else:
+                    densityFileHandle.writelines(densityReport)
+
+    def generateSchemataFile(self, originalFile=None, fileData=None):
+        """
+        Writes the mutant schemata of a file, which holds all its mutants that
+        can be selected at run time, to the directory of its mutants.
+
+        :param originalFile: The path to the original file.
+        :type originalFile: str
+        :param fileData: The content of the mutant schemata, or an iterable of
+                         its segments, which are written one after the other.
+        :type fileData: str
+        :return: The relative path to the mutant schemata.
+        :rtype: str
+        """
+        targetFile = os.path.abspath(os.path.join(self.getTargetDirectory(originalFile), "schemata.java"))
+        with open(targetFile, 'w', encoding="utf-8") as contentFile:
+            if isinstance(fileData, str):
+                contentFile.write(fileData)
+            else:
+                contentFile.writelines(fileData)
+
+        if self.verbose:
+            print("--> generated file: ", targetFile)
+        return os.path.relpath(targetFile, self.targetDirectory)
+
     def generateNewFile(self, originalFile=None, fileData=None, mutantsPerLine=None, densityReport=None, aggregateComplexity=None):
         """
         Generates a new file containing a mutant.
 
         This function creates a new directory for the mutated file, copies the
         original file to that directory, and then writes the mutated code to a
-        new file in that directory. It also writes out a number of reports
-        about the mutation.
+        new file in that directory. If the report arguments are given, it also
+        writes out the reports about the mutation (see ``generateReports``).
 
         :param originalFile: The path to the original file.
         :type originalFile: str
-        :param fileData: The content of the mutated file.
+        :param fileData: The content of the mutated file, or an iterable of
+                         its segments, which are written one after the other.
         :type fileData: str
         :param mutantsPerLine: A dictionary mapping line numbers to the number
                                of mutants on that line.
@@ -169,35 +258,10 @@ class JavaIO(object):
         :return: The relative path to the new file.
         :rtype: str
         """
-        originalFileRoot, originalFileName = os.path.split(originalFile)
-
-        targetDir = os.path.join(self.targetDirectory, os.path.relpath(originalFileRoot, self.sourceDirectory),
-                                 originalFileName)
-
-        if not os.path.exists(targetDir):
-            os.makedirs(targetDir)
-        if not os.path.isfile(os.path.join(targetDir, "original.java")):
-            shutil.copyfile(originalFile, os.path.join(targetDir, "original.java"))
+        targetDir = self.getTargetDirectory(originalFile)
 
         if mutantsPerLine is not None and densityReport is not None and aggregateComplexity is not None:
-            densityPerLineCSVFile = os.path.abspath(os.path.join(targetDir, "MutantDensityPerLine.csv"))
-            complexityPerMethodCSVFile = os.path.abspath(os.path.join(targetDir, "ComplexityPerMethod.csv"))
-            densityReportFile = os.path.abspath(os.path.join(targetDir, "aggregate.html"))
-
-            if not os.path.isfile(complexityPerMethodCSVFile) or not os.path.isfile(
-                    densityPerLineCSVFile) or not os.path.isfile(densityReportFile):
-                with open(densityPerLineCSVFile, 'w', encoding="utf-8") as densityFileHandle:
-                    for key in sorted(mutantsPerLine.keys()):
-                        densityFileHandle.write(str(key) + ',' + str(mutantsPerLine[key]) + '\n')
-
-                with open(complexityPerMethodCSVFile, 'w', encoding="utf-8") as densityFileHandle:
-                    for key in sorted(aggregateComplexity.keys()):
-                        line = [str(key)]
-                        line.extend([str(x) for x in aggregateComplexity[key]])
-                        densityFileHandle.write(";".join(line) + '\n')
-
-                with open(densityReportFile, 'w', encoding="utf-8") as densityFileHandle:
-                    densityFileHandle.write(densityReport)
+            self.generateReports(originalFile, mutantsPerLine, densityReport, aggregateComplexity)
 
         counter = 1
         while os.path.isfile(os.path.join(targetDir, str(counter) + ".java")):
@@ -205,7 +269,10 @@ class JavaIO(object):
 
         targetFile = os.path.abspath(os.path.join(targetDir, str(counter) + ".java"))
         with open(targetFile, 'w', encoding="utf-8") as contentFile:
-            contentFile.write(fileData)
+            if isinstance(fileData, str):
+                contentFile.write(fileData)
+            else:
+                contentFile.writelines(fileData)
 
         if self.verbose:
             print("--> generated file: ", targetFile)
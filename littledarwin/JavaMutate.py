@@ -1,13 +1,18 @@
-import copy
+import heapq
+import re
 import sys
+from bisect import bisect_left, bisect_right
+from collections import deque
 from math import log10
 from random import shuffle
 from typing import List, Tuple, Dict
 
 from antlr4 import Token
-from antlr4.tree.Tree import TerminalNodeImpl
+from antlr4.tree.Tree import TerminalNode, TerminalNodeImpl
+from littledarwin.FastJavaLexer import FastJavaLexer, FastJavaLexerError
 from littledarwin.JavaParse import JavaParse
 from littledarwin.JavaParser import JavaParser
+from littledarwin.MutantSampler import MutantSampler
 
 sys.setrecursionlimit(100000)
 
@@ -20,6 +25,8 @@ class Mutation(object):
     original code with.
     """
 
+    __slots__ = ('startPos', 'endPos', 'lineNumber', 'nodeID', 'mutatorType', 'replacementText', 'color')
+
     def __init__(self, startPos: int, endPos: int, lineNumber: int, nodeID: int, mutatorType: str,
                  replacementText: str, color: str = "#FFFFFF"):
         """
@@ -97,14 +104,133 @@ class Mutation(object):
         return len(self.replacementText) - (self.endPos - self.startPos + 1)
 
 
+class LineIndex(object):
+    """
+    This class holds the offsets of the lines of a source file, so that a
+    line of the file, before or after a mutation, can be extracted by
+    slicing, instead of splitting the whole file into lines. Lines are
+    delimited as by ``str.splitlines``, and the line numbers of positions are
+    counted as by the Java compiler, which only breaks lines at ``\\r`` and
+    ``\\n``.
+
+    All the mutants of a file share the same index, which is built the first
+    time one of them needs it (see ``getLineIndex``).
+    """
+
+    __slots__ = ('sourceCode', 'lineStarts', 'lineEnds', 'javaLineStarts')
+
+    # the index of the last source code that was indexed, since mutants are rendered one file at a time.
+    _lastLineIndex = None
+
+    def __init__(self, sourceCode: str):
+        """
+        Initializes a LineIndex object.
+
+        :param sourceCode: The source code to index.
+        :type sourceCode: str
+        """
+        self.sourceCode = sourceCode
+        self.lineStarts = list()
+        self.lineEnds = list()
+
+        position = 0
+        for line, lineWithEnd in zip(sourceCode.splitlines(keepends=False), sourceCode.splitlines(keepends=True)):
+            self.lineStarts.append(position)
+            self.lineEnds.append(position + len(line))
+            position += len(lineWithEnd)
+
+        self.javaLineStarts = [0] + [match.end() for match in re.finditer(r"\r\n?|\n", sourceCode)]
+
+    @classmethod
+    def getLineIndex(cls, sourceCode: str) -> 'LineIndex':
+        """
+        Returns the index of the given source code, and builds it only if the
+        last index was built for a different source code.
+
+        :param sourceCode: The source code.
+        :type sourceCode: str
+        :return: The index of the source code.
+        :rtype: LineIndex
+        """
+        lineIndex = cls._lastLineIndex
+        if lineIndex is None or lineIndex.sourceCode is not sourceCode:
+            lineIndex = cls(sourceCode)
+            cls._lastLineIndex = lineIndex
+
+        return lineIndex
+
+    def getLine(self, lineNumber: int) -> str:
+        """
+        Gets a specific line from the source code.
+
+        :param lineNumber: The line number to get.
+        :type lineNumber: int
+        :return: The specified line of code.
+        :rtype: str
+        """
+        return self.sourceCode[self.lineStarts[lineNumber - 1]:self.lineEnds[lineNumber - 1]]
+
+    def getLineNumber(self, position: int) -> int:
+        """
+        Gets the number of the line of a position in the source code, as
+        reported by the Java compiler and the coverage tools.
+
+        :param position: The position in the source code.
+        :type position: int
+        :return: The line number of the position.
+        :rtype: int
+        """
+        return bisect_right(self.javaLineStarts, position)
+
+    def getMutatedLine(self, mutation: 'Mutation', lineNumber: int) -> str:
+        """
+        Gets a specific line from the source code after the given mutation is
+        applied to it. Only the lines from the one before the mutation to the
+        requested one are rendered.
+
+        :param mutation: The mutation to apply.
+        :type mutation: Mutation
+        :param lineNumber: The line number to get.
+        :type lineNumber: int
+        :return: The specified line of the mutated code.
+        :rtype: str
+        """
+        # the line before the mutation is rendered as well, since its line break may merge with the mutated text.
+        startLine = bisect_right(self.lineStarts, mutation.startPos) - 2
+        if startLine < 0:
+            startLine = 0
+            if not self.lineStarts:
+                return mutation.applyMutation(self.sourceCode).splitlines(keepends=False)[lineNumber - 1]
+
+        if lineNumber - 1 < startLine:
+            return self.getLine(lineNumber)
+
+        # the mutated code is cut at the end of a line, far enough after the mutation to contain the requested line.
+        lineOffset = lineNumber - 1 - startLine
+        endLine = bisect_right(self.lineStarts, mutation.endPos + 1) + lineOffset
+        windowEnd = self.lineStarts[endLine] if endLine < len(self.lineStarts) else len(self.sourceCode)
+
+        window = self.sourceCode[self.lineStarts[startLine]:mutation.startPos] + mutation.replacementText + \
+                 self.sourceCode[mutation.endPos + 1:windowEnd]
+
+        return window.splitlines(keepends=False)[lineOffset]
+
+
 class Mutant(object):
     """
     This class represents a mutant, which is a version of the source code
     that has been modified by one or more mutations. It contains a list of
     mutations and the original source code, and it can be used to generate
     the mutated source code.
+
+    A mutant only keeps the spans of its mutations and a reference to the
+    original source code, which all the mutants of a file share. The mutated
+    code is rendered on demand, either whole or as a sequence of segments
+    that can be written out one by one.
     """
 
+    __slots__ = ('mutantID', 'sourceCode', 'mutationList')
+
     def __init__(self, mutantID: int, mutationList: List[Mutation], sourceCode: str):
         """
         Initializes a Mutant object.
@@ -118,7 +244,6 @@ class Mutant(object):
         """
         self.mutantID = mutantID
         self.sourceCode = sourceCode
-        self.mutatedCode = None
 
         for mutation in mutationList:
             assert isinstance(mutation, Mutation)
@@ -138,14 +263,20 @@ class Mutant(object):
         :rtype: str
         """
         if code is None:
-            code = self.sourceCode
+            return LineIndex.getLineIndex(self.sourceCode).getLine(lineNumber)
 
         return code.splitlines(keepends=False)[lineNumber - 1]
 
-    def mutateCode(self):
+    def mutateCode(self) -> str:
         """
-        Applies the mutations in the mutation list to the source code to
-        generate the mutated code.
+        Applies the mutations in the mutation list to the source code one
+        after the other, shifting each one by the change in length caused by
+        the mutations before it. This is only needed for mutations that
+        overlap, since ``getCodeSegments`` renders the others without copying
+        the source code for each mutation.
+
+        :return: The mutated code.
+        :rtype: str
         """
         code = self.sourceCode
         byteOffsetDict = dict()
@@ -160,7 +291,50 @@ class Mutant(object):
 
             code = mutation.applyMutation(code, byteOffsetDict[mutation.startPos] - mutation.byteOffset)
 
-        self.mutatedCode = code
+        return code
+
+    def getCodeSegments(self):
+        """
+        Renders the mutated code as a sequence of segments: the parts of the
+        original source code between the mutations, and the replacement text
+        of each mutation.
+
+        :return: A generator of the segments of the mutated code.
+        :rtype: collections.abc.Iterator[str]
+        """
+        mutations = sorted(self.mutationList, key=lambda mutation: mutation.startPos)
+        if any(mutations[index].startPos <= mutations[index - 1].endPos for index in range(1, len(mutations))):
+            yield self.mutateCode()
+            return
+
+        position = 0
+        for mutation in mutations:
+            yield self.sourceCode[position:mutation.startPos]
+            yield mutation.replacementText
+            position = mutation.endPos + 1
+
+        yield self.sourceCode[position:]
+
+    @property
+    def mutatedCode(self) -> str:
+        """
+        Renders the mutated code.
+
+        :return: The mutated code.
+        :rtype: str
+        """
+        return "".join(self.getCodeSegments())
+
+    def getTextSegments(self):
+        """
+        Renders the text of the mutant file, which is the stub followed by the
+        mutated code, as a sequence of segments.
+
+        :return: A generator of the segments of the mutant file.
+        :rtype: collections.abc.Iterator[str]
+        """
+        yield self.stub
+        yield from self.getCodeSegments()
 
     @property
     def stub(self) -> str:
@@ -171,15 +345,14 @@ class Mutant(object):
         :rtype: str
         """
         assert len(self.mutationList) > 0
-        assert self.mutatedCode is not None
 
+        lineIndex = LineIndex.getLineIndex(self.sourceCode)
         textStub = "/* LittleDarwin generated order-{0} mutant\n".format(str(len(self.mutationList)))  # type: str
 
         for mutation in self.mutationList:
             textStub += "mutant type: " + mutation.mutatorType + \
-                        "\n----> before: " + self.getLine(mutation.lineNumber) + \
-                        "\n----> after: " + self.getLine(mutation.lineNumber,
-                                                         code=mutation.applyMutation(self.sourceCode)) + \
+                        "\n----> before: " + lineIndex.getLine(mutation.lineNumber) + \
+                        "\n----> after: " + lineIndex.getMutatedLine(mutation, mutation.lineNumber) + \
                         "\n----> line number in original file: " + str(mutation.lineNumber) + \
                         "\n----> mutated node: " + str(mutation.nodeID) + "\n\n"
 
@@ -187,17 +360,56 @@ class Mutant(object):
 
         return textStub
 
+    def getLineSpans(self) -> List[Tuple[int, int]]:
+        """
+        Gets the lines of the original source code that each mutation
+        replaces, numbered as by the Java compiler.
+
+        :return: The first and the last line of each mutation.
+        :rtype: list
+        """
+        lineIndex = LineIndex.getLineIndex(self.sourceCode)
+        return [(lineIndex.getLineNumber(mutation.startPos), lineIndex.getLineNumber(mutation.endPos))
+                for mutation in self.mutationList]
+
+    @classmethod
+    def compose(cls, mutants: List['Mutant']) -> 'Mutant':
+        """
+        Composes a higher-order mutant out of the given mutants of the same
+        source code, by merging their mutations in the order of their
+        positions in a single pass. The mutations of the composed mutant are
+        sorted and do not overlap, so that its code is rendered once, in
+        segments.
+
+        :param mutants: The mutants to compose.
+        :type mutants: list
+        :return: The composed mutant, or None if two of the mutations overlap.
+        :rtype: Mutant
+        """
+        mutantID = mutants[0].mutantID
+        for mutant in mutants[1:]:
+            if mutant.sourceCode is not mutants[0].sourceCode and mutant.sourceCode != mutants[0].sourceCode:
+                raise ValueError("Only Mutant objects of the same source code can be composed.")
+            mutantID = -1 * mutantID * mutant.mutantID
+
+        mutationList = list()
+        for mutation in heapq.merge(*[sorted(mutant.mutationList, key=lambda mutation: mutation.startPos)
+                                      for mutant in mutants], key=lambda mutation: mutation.startPos):
+            if mutationList and mutation.startPos <= mutationList[-1].endPos:
+                return None
+            mutationList.append(mutation)
+
+        return cls(mutantID, mutationList, mutants[0].sourceCode)
+
     def __add__(self, other):
         if other is None:
-            return copy.deepcopy(self)
+            return Mutant(self.mutantID, list(self.mutationList), self.sourceCode)
         if isinstance(other, Mutant):
             if self.sourceCode == other.sourceCode:
                 newMutationList = list()
                 newMutationList.extend(self.mutationList)
                 newMutationList.extend(other.mutationList)
-                newMutant = Mutant(-1 * self.mutantID * other.mutantID, newMutationList, self.sourceCode)
-                newMutant.mutateCode()
-                return newMutant
+                return Mutant(-1 * self.mutantID * other.mutantID, newMutationList, self.sourceCode)
             else:
                 raise ValueError("Only Mutant objects of the same source code can be added.")
         else:
@@ -207,9 +419,324 @@ class Mutant(object):
         return self.__add__(other)
 
     def __str__(self):
-        if self.mutatedCode is None:
-            self.mutateCode()
-        return self.stub + self.mutatedCode
+        return "".join(self.getTextSegments())
+
+
+class MutantSchemata(object):
+    """
+    This class combines the mutants of a source file into a single metamutant
+    (a mutant schemata), in which each mutation is guarded by a switch that is
+    read once at run time, so that the file is compiled once for all its
+    mutants, and each mutant is selected by its ID when the tests are run.
+    The ID of the active mutant is read from the ``littledarwin.mutant``
+    system property, or the ``LITTLEDARWIN_MUTANT`` environment variable, and
+    no mutant is active if neither is set.
+
+    A mutation is guarded at the innermost expression that contains it, with
+    a conditional expression, or, where a conditional expression is not
+    allowed (such as a statement expression, or an expression in a lambda
+    expression), at the innermost statement or method body that contains it,
+    with an if statement. A mutant that has a mutation in a constant
+    expression, a field initializer, or anywhere else that cannot be guarded
+    is left out of the schemata.
+    """
+
+    assignmentOperators = frozenset({"=", "+=", "-=", "*=", "/=", "&=", "|=", "^=", ">>=", ">>>=", "<<=", "%="})
+    # the contexts in which a conditional expression is not a constant expression, a statement expression, or the
+    # target of an assignment.
+    expressionParents = (JavaParser.ExpressionContext, JavaParser.PrimaryContext, JavaParser.ParExpressionContext,
+                         JavaParser.VariableInitializerContext, JavaParser.StatementContext,
+                         JavaParser.ResourceContext, JavaParser.EnhancedForControlContext,
+                         JavaParser.ForControlContext, JavaParser.ArrayCreatorRestContext)
+    # the contexts in which nothing can be guarded.
+    unguardedContexts = (JavaParser.FieldDeclarationContext, JavaParser.ConstDeclarationContext,
+                         JavaParser.ConstantExpressionContext, JavaParser.ElementValueContext,
+                         JavaParser.ConstructorBodyContext, JavaParser.ClassBodyContext,
+                         JavaParser.InterfaceBodyContext, JavaParser.CompilationUnitContext)
+    explicitConstructorInvocation = re.compile(r"(?:[\w.]+\.)?(?:this|super)\s*\(")
+
+    def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
+                 className: str):
+        """
+        Initializes a MutantSchemata object.
+
+        :param sourceTree: The root of the parse tree.
+        :type sourceTree: antlr4.tree.Tree.ParseTree
+        :param sourceCode: The source code of the file.
+        :type sourceCode: str
+        :param javaParseObject: The JavaParse object used to parse the file.
+        :type javaParseObject: littledarwin.JavaParse.JavaParse
+        :param className: The name of the class that holds the switch, which
+                          is added to the file, and must not be declared in
+                          its package.
+        :type className: str
+        """
+        self.sourceTree = sourceTree
+        self.sourceCode = sourceCode
+        self.javaParseObject = javaParseObject
+        self.className = className
+        self.guards = dict()
+        self.mutantIDs = list()
+
+    def __len__(self):
+        return len(self.mutantIDs)
+
+    def getGuard(self, mutation: Mutation):
+        """
+        Finds the node at which a mutation is guarded.
+
+        :param mutation: The mutation.
+        :type mutation: Mutation
+        :return: A tuple of the node and True for a conditional expression, or
+                 False for an if statement, or None if the mutation cannot be
+                 guarded.
+        :rtype: tuple
+        """
+        node = self.javaParseObject.getNode(self.sourceTree, mutation.nodeID)
+        isInLambdaExpression = False
+
+        while node is not None:
+            if isinstance(node, self.unguardedContexts):
+                return None
+
+            if not isinstance(node, TerminalNode) and node.start.start <= mutation.startPos and \
+                    node.stop is not None and node.stop.stop >= mutation.endPos:
+                if isinstance(node, JavaParser.ExpressionContext) and not isInLambdaExpression and \
+                        self.isGuardableExpression(node):
+                    return (node, True) if not self.isInUnguardedContext(node) else None
+
+                if isinstance(node, JavaParser.StatementContext) and self.isGuardableStatement(node):
+                    return (node, False) if not self.isInUnguardedContext(node) else None
+
+                if isinstance(node, JavaParser.MethodBodyContext):
+                    return node, False
+
+            if isinstance(node, (JavaParser.LambdaBodyContext, JavaParser.LambdaExpressionContext)):
+                isInLambdaExpression = True
+
+            node = node.parentCtx
+
+        return None
+
+    def isInUnguardedContext(self, node) -> bool:
+        """
+        Checks if a node is in a context in which nothing can be guarded, such
+        as a field initializer, whose value may be a compile-time constant
+        used in a ``case`` label or an annotation. The body of the method,
+        constructor, lambda expression, or initializer block that contains
+        the node, if any, is the outermost context checked.
+
+        :param node: The node.
+        :type node: antlr4.tree.Tree.ParseTree
+        :return: True if the node cannot be guarded.
+        :rtype: bool
+        """
+        while node is not None:
+            if isinstance(node, (JavaParser.MethodBodyContext, JavaParser.ConstructorBodyContext,
+                                 JavaParser.LambdaBodyContext)) or \
+                    (isinstance(node, JavaParser.BlockContext) and
+                     isinstance(node.parentCtx, JavaParser.ClassBodyDeclarationContext)):
+                return False
+
+            if isinstance(node, self.unguardedContexts):
+                return True
+            node = node.parentCtx
+
+        return False
+
+    def isGuardableExpression(self, node: JavaParser.ExpressionContext) -> bool:
+        """
+        Checks if an expression can be replaced by a conditional expression.
+
+        :param node: The expression.
+        :type node: JavaParser.ExpressionContext
+        :return: False if the expression is a constant expression, a statement
+                 expression, the target of an assignment, an argument of a for
+                 statement, or is in a context that is not known to accept a
+                 conditional expression.
+        :rtype: bool
+        """
+        parent = node.parentCtx
+
+        if all(terminal.symbol.type != JavaParser.Identifier
+               for terminal in self.javaParseObject.seekAllNodes(node, TerminalNodeImpl)):
+            return False  # a constant expression, whose value may be narrowed to a byte, a short, or a char
+
+        if isinstance(parent, JavaParser.ExpressionContext):
+            siblings = parent.children
+            if len(siblings) == 2:
+                return not any(isinstance(sibling, TerminalNode) and sibling.getText() in ("++", "--")
+                               for sibling in siblings)  # the operand of an increment or a decrement
+            if siblings[0] is node and len(siblings) == 3 and isinstance(siblings[1], TerminalNode):
+                return siblings[1].getText() not in self.assignmentOperators
+            return True
+
+        if isinstance(parent, JavaParser.ExpressionListContext):
+            return isinstance(parent.parentCtx, (JavaParser.ArgumentsContext, JavaParser.ExpressionContext))
+
+        return isinstance(parent, self.expressionParents)
+
+    def isGuardableStatement(self, node: JavaParser.StatementContext) -> bool:
+        """
+        Checks if a statement can be replaced by an if statement in a block.
+
+        :param node: The statement.
+        :type node: JavaParser.StatementContext
+        :return: False if the statement is an explicit constructor invocation,
+                 the statement of a label, or a rule of a switch expression.
+        :rtype: bool
+        """
+        parent = node.parentCtx
+
+        if isinstance(parent, JavaParser.StatementContext) and len(parent.children) == 3 and \
+                isinstance(parent.children[1], TerminalNode) and parent.children[1].getText() == ":":
+            return False  # a labeled loop must stay the statement of its label
+
+        if isinstance(parent, JavaParser.SwitchBlockSectionContext) and \
+                isinstance(parent.parentCtx, JavaParser.SwitchExpressionContext):
+            return False
+
+        return self.explicitConstructorInvocation.match(self.getText(node)) is None
+
+    def getText(self, node) -> str:
+        """
+        Gets the source code of a node, with its comments and white space.
+
+        :param node: The node.
+        :type node: antlr4.tree.Tree.ParseTree
+        :return: The source code of the node.
+        :rtype: str
+        """
+        return self.sourceCode[node.start.start:node.stop.stop + 1]
+
+    def addMutant(self, mutant: Mutant, mutantID: int) -> bool:
+        """
+        Adds a mutant to the schemata, unless one of its mutations cannot be
+        guarded.
+
+        :param mutant: The mutant.
+        :type mutant: Mutant
+        :param mutantID: The ID that selects the mutant at run time, which
+                         must be positive.
+        :type mutantID: int
+        :return: True if the mutant is added.
+        :rtype: bool
+        """
+        assert mutantID > 0
+
+        mutations = sorted(mutant.mutationList, key=lambda mutation: mutation.startPos)
+        if any(mutations[index].startPos <= mutations[index - 1].endPos for index in range(1, len(mutations))):
+            return False
+
+        guards = [self.getGuard(mutation) for mutation in mutations]
+        if any(guard is None for guard in guards):
+            return False
+
+        for node, isExpression in guards:
+            if node.nodeIndex not in self.guards:
+                self.guards[node.nodeIndex] = (node, isExpression, list())
+            alternatives = self.guards[node.nodeIndex][2]
+            if len(alternatives) == 0 or alternatives[-1][0] != mutantID:
+                alternatives.append((mutantID, [mutation for mutation in mutations
+                                                if node.start.start <= mutation.startPos <= node.stop.stop]))
+
+        self.mutantIDs.append(mutantID)
+        return True
+
+    def getTextSegments(self):
+        """
+        Renders the metamutant as a sequence of segments: a comment with the
+        IDs of its mutants, the source code with the guarded mutations, and
+        the class that holds the switch.
+
+        :return: A generator of the segments of the metamutant.
+        :rtype: collections.abc.Iterator[str]
+        """
+        yield "/* LittleDarwin generated mutant schemata of {} mutants: {}\n" \
+              "select a mutant with -Dlittledarwin.mutant=<ID> or LITTLEDARWIN_MUTANT=<ID>\n*/\n\n".format(
+            len(self.mutantIDs), ", ".join(str(mutantID) for mutantID in self.mutantIDs))
+
+        # the guards are nested like their nodes, so that the original code of a guard has the guards it contains.
+        guards = sorted(self.guards.values(), key=lambda guard: (guard[0].start.start, -guard[0].stop.stop))
+        yield from self.getGuardedSegments(guards, 0, 0, len(self.sourceCode))
+
+        yield "\n\nfinal class {0} {{\n" \
+              "    static final int MUTANT = getMutant();\n\n" \
+              "    private {0}() {{\n" \
+              "    }}\n\n" \
+              "    private static int getMutant() {{\n" \
+              "        try {{\n" \
+              "            String mutant = System.getProperty(\"littledarwin.mutant\", " \
+              "System.getenv(\"LITTLEDARWIN_MUTANT\"));\n" \
+              "            return mutant == null ? 0 : Integer.parseInt(mutant.trim());\n" \
+              "        }} catch (RuntimeException e) {{\n" \
+              "            return 0;\n" \
+              "        }}\n" \
+              "    }}\n" \
+              "}}\n".format(self.className)
+
+    def getGuardedSegments(self, guards: list, guardIndex: int, position: int, endPosition: int):
+        """
+        Renders a part of the source code with the guards it contains.
+
+        :param guards: All the guards, sorted by their positions, outer guards
+                       first.
+        :type guards: list
+        :param guardIndex: The index of the first guard in the part.
+        :type guardIndex: int
+        :param position: The start position of the part.
+        :type position: int
+        :param endPosition: The end position of the part, exclusive.
+        :type endPosition: int
+        :return: A generator of the segments, which returns the index of the
+                 first guard after the part.
+        :rtype: collections.abc.Generator[str]
+        """
+        switch = self.className + ".MUTANT"
+
+        while guardIndex < len(guards) and guards[guardIndex][0].start.start < endPosition:
+            node, isExpression, alternatives = guards[guardIndex]
+            start, end = node.start.start, node.stop.stop + 1
+            yield self.sourceCode[position:start]
+            yield "(" if isExpression else "{ "
+
+            for mutantID, mutations in alternatives:
+                alternative = self.getMutatedText(start, end, mutations)
+                if isExpression:
+                    yield "{} == {} ? ({}) : ".format(switch, mutantID, alternative)
+                else:
+                    yield "if ({} == {}) {{ {} }} else ".format(switch, mutantID, alternative)
+
+            yield "(" if isExpression else "{ "
+            guardIndex = yield from self.getGuardedSegments(guards, guardIndex + 1, start, end)
+            yield "))" if isExpression else " } }"
+            position = end
+
+        yield self.sourceCode[position:endPosition]
+        return guardIndex
+
+    def getMutatedText(self, start: int, end: int, mutations: List[Mutation]) -> str:
+        """
+        Renders a part of the source code with the given mutations.
+
+        :param start: The start position of the part.
+        :type start: int
+        :param end: The end position of the part, exclusive.
+        :type end: int
+        :param mutations: The mutations in the part, sorted by their positions,
+                          which do not overlap.
+        :type mutations: list
+        :return: The mutated part.
+        :rtype: str
+        """
+        segments = list()
+        for mutation in mutations:
+            segments.append(self.sourceCode[start:mutation.startPos])
+            segments.append(mutation.replacementText)
+            start = mutation.endPos + 1
+
+        segments.append(self.sourceCode[start:end])
+        return "".join(segments)
 
 
 class MutationOperator(object):
@@ -220,6 +747,14 @@ class MutationOperator(object):
     """
     instantiable = True
     metaTypes = ["Generic"]
+    # the operator finds no node to mutate in a file that contains none of these tokens. None means that the tokens
+    # of a file do not tell whether the operator finds any.
+    candidateTokens = None
+    # the types of the nodes that the operator visits, each with the routing tokens that such a node must have (see
+    # MutationDispatcher.getRoutingToken), or None to visit all the nodes of the type.
+    nodeRoutes = tuple()
+    # the operator looks up the declarations of the other files in the symbol index of the JavaParse object.
+    usesSymbolIndex = False
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants=True):
@@ -246,9 +781,11 @@ class MutationOperator(object):
 
     def findNodes(self):
         """
-        Finds all nodes that match the search criteria
+        Finds all nodes that match the search criteria, as routed by the
+        dispatcher of the parse tree.
         """
-        pass
+        self.allNodes = MutationDispatcher.getDispatcher(self.sourceTree, self.javaParseObject,
+                                                         type(self)).getNodes(type(self))
 
     def filterCriteria(self):
         """
@@ -256,6 +793,19 @@ class MutationOperator(object):
         """
         pass
 
+    def getSubsumedReplacementCount(self) -> int:
+        """
+        Counts the replacements of the full set of replacements of the
+        mutation of the operator on its mutable nodes that are subsumed by the
+        sufficient subset it uses, and are therefore not generated. The count
+        is relative to the full set, not to the replacements of the default
+        operators, which generate fewer mutants than the sufficient subset.
+
+        :return: The number of subsumed replacements.
+        :rtype: int
+        """
+        return 0
+
     def generateMutants(self):
         """
         Generates the mutants
@@ -273,6 +823,50 @@ class MutationOperator(object):
 
         return ".{classname} {{ background: {color}; }} ".format(classname=self.mutatorType, color=self.color)
 
+    @classmethod
+    def mayHaveCandidates(cls, tokenTexts: List[str]) -> bool:
+        """
+        Checks whether the operator may find a node to mutate in a file, from
+        the tokens of the file alone. The check must never rule out a file in
+        which the operator finds a node, but it may accept a file in which it
+        finds none.
+
+        :param tokenTexts: The texts of the tokens of the file, without the
+                           EOF token.
+        :type tokenTexts: list
+        :return: False if the operator finds no node to mutate in the file.
+        :rtype: bool
+        """
+        return cls.candidateTokens is None or not cls.candidateTokens.isdisjoint(tokenTexts)
+
+    @staticmethod
+    def getMethodHeaders(tokenTexts: List[str]) -> List[List[str]]:
+        """
+        Finds the tokens that may precede the body of a method or a
+        constructor. A body is a block that follows the closing parenthesis of
+        the formal parameters, and possibly the array dimensions and the
+        throws clause, none of which contain a semicolon or a brace. Each
+        opening brace is therefore paired with the tokens after the last
+        semicolon or brace before it, and those that contain a closing
+        parenthesis are returned. Blocks of statements and lambda bodies are
+        returned as well, which only makes the check less strict.
+
+        :param tokenTexts: The texts of the tokens of the file, without the
+                           EOF token.
+        :type tokenTexts: list
+        :return: The list of the tokens before each block that may be a body.
+        :rtype: list
+        """
+        methodHeaders = list()
+        headerStart = 0
+        for index, tokenText in enumerate(tokenTexts):
+            if tokenText == "{" or tokenText == "}" or tokenText == ";":
+                if tokenText == "{" and ")" in tokenTexts[headerStart:index]:
+                    methodHeaders.append(tokenTexts[headerStart:index])
+                headerStart = index + 1
+
+        return methodHeaders
+
 
 #################################################
 #       Method-level Mutation Operators         #
@@ -286,6 +880,8 @@ class RemoveMethod(MutationOperator):
     """
     instantiable = True
     metaTypes = ["Method", "All"]
+    nodeRoutes = ((JavaParser.MethodBodyContext, None), (JavaParser.ConstructorBodyContext, None))
+    usesSymbolIndex = True
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -298,12 +894,19 @@ class RemoveMethod(MutationOperator):
         if generateMutants:
             self.generateMutants()
 
-    def findNodes(self):
+    @classmethod
+    def mayHaveCandidates(cls, tokenTexts: List[str]) -> bool:
         """
-        Finds all method and constructor bodies in the parse tree.
+        Checks whether the file may contain the body of a method or a
+        constructor.
+
+        :param tokenTexts: The texts of the tokens of the file, without the
+                           EOF token.
+        :type tokenTexts: list
+        :return: False if the file contains no method or constructor body.
+        :rtype: bool
         """
-        self.allNodes = self.javaParseObject.seekAllNodes(self.sourceTree, JavaParser.MethodBodyContext)
-        self.allNodes.extend(self.javaParseObject.seekAllNodes(self.sourceTree, JavaParser.ConstructorBodyContext))
+        return len(cls.getMethodHeaders(tokenTexts)) > 0
 
     def filterCriteria(self):
         """
@@ -384,7 +987,8 @@ class RemoveMethod(MutationOperator):
                 replacementTextList = ["{\n    return \'\';\n}\n", "{\n    return \'A\';\n}\n"]
             elif nodeType == "String":
                 replacementTextList = ["{\n    return \"\";\n}\n", "{\n    return \"A\";\n}\n"]
-            elif '[' in nodeType and ']' in nodeType:
+            elif '[' in nodeType and ']' in nodeType and \
+                    self.javaParseObject.symbolIndex.isReifiableArray(node, nodeType):
                 replacementTextList = ["{{\n    return new {} {{}};\n}}\n".format(nodeType)]
             else:
                 replacementTextList = ["{\n    return null;\n}\n"]
@@ -395,7 +999,6 @@ class RemoveMethod(MutationOperator):
                                     lineNumber=node.start.line, nodeID=node.nodeIndex,
                                     mutatorType=self.mutatorType, replacementText=replacementText)
                 mutant = Mutant(mutantID=id, mutationList=[mutation], sourceCode=self.sourceCode)
-                mutant.mutateCode()
                 self.mutants.append(mutant)
 
 
@@ -412,6 +1015,8 @@ class RemoveNullCheck(MutationOperator):
     """
     instantiable = True
     metaTypes = ["Null", "All"]
+    candidateTokens = frozenset({"==", "!="})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -423,12 +1028,6 @@ class RemoveNullCheck(MutationOperator):
         if generateMutants:
             self.generateMutants()
 
-    def findNodes(self):
-        """
-        Finds all expression nodes in the parse tree.
-        """
-        self.allNodes = self.javaParseObject.seekAllNodes(self.sourceTree, JavaParser.ExpressionContext)
-
     def filterCriteria(self):
         """
         Filters the expression nodes to include only those that are null checks.
@@ -470,7 +1069,6 @@ class RemoveNullCheck(MutationOperator):
                                 nodeID=node.nodeIndex, mutatorType=self.mutatorType, replacementText=replacementText)
 
             mutant = Mutant(mutantID=id, mutationList=[mutation], sourceCode=self.sourceCode)
-            mutant.mutateCode()
             self.mutants.append(mutant)
 
 
@@ -481,6 +1079,8 @@ class NullifyObjectInitialization(MutationOperator):
     """
     instantiable = True
     metaTypes = ["Null", "All"]
+    candidateTokens = frozenset({"new"})
+    nodeRoutes = ((JavaParser.CreatorContext, None),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -492,12 +1092,6 @@ class NullifyObjectInitialization(MutationOperator):
         if generateMutants:
             self.generateMutants()
 
-    def findNodes(self):
-        """
-        Finds all creator nodes in the parse tree.
-        """
-        self.allNodes = self.javaParseObject.seekAllNodes(self.sourceTree, JavaParser.CreatorContext)
-
     def filterCriteria(self):
         """
         Filters the creator nodes to include only those that are object initializations.
@@ -539,17 +1133,19 @@ class NullifyObjectInitialization(MutationOperator):
                                 mutatorType=self.mutatorType, replacementText=replacementText)
 
             mutant = Mutant(mutantID=id, mutationList=[mutation], sourceCode=self.sourceCode)
-            mutant.mutateCode()
             self.mutants.append(mutant)
 
 
 class NullifyReturnValue(MutationOperator):
     """
-    This mutation operator nullifies the return value of a method by
-    replacing the return statement with ``return null;``.
+    This mutation operator nullifies the return value of a method or a lambda
+    expression by replacing the return statement with ``return null;``.
     """
     instantiable = True
     metaTypes = ["Null", "All"]
+    candidateTokens = frozenset({"return"})
+    nodeRoutes = ((JavaParser.StatementContext, candidateTokens),)
+    usesSymbolIndex = True
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -563,14 +1159,23 @@ class NullifyReturnValue(MutationOperator):
 
     def findNodes(self):
         """
-        Finds all terminal nodes in the parse tree.
+        Finds the ``return`` keywords of the return statements in the parse
+        tree, in the order in which ``JavaParse.seekAllNodes`` finds terminal
+        nodes.
         """
-        self.allNodes = self.javaParseObject.seekAllNodes(self.sourceTree, TerminalNodeImpl)
+        super().findNodes()
+        nodeTable = self.javaParseObject.getNodeTable(self.sourceTree)
+        self.allNodes = sorted((statement.children[0] for statement in self.allNodes),
+                               key=lambda keyword: nodeTable.postOrder[keyword.nodeIndex], reverse=True)
 
     def filterCriteria(self):
         """
         Filters the terminal nodes to include only those that are 'return' statements with a non-primitive return type.
+        Inside a lambda expression, the return type comes from its target type if it is known, and otherwise the
+        returned value must be of a reference type that cannot be unboxed.
         """
+        symbolIndex = self.javaParseObject.symbolIndex
+
         for node in self.allNodes:
             assert isinstance(node, TerminalNodeImpl)
 
@@ -580,18 +1185,15 @@ class NullifyReturnValue(MutationOperator):
             if not isinstance(node.getParent().getChild(1), JavaParser.ExpressionContext):
                 continue
 
-            parentMethod = self.javaParseObject.seekFirstMatchingParent(node, JavaParser.MethodDeclarationContext)
-            if parentMethod is None:
-                continue
-
-            assert isinstance(parentMethod, JavaParser.MethodDeclarationContext)
+            returnType = symbolIndex.getReturnType(node)
+            if returnType is None and self.javaParseObject.seekFirstMatchingParent(
+                    node, JavaParser.LambdaExpressionContext) is not None:
+                returnType = symbolIndex.getExpressionType(node.getParent().getChild(1))
+                if returnType in symbolIndex.boxedTypes:
+                    continue  # the value may be unboxed to a primitive return type
 
-            parentType = parentMethod.getChild(0, JavaParser.JTypeContext)
-            if not isinstance(parentType, JavaParser.JTypeContext):
-                continue
-
-            if parentType.getChild(0, JavaParser.PrimitiveTypeContext) is not None:
-                continue  # primitive typed method
+            if returnType is None or not symbolIndex.isReferenceType(returnType):
+                continue  # primitive typed method or lambda expression
 
             self.mutableNodes.append(node)
 
@@ -610,7 +1212,6 @@ class NullifyReturnValue(MutationOperator):
                                 mutatorType=self.mutatorType, replacementText=replacementText)
 
             mutant = Mutant(mutantID=id, mutationList=[mutation], sourceCode=self.sourceCode)
-            mutant.mutateCode()
             self.mutants.append(mutant)
 
 
@@ -621,6 +1222,8 @@ class NullifyInputVariable(MutationOperator):
     """
     instantiable = True
     metaTypes = ["Null", "All"]
+    nodeRoutes = ((JavaParser.MethodDeclarationContext, None),)
+    usesSymbolIndex = True
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -632,16 +1235,31 @@ class NullifyInputVariable(MutationOperator):
         if generateMutants:
             self.generateMutants()
 
-    def findNodes(self):
+    @classmethod
+    def mayHaveCandidates(cls, tokenTexts: List[str]) -> bool:
         """
-        Finds all method declaration nodes in the parse tree.
+        Checks whether the file may contain a method with a body and at least
+        one formal parameter.
+
+        :param tokenTexts: The texts of the tokens of the file, without the
+                           EOF token.
+        :type tokenTexts: list
+        :return: False if the file contains no such method.
+        :rtype: bool
         """
-        self.allNodes = self.javaParseObject.seekAllNodes(self.sourceTree, JavaParser.MethodDeclarationContext)
+        for methodHeader in cls.getMethodHeaders(tokenTexts):
+            for index in range(len(methodHeader) - 1):
+                if methodHeader[index] == "(" and methodHeader[index + 1] != ")":
+                    return True
+
+        return False
 
     def filterCriteria(self):
         """
-        Filters the method declaration nodes to include only those with non-primitive input variables.
+        Filters the method declaration nodes to include only those with non-primitive input variables. Parameters
+        that are final, or used in a lambda expression or an inner class, are left out, since they cannot be assigned.
         """
+        symbolIndex = self.javaParseObject.symbolIndex
         self.replacementTextDict = dict()
 
         for methodDeclaration in self.allNodes:
@@ -659,14 +1277,14 @@ class NullifyInputVariable(MutationOperator):
                 continue
 
             variablesPerNodeReplacementTextList = list()
-            for variablesPerNode in variableList:
-                assert isinstance(variablesPerNode, JavaParser.VariableDeclaratorIdContext)
-
-                if variablesPerNode.parentCtx.getChild(0, JavaParser.JTypeContext).getChild(0,
-                                                                                            JavaParser.PrimitiveTypeContext) is not None:
+            for name, typeName, isFinal in symbolIndex.getFormalParameters(methodDeclaration):
+                if typeName is None or not symbolIndex.isReferenceType(typeName):
                     continue  # primitive typed variable
 
-                variablesPerNodeReplacementTextList.append('{ ' + variablesPerNode.getText() + ' = null;')
+                if isFinal or name == "_" or symbolIndex.isCaptured(methodDeclaration.methodBody(), name):
+                    continue  # the variable cannot be assigned
+
+                variablesPerNodeReplacementTextList.append('{ ' + name + ' = null;')
 
             self.replacementTextDict[node] = variablesPerNodeReplacementTextList
             self.mutableNodes.append(node)
@@ -685,7 +1303,6 @@ class NullifyInputVariable(MutationOperator):
                                     mutatorType=self.mutatorType, replacementText=replacementText)
 
                 mutant = Mutant(mutantID=id, mutationList=[mutation], sourceCode=self.sourceCode)
-                mutant.mutateCode()
                 self.mutants.append(mutant)
 
 
@@ -699,7 +1316,9 @@ class TraditionalMutationOperator(MutationOperator):
     perform simple mutations, such as replacing one operator with another.
     """
 
-    metaTypes = ["Traditional", "All"]
+    metaTypes = ["Traditional", "All", "Sufficient"]
+    candidateTokens = frozenset()  # this class mutates nothing by itself
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -718,12 +1337,6 @@ class TraditionalMutationOperator(MutationOperator):
         super().__init__(sourceTree, sourceCode, javaParseObject)
         self.mutatorType = "GenericTraditionalMutationOperator"
 
-    def findNodes(self):
-        """
-        Finds all expression nodes in the parse tree.
-        """
-        self.allNodes = self.javaParseObject.seekAllNodes(self.sourceTree, JavaParser.ExpressionContext)
-
     def filterCriteriaBinaryExpression(self, node: JavaParser.ExpressionContext, symbolList: List[str]):
         """
         A helper method to filter binary expressions based on a list of symbols.
@@ -783,7 +1396,6 @@ class TraditionalMutationOperator(MutationOperator):
                             mutatorType=self.mutatorType, replacementText=replacementText, color=self.color)
 
         mutant = Mutant(mutantID=id, mutationList=[mutation], sourceCode=self.sourceCode)
-        mutant.mutateCode()
 
         return mutant
 
@@ -802,10 +1414,33 @@ class TraditionalMutationOperator(MutationOperator):
                             replacementText=replacementText, color=self.color)
 
         mutant = Mutant(mutantID=id, mutationList=[mutation], sourceCode=self.sourceCode)
-        mutant.mutateCode()
 
         return mutant
 
+    def generateMutantsExpression(self, node: JavaParser.ExpressionContext, replacementText: str, id: int):
+        """
+        A helper method to generate mutants that replace a whole expression.
+        :param node: The expression node to mutate.
+        :param replacementText: The text to replace the expression with.
+        :param id: The ID of the mutant.
+        :return: A Mutant object.
+        """
+        mutation = Mutation(startPos=node.start.start, endPos=node.stop.stop, lineNumber=node.start.line,
+                            nodeID=node.nodeIndex, mutatorType=self.mutatorType, replacementText=replacementText,
+                            color=self.color)
+
+        mutant = Mutant(mutantID=id, mutationList=[mutation], sourceCode=self.sourceCode)
+
+        return mutant
+
+    def getNodeText(self, node) -> str:
+        """
+        A helper method to get the source code of a node, as it is written.
+        :param node: The node.
+        :return: The source code of the node.
+        """
+        return self.sourceCode[node.start.start:node.stop.stop + 1]
+
 
 class ArithmeticOperatorReplacementBinary(TraditionalMutationOperator):
     """
@@ -813,6 +1448,8 @@ class ArithmeticOperatorReplacementBinary(TraditionalMutationOperator):
     ``+`` is replaced with ``-``.
     """
     instantiable = True
+    candidateTokens = frozenset({'+', '-', '*', '/', '%'})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -850,6 +1487,9 @@ class RelationalOperatorReplacement(TraditionalMutationOperator):
     replaced with ``<=``.
     """
     instantiable = True
+    metaTypes = ["Traditional", "All"]
+    candidateTokens = frozenset({'>', '>=', '<', '<=', '==', '!='})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -881,12 +1521,126 @@ class RelationalOperatorReplacement(TraditionalMutationOperator):
             self.mutants.append(mutant)
 
 
+class RelationalOperatorReplacementSufficient(TraditionalMutationOperator):
+    """
+    This mutation operator replaces relational operators with the sufficient
+    set of replacements of Kaminski et al. ("Better Predicate Testing", 2011),
+    whose mutants subsume the mutants of all the other replacements. For
+    example, ``a > b`` is replaced with ``a >= b``, ``a != b``, and ``false``.
+    An equality on operands that are not known to be numeric is only replaced
+    with ``false`` and ``true``.
+    """
+    instantiable = True
+    metaTypes = ["Sufficient"]
+    candidateTokens = frozenset({'>', '>=', '<', '<=', '==', '!='})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
+    usesSymbolIndex = True
+    sufficientReplacements = {'>': ('>=', '!=', 'false'), '>=': ('>', '==', 'true'), '<': ('<=', '!=', 'false'),
+                              '<=': ('<', '==', 'true'), '==': ('<=', '>=', 'false'), '!=': ('<', '>', 'true')}
+    nonNumericReplacements = {'==': ('false', 'true'), '!=': ('false', 'true')}
+    # the other five operators, ``true``, and ``false``; or the other equality operator, ``true``, and ``false``.
+    allReplacementCount = 7
+    nonNumericReplacementCount = 3
+
+    def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
+                 generateMutants: bool = True):
+        super().__init__(sourceTree, sourceCode, javaParseObject)
+        self.mutatorType = "RelationalOperatorReplacementSufficient"
+        self.color = "#E9967A"
+        self.nonNumericNodes = set()
+        self.findNodes()
+        self.filterCriteria()
+        if generateMutants:
+            self.generateMutants()
+
+    def filterCriteria(self):
+        """
+        Filters the expression nodes to include only those that are relational operations, and finds the equalities
+        whose operands may not be numeric.
+        """
+        symbolIndex = self.javaParseObject.symbolIndex
+        numericTypes = (symbolIndex.primitiveTypes | symbolIndex.boxedTypes) - {"boolean", "Boolean"}
+
+        for node in self.allNodes:
+            if not self.filterCriteriaBinaryExpression(node, ['>', '>=', '<', '<=', '==', '!=']):
+                continue
+
+            if node.children[1].symbol.text in self.nonNumericReplacements and not (
+                    symbolIndex.getExpressionType(node.children[0]) in numericTypes and
+                    symbolIndex.getExpressionType(node.children[2]) in numericTypes):
+                self.nonNumericNodes.add(node)
+
+            self.mutableNodes.append(node)
+
+    def generateMutants(self):
+        """
+        Generates mutants by replacing the relational operators with their sufficient replacements.
+        """
+        id = 0
+        for node in self.mutableNodes:
+            symbol = node.children[1].symbol
+            if node in self.nonNumericNodes:
+                replacements = self.nonNumericReplacements[symbol.text]
+            else:
+                replacements = self.sufficientReplacements[symbol.text]
+
+            for replacement in replacements:
+                id += 1
+                if replacement in ('true', 'false'):
+                    mutant = self.generateMutantsExpression(node, replacement, id)
+
+                elif self.isRightOperandOfEquality(node) and replacement in ('==', '!='):
+                    # "a == b < c" would become "(a == b) != c".
+                    mutant = self.generateMutantsExpression(
+                        node, "(" + self.sourceCode[node.start.start:symbol.start] + replacement +
+                              self.sourceCode[symbol.stop + 1:node.stop.stop + 1] + ")", id)
+
+                else:
+                    mutant = self.generateMutantsBinaryExpression(node, {symbol.text: replacement}, id)
+
+                self.mutants.append(mutant)
+
+    def getSubsumedReplacementCount(self) -> int:
+        """
+        Counts the replacements of the full relational operator replacement set that are not in the sufficient set.
+
+        :return: The number of subsumed replacements.
+        :rtype: int
+        """
+        subsumedReplacementCount = 0
+        for node in self.mutableNodes:
+            if node in self.nonNumericNodes:
+                subsumedReplacementCount += self.nonNumericReplacementCount - len(self.nonNumericReplacements['=='])
+            else:
+                subsumedReplacementCount += self.allReplacementCount - len(self.sufficientReplacements['=='])
+
+        return subsumedReplacementCount
+
+    @staticmethod
+    def isRightOperandOfEquality(node: JavaParser.ExpressionContext) -> bool:
+        """
+        Checks if an expression is the right operand of an equality operator.
+
+        :param node: The expression node.
+        :type node: JavaParser.ExpressionContext
+        :return: True if the expression is the right operand of ``==`` or ``!=``.
+        :rtype: bool
+        """
+        parent = node.parentCtx
+        return (isinstance(parent, JavaParser.ExpressionContext) and parent.getChildCount() == 3 and
+                parent.children[2] is node and isinstance(parent.children[1], TerminalNode) and
+                parent.children[1].symbol.text in ('==', '!='))
+
+
 class ConditionalOperatorReplacement(TraditionalMutationOperator):
     """
     This mutation operator replaces conditional operators. For example, ``&&``
     is replaced with ``||``.
     """
     instantiable = True
+    metaTypes = ["Traditional", "All"]
+    candidateTokens = frozenset({'&&', '||'})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -917,12 +1671,77 @@ class ConditionalOperatorReplacement(TraditionalMutationOperator):
             self.mutants.append(mutant)
 
 
+class ConditionalOperatorReplacementSufficient(TraditionalMutationOperator):
+    """
+    This mutation operator replaces conditional operators with the sufficient
+    set of replacements of Kaminski et al. ("Improving Logic-Based Testing",
+    2013), whose mutants subsume the mutants of all the other replacements.
+    For example, ``a && b`` is replaced with ``(a) == (b)``, ``a``, ``b``, and
+    ``false``.
+    """
+    instantiable = True
+    metaTypes = ["Sufficient"]
+    candidateTokens = frozenset({'&&', '||'})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
+    # the equality operator and the constant of each operator, besides each operand.
+    sufficientReplacements = {'&&': ('==', 'false'), '||': ('!=', 'true')}
+    sufficientReplacementCount = 4
+    # the other conditional operator, ``==``, ``!=``, each operand, ``true``, and ``false``.
+    allReplacementCount = 7
+
+    def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
+                 generateMutants: bool = True):
+        super().__init__(sourceTree, sourceCode, javaParseObject)
+        self.mutatorType = "ConditionalOperatorReplacementSufficient"
+        self.color = "#6495ED"
+        self.findNodes()
+        self.filterCriteria()
+        if generateMutants:
+            self.generateMutants()
+
+    def filterCriteria(self):
+        """
+        Filters the expression nodes to include only those that are conditional operations.
+        """
+        for node in self.allNodes:
+            if self.filterCriteriaBinaryExpression(node, ['&&', '||']):
+                self.mutableNodes.append(node)
+
+    def generateMutants(self):
+        """
+        Generates mutants by replacing the conditional operators with their sufficient replacements.
+        """
+        id = 0
+        for node in self.mutableNodes:
+            equalityOperator, constant = self.sufficientReplacements[node.children[1].symbol.text]
+            leftOperand = self.getNodeText(node.children[0])
+            rightOperand = self.getNodeText(node.children[2])
+            # the operands may bind less tightly than the equality operator, as in "a & b".
+            replacements = ["(" + leftOperand + ") " + equalityOperator + " (" + rightOperand + ")", leftOperand,
+                            rightOperand, constant]
+
+            for replacement in replacements:
+                id += 1
+                self.mutants.append(self.generateMutantsExpression(node, replacement, id))
+
+    def getSubsumedReplacementCount(self) -> int:
+        """
+        Counts the replacements of the full conditional operator replacement set that are not in the sufficient set.
+
+        :return: The number of subsumed replacements.
+        :rtype: int
+        """
+        return len(self.mutableNodes) * (self.allReplacementCount - self.sufficientReplacementCount)
+
+
 class LogicalOperatorReplacement(TraditionalMutationOperator):
     """
     This mutation operator replaces logical operators. For example, ``&`` is
     replaced with ``|``.
     """
     instantiable = True
+    candidateTokens = frozenset({'&', '|', '^'})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -959,6 +1778,8 @@ class AssignmentOperatorReplacementShortcut(TraditionalMutationOperator):
     ``+=`` is replaced with ``-=``.
     """
     instantiable = True
+    candidateTokens = frozenset({'+=', '-=', '*=', '/=', '%=', '&=', '|=', '^=', '<<=', '>>=', '>>>='})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -999,6 +1820,8 @@ class ArithmeticOperatorReplacementUnary(TraditionalMutationOperator):
     """
 
     instantiable = True
+    candidateTokens = frozenset({'+', '-'})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -1035,6 +1858,8 @@ class ConditionalOperatorDeletion(TraditionalMutationOperator):
     is replaced with ``a``.
     """
     instantiable = True
+    candidateTokens = frozenset({'!'})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -1071,6 +1896,8 @@ class ArithmeticOperatorReplacementShortcut(TraditionalMutationOperator):
     ``++`` is replaced with ``--``.
     """
     instantiable = True
+    candidateTokens = frozenset({"++", "--"})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -1126,7 +1953,6 @@ class ArithmeticOperatorReplacementShortcut(TraditionalMutationOperator):
                                 color=self.color)
 
             mutant = Mutant(mutantID=id, mutationList=[mutation], sourceCode=self.sourceCode)
-            mutant.mutateCode()
             self.mutants.append(mutant)
 
 
@@ -1136,6 +1962,8 @@ class ShiftOperatorReplacement(TraditionalMutationOperator):
     replaced with ``>>``.
     """
     instantiable = True
+    candidateTokens = frozenset({"<", ">"})
+    nodeRoutes = ((JavaParser.ExpressionContext, candidateTokens),)
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
                  generateMutants: bool = True):
@@ -1216,13 +2044,134 @@ class ShiftOperatorReplacement(TraditionalMutationOperator):
                                     replacementText=replacementText, color=self.color)
 
             mutant = Mutant(mutantID=id, mutationList=[mutation], sourceCode=self.sourceCode)
-            mutant.mutateCode()
             self.mutants.append(mutant)
 
 
 #################################################
 
 
+class MutationDispatcher(object):
+    """
+    This class finds the nodes that a set of mutation operators visit, in a
+    single walk over the parse tree. Each operator declares the types of the
+    nodes it visits, and the routing tokens it is interested in (see
+    ``MutationOperator.nodeRoutes``). The walk visits the nodes of all these
+    types at once, and a table built from the declarations routes each node,
+    by its type and its routing token, to the operators that may mutate it.
+    Each operator then filters only its own candidates, instead of every node
+    of the type, so the cost of the operators that find nothing in a node
+    does not add up.
+
+    The nodes of each operator are in the order in which
+    ``JavaParse.seekAllNodes`` finds them, so the mutants are the same as if
+    each operator walked the tree on its own.
+    """
+
+    def __init__(self, sourceTree, javaParseObject: JavaParse, operatorClasses):
+        """
+        Initializes the MutationDispatcher object, and routes the nodes of the
+        parse tree to the operators.
+
+        :param sourceTree: The root of the parse tree.
+        :type sourceTree: antlr4.tree.Tree.ParseTree
+        :param javaParseObject: The JavaParse object to use for parsing.
+        :type javaParseObject: littledarwin.JavaParse.JavaParse
+        :param operatorClasses: The classes of the operators to route the nodes
+                                to.
+        :type operatorClasses: list
+        """
+        self.operatorClasses = frozenset(operatorClasses)
+        self.routedNodes = dict()  # (operator class, route index) -> list of nodes
+
+        routeTable = dict()  # (node type, routing token or None) -> list of node lists
+        for operatorClass in self.operatorClasses:
+            for routeIndex, (nodeType, routingTokens) in enumerate(operatorClass.nodeRoutes):
+                nodeList = list()
+                self.routedNodes[(operatorClass, routeIndex)] = nodeList
+                for routingToken in (routingTokens if routingTokens is not None else [None]):
+                    routeTable.setdefault((nodeType, routingToken), list()).append(nodeList)
+
+        nodeTypes = tuple(set(nodeType for nodeType, routingToken in routeTable.keys()))
+        if len(nodeTypes) == 0:
+            return
+
+        nodeTypesPerClass = dict()  # node class -> the routed node types that it is a subclass of
+        for node in javaParseObject.getNodeTable(sourceTree).findAll(nodeTypes, sourceTree.nodeIndex):
+            nodeClass = node.__class__
+            matchingTypes = nodeTypesPerClass.get(nodeClass)
+            if matchingTypes is None:
+                matchingTypes = [nodeType for nodeType in nodeTypes if issubclass(nodeClass, nodeType)]
+                nodeTypesPerClass[nodeClass] = matchingTypes
+
+            routingToken = self.getRoutingToken(node)
+            for nodeType in matchingTypes:
+                for nodeList in routeTable.get((nodeType, None), ()):
+                    nodeList.append(node)
+                if routingToken is not None:
+                    for nodeList in routeTable.get((nodeType, routingToken), ()):
+                        nodeList.append(node)
+
+    @staticmethod
+    def getRoutingToken(node) -> str:
+        """
+        Gets the token by which a node is routed: the text of a terminal node,
+        or else the text of the first terminal among the first two children of
+        the node. This is the operator of a unary or a binary expression, and
+        the keyword of a statement.
+
+        :param node: The node.
+        :type node: antlr4.tree.Tree.ParseTree
+        :return: The routing token, or None if the node has none.
+        :rtype: str
+        """
+        if isinstance(node, TerminalNode):
+            return node.symbol.text
+
+        for child in (node.children or ())[:2]:
+            if isinstance(child, TerminalNode):
+                return child.symbol.text
+
+        return None
+
+    @classmethod
+    def getDispatcher(cls, sourceTree, javaParseObject: JavaParse, operatorClass) -> 'MutationDispatcher':
+        """
+        Gets the dispatcher of a parse tree that routes the nodes to an
+        operator. This is the dispatcher set on the tree by ``JavaMutate``, or
+        a new one for the operator alone.
+
+        :param sourceTree: The root of the parse tree.
+        :type sourceTree: antlr4.tree.Tree.ParseTree
+        :param javaParseObject: The JavaParse object to use for parsing.
+        :type javaParseObject: littledarwin.JavaParse.JavaParse
+        :param operatorClass: The class of the operator.
+        :type operatorClass: type
+        :return: The dispatcher.
+        :rtype: MutationDispatcher
+        """
+        dispatcher = getattr(sourceTree, 'mutationDispatcher', None)
+        if dispatcher is None or operatorClass not in dispatcher.operatorClasses:
+            dispatcher = cls(sourceTree, javaParseObject, [operatorClass])
+
+        return dispatcher
+
+    def getNodes(self, operatorClass) -> list:
+        """
+        Gets the nodes routed to an operator.
+
+        :param operatorClass: The class of the operator.
+        :type operatorClass: type
+        :return: The nodes of each route of the operator, one route after the
+                 other.
+        :rtype: list
+        """
+        nodes = list()
+        for routeIndex in range(len(operatorClass.nodeRoutes)):
+            nodes.extend(self.routedNodes[(operatorClass, routeIndex)])
+
+        return nodes
+
+
 def getAllInstantiableSubclasses(parentClass):
     """
     Gets all instantiable subclasses of a given class.
@@ -1247,7 +2196,7 @@ class JavaMutate(object):
     """
 
     def __init__(self, sourceTree: JavaParser.CompilationUnitContext, sourceCode: str, javaParseObject: JavaParse,
-                 verbose: bool = False):
+                 verbose: bool = False, methodScope=None):
         """
         Initializes a JavaMutate object.
 
@@ -1259,14 +2208,22 @@ class JavaMutate(object):
         :type javaParseObject: littledarwin.JavaParse.JavaParse
         :param verbose: A boolean indicating whether to print verbose output.
         :type verbose: bool
+        :param methodScope: The names of the methods and constructors to
+                            mutate, or None to mutate the whole file.
+        :type methodScope: set, optional
         """
         self.verbose = verbose
+        self.methodScope = methodScope
+        self.methodScopeRoots = None
         self.sourceCode = sourceCode
         self.sourceTree = sourceTree
         self.mutantsPerLine = dict()
         self.mutantsPerMethod = dict()
         self.averageDensity = -1
         self.mutants = list()
+        self.mutantTypeCount = dict()
+        self.subsumedReplacementCount = 0
+        self.unsampledMutantCount = 0
         self.mutationOperators = list()
 
         if isinstance(javaParseObject, JavaParse):
@@ -1276,7 +2233,57 @@ class JavaMutate(object):
 
         # self.instantiateMutationOperators()
 
-        self.inMethodLines = self.javaParseObject.getInMethodLines(self.sourceTree)
+        self.fileMetrics = self.javaParseObject.getFileMetrics(self.sourceTree)
+        self.inMethodLines = list(self.fileMetrics.inMethodLines)
+
+    @staticmethod
+    def usesSymbolIndex(metaTypes: List[str] = ["Traditional"]) -> bool:
+        """
+        Checks whether any of the mutation operators of the specified meta
+        types looks up the symbol index, so that the declarations of the
+        project are only indexed when they are used.
+
+        :param metaTypes: The types of mutation operators to use.
+        :type metaTypes: list
+        :return: True if an operator uses the symbol index.
+        :rtype: bool
+        """
+        return any(MO.usesSymbolIndex for MO in getAllInstantiableSubclasses(MutationOperator)
+                   if any(metaType in MO.metaTypes for metaType in metaTypes))
+
+    @staticmethod
+    def hasMutationCandidates(sourceCode: str, metaTypes: List[str] = ["Traditional"], methodScope=None) -> bool:
+        """
+        Checks whether the mutation operators of the specified meta types may
+        find anything to mutate in a source file, by tokenizing it without
+        parsing it. The check is conservative: a file for which it returns
+        False yields no mutants, and does not need to be parsed.
+
+        :param sourceCode: The source code of the file.
+        :type sourceCode: str
+        :param metaTypes: The types of mutation operators to use.
+        :type metaTypes: list
+        :param methodScope: The names of the methods and constructors to
+                            mutate, or None to mutate the whole file.
+        :type methodScope: set, optional
+        :return: False if the file yields no mutants.
+        :rtype: bool
+        """
+        try:
+            tokenTexts = FastJavaLexer(sourceCode).getTokenTexts()
+
+        except FastJavaLexerError as e:
+            return True  # the parser reports the error
+
+        # the name of a method in the scope is an identifier in the file.
+        if methodScope is not None and methodScope.isdisjoint(tokenTexts):
+            return False
+
+        for MO in getAllInstantiableSubclasses(MutationOperator):
+            if any(metaType in MO.metaTypes for metaType in metaTypes) and MO.mayHaveCandidates(tokenTexts):
+                return True
+
+        return False
 
     def instantiateMutationOperators(self, metaTypes: List[str] = ["Traditional"], generateMutants: bool = True):
         """
@@ -1287,11 +2294,38 @@ class JavaMutate(object):
         :param generateMutants: A boolean indicating whether to generate mutants.
         :type generateMutants: bool
         """
-        for MO in getAllInstantiableSubclasses(MutationOperator):
-            for metaType in metaTypes:
-                if metaType in MO.metaTypes:
-                    self.mutationOperators.append(
-                        MO(self.sourceTree, self.sourceCode, self.javaParseObject, generateMutants))
+        operatorClasses = [MO for MO in getAllInstantiableSubclasses(MutationOperator)
+                           for metaType in metaTypes if metaType in MO.metaTypes]
+
+        # the nodes of the tree are routed to all the operators in a single walk.
+        self.sourceTree.mutationDispatcher = MutationDispatcher(self.sourceTree, self.javaParseObject, operatorClasses)
+        for MO in operatorClasses:
+            self.mutationOperators.append(MO(self.sourceTree, self.sourceCode, self.javaParseObject, generateMutants))
+
+        if self.methodScope is not None:
+            for mO in self.mutationOperators:
+                mO.mutableNodes = [node for node in mO.mutableNodes if self.isInMethodScope(node.nodeIndex)]
+                mO.mutants = [mutant for mutant in mO.mutants
+                              if all(self.isInMethodScope(mutation.nodeID) for mutation in mutant.mutationList)]
+
+    def isInMethodScope(self, nodeIndex: int) -> bool:
+        """
+        Checks whether a node is in one of the methods or constructors of the
+        method scope.
+
+        :param nodeIndex: The index of the node.
+        :type nodeIndex: int
+        :return: True if the node is in the method scope.
+        :rtype: bool
+        """
+        nodeTable = self.javaParseObject.getNodeTable(self.sourceTree)
+        if self.methodScopeRoots is None:
+            self.methodScopeRoots = [declaration.nodeIndex for declaration in nodeTable.findAll(
+                (JavaParser.MethodDeclarationContext, JavaParser.ConstructorDeclarationContext,
+                 JavaParser.InterfaceMethodDeclarationContext))
+                if self.javaParseObject.getSimpleMethodName(declaration) in self.methodScope]
+
+        return any(nodeTable.contains(rootIndex, nodeIndex) for rootIndex in self.methodScopeRoots)
 
     def countMutants(self, metaTypes: List[str] = ["Traditional"]):
         """
@@ -1322,86 +2356,246 @@ class JavaMutate(object):
 
         return mutationTypeCount
 
-    def gatherMutants(self, metaTypes: List[str] = ["Traditional"]):
-        """
-        Gathers all mutants of the specified meta types.
+    def iterateMutants(self, metaTypes: List[str] = ["Traditional"], higherOrderDirective: int = 1,
+                       mutantSampler: MutantSampler = None, sampleKey: str = ""):
+        """
+        Generates the mutants of the specified meta types one by one, and
+        renders the text of each mutant only when it is yielded, so that the
+        mutants can be written out as they are produced, without holding the
+        texts of all of them. The number of mutants of each type is available
+        in ``mutantTypeCount`` before the first mutant is yielded (or after
+        the last one, for higher-order mutants), as is the number of
+        replacements of the full relational and conditional replacement sets
+        that the sufficient operators do not generate in
+        ``subsumedReplacementCount``, and the number of first-order mutants left out
+        by the sampler in ``unsampledMutantCount``. The density counters are
+        complete once the generator is exhausted.
 
         :param metaTypes: The types of mutation operators to use.
         :type metaTypes: list
-        :return: A tuple containing a list of mutated source code and a
-                 dictionary mapping mutation operator types to the number of
-                 mutants.
-        :rtype: tuple
+        :param higherOrderDirective: The requested higher-order order. 1 for
+                                     first-order mutants, and -1 to adjust it
+                                     to the number of mutants.
+        :type higherOrderDirective: int
+        :param mutantSampler: The sampler that selects the first-order mutants
+                              to keep, or None to keep all of them.
+        :type mutantSampler: MutantSampler
+        :param sampleKey: The key of the file for the sampler, such as its
+                          relative path.
+        :type sampleKey: str
+        :return: A generator of (mutant, mutant text) tuples.
+        :rtype: collections.abc.Iterator[tuple]
         """
-        mutationTypeCount = dict()
-        mutantTexts = list()
-
         self.instantiateMutationOperators(metaTypes)
+        self.mutantTypeCount = dict()
+        self.subsumedReplacementCount = sum(mO.getSubsumedReplacementCount() for mO in self.mutationOperators)
+
+        selectedMutants = self.getSelectedMutants(metaTypes)
+        self.unsampledMutantCount = 0
+        if mutantSampler is not None:
+            sampledMutants = self.sampleMutants(selectedMutants, mutantSampler, sampleKey)
+            self.unsampledMutantCount = len(selectedMutants) - len(sampledMutants)
+            selectedMutants = sampledMutants
+
+        if higherOrderDirective == 1:
+            for mO in self.mutationOperators:
+                if any(metaType in mO.metaTypes for metaType in metaTypes):
+                    self.mutantTypeCount[mO.mutatorType] = 0
+            for mutant in selectedMutants:
+                mutatorType = mutant.mutationList[0].mutatorType
+                self.mutantTypeCount[mutatorType] = 1 + self.mutantTypeCount.get(mutatorType, 0)
+            mutants = iter(selectedMutants)
 
-        for mO in self.mutationOperators:
-            for metaType in metaTypes:
-                if metaType in mO.metaTypes:
-                    mutationTypeCount[mO.mutatorType] = len(mO.mutants)
-                    for mutant in mO.mutants:
-                        self.mutants.append(mutant)
-                        mutantTexts.append(str(mutant))
-                        for mutation in mutant.mutationList:
-                            self.mutantsPerLine[mutation.lineNumber] = 1 + self.mutantsPerLine.get(mutation.lineNumber,
-                                                                                                   0)
-                            methodName = self.javaParseObject.getMethodNameForNode(self.sourceTree, mutation.nodeID)
-                            self.mutantsPerMethod[methodName] = 1 + self.mutantsPerMethod.get(methodName, 0)
+        else:
+            mutants = self.combineMutants(higherOrderDirective, metaTypes, selectedMutants)
+
+        mutantCount = 0
+        for mutant in mutants:
+            mutantCount += 1
+            self.mutants.append(mutant)
+            for mutation in mutant.mutationList:
+                self.mutantsPerLine[mutation.lineNumber] = 1 + self.mutantsPerLine.get(mutation.lineNumber, 0)
+                methodName = self.javaParseObject.getMethodNameForNode(self.sourceTree, mutation.nodeID)
+                self.mutantsPerMethod[methodName] = 1 + self.mutantsPerMethod.get(methodName, 0)
+
+            yield mutant, str(mutant)
+
+        if higherOrderDirective != 1:
+            self.mutantTypeCount = {"Higher-Order": mutantCount}
 
         self.averageDensity = sum(self.mutantsPerLine.values()) / len(self.inMethodLines) if len(
             self.inMethodLines) > 0 else 0
 
-        return mutantTexts, mutationTypeCount
-
-    def gatherHigherOrderMutants(self, higherOrderDirective: int, metaTypes: List[str] = ["Traditional"]):
+    def getSelectedMutants(self, metaTypes: List[str] = ["Traditional"]) -> list:
         """
-        Gathers all mutants and creates higher-order mutants.
+        Gathers the first-order mutants of the instantiated operators of the
+        specified meta types.
 
-        :param higherOrderDirective: The requested higher-order order.
-        :type higherOrderDirective: int
-        :param metaTypes: The type of mutation operators to use.
+        :param metaTypes: The types of mutation operators to use.
         :type metaTypes: list
-        :return: A tuple containing a list of mutated source code and a
-                 dictionary mapping mutation operator types to the number of
-                 mutants.
-        :rtype: tuple
+        :return: The first-order mutants, in the order of the operators.
+        :rtype: list
         """
         selectedMutants = list()
-
-        self.instantiateMutationOperators(metaTypes)
-
         for mO in self.mutationOperators:
             for metaType in metaTypes:
                 if metaType in mO.metaTypes:
                     selectedMutants.extend(mO.mutants)
 
+        return selectedMutants
+
+    def sampleMutants(self, mutants: list, mutantSampler: MutantSampler, sampleKey: str = "") -> list:
+        """
+        Selects a sample of the first-order mutants with the given sampler,
+        stratified by the mutation operator, the method, or the class of each
+        mutant, or weighted by the cyclomatic complexity of its method,
+        depending on the strategy of the sampler.
+
+        :param mutants: The first-order mutants.
+        :type mutants: list
+        :param mutantSampler: The sampler.
+        :type mutantSampler: MutantSampler
+        :param sampleKey: The key of the file, such as its relative path.
+        :type sampleKey: str
+        :return: The selected mutants, in their original order.
+        :rtype: list
+        """
+        # the order of the operators differs between processes, so the mutants are sampled in the order of their
+        # mutations, for the sample to be the same in every process.
+        sortedMutants = sorted(mutants, key=lambda mutant: [(mutation.startPos, mutation.endPos, mutation.mutatorType,
+                                                             mutation.replacementText)
+                                                            for mutation in mutant.mutationList])
+        strata = None
+        weights = None
+
+        if mutantSampler.strategy == "operator":
+            strata = [mutant.mutationList[0].mutatorType for mutant in sortedMutants]
+
+        elif mutantSampler.strategy == "method":
+            strata = [self.javaParseObject.getMethodNameForNode(self.sourceTree, mutant.mutationList[0].nodeID)
+                      for mutant in sortedMutants]
+
+        elif mutantSampler.strategy == "class":
+            strata = [self.javaParseObject.getClassNameForNode(self.sourceTree, mutant.mutationList[0].nodeID)
+                      for mutant in sortedMutants]
+
+        elif mutantSampler.strategy == "weighted":
+            cyclomaticComplexityPerMethod = dict(self.fileMetrics.cyclomaticComplexityPerMethod)
+            weights = [max(cyclomaticComplexityPerMethod.get(
+                self.javaParseObject.getMethodNameForNode(self.sourceTree, mutant.mutationList[0].nodeID), 1), 1)
+                for mutant in sortedMutants]
+
+        sampledMutants = {id(mutant) for mutant in mutantSampler.sample(sortedMutants, sampleKey, strata, weights)}
+        return [mutant for mutant in mutants if id(mutant) in sampledMutants]
+
+    def combineMutants(self, higherOrderDirective: int, metaTypes: List[str] = ["Traditional"],
+                       selectedMutants: list = None):
+        """
+        Combines the first-order mutants of the instantiated operators of the
+        specified meta types into higher-order mutants, in a random order.
+
+        :param higherOrderDirective: The requested higher-order order, or -1 to
+                                     adjust it to the number of mutants.
+        :type higherOrderDirective: int
+        :param metaTypes: The types of mutation operators to use.
+        :type metaTypes: list
+        :param selectedMutants: The first-order mutants to combine, or None to
+                                combine all the mutants of the meta types.
+        :type selectedMutants: list
+        :return: A generator of the higher-order mutants.
+        :rtype: collections.abc.Iterator[Mutant]
+        """
+        selectedMutants = list(self.getSelectedMutants(metaTypes) if selectedMutants is None else selectedMutants)
+
+        if len(selectedMutants) == 0:
+            return
+
         higherOrder = max(int(log10(len(selectedMutants))) if higherOrderDirective == -1 else higherOrderDirective, 1)
         shuffle(selectedMutants)
-        mutantTexts = list()
 
-        while len(selectedMutants) > 0:
-            higherOrderMutant = None
-            for mutant in selectedMutants[:higherOrder]:
-                higherOrderMutant += mutant
+        # a mutant that overlaps the mutants drawn for a higher-order mutant is put back, to lead the next one. Each
+        # higher-order mutant puts back at most higherOrder mutants, and is left short if it cannot be filled.
+        pendingMutants = deque(selectedMutants)
+        while len(pendingMutants) > 0:
+            drawnMutants = list()
+            spanStarts = list()
+            spanEnds = list()
+            putBackMutants = list()
+
+            while len(pendingMutants) > 0 and len(drawnMutants) < higherOrder and len(putBackMutants) < higherOrder:
+                mutant = pendingMutants.popleft()
+                spans = [(mutation.startPos, mutation.endPos) for mutation in mutant.mutationList]
+                if any(self._overlapsSpans(spanStarts, spanEnds, start, end) for start, end in spans):
+                    putBackMutants.append(mutant)
+                    continue
 
-            mutantTexts.append(str(higherOrderMutant))
-            self.mutants.append(higherOrderMutant)
-            for mutation in higherOrderMutant.mutationList:
-                self.mutantsPerLine[mutation.lineNumber] = 1 + self.mutantsPerLine.get(mutation.lineNumber, 0)
-                self.mutantsPerMethod[self.javaParseObject.getMethodNameForNode(
-                    self.sourceTree, mutation.nodeID)] = 1 + self.mutantsPerMethod.get(mutation.lineNumber, 0)
+                drawnMutants.append(mutant)
+                for start, end in spans:
+                    index = bisect_left(spanStarts, start)
+                    spanStarts.insert(index, start)
+                    spanEnds.insert(index, end)
 
-            selectedMutants = selectedMutants[higherOrder:]
+            pendingMutants.extendleft(reversed(putBackMutants))
+            higherOrderMutant = Mutant.compose(drawnMutants)
 
-        mutationTypeCount = {"Higher-Order": len(mutantTexts)}
+            if higherOrderMutant is not None:
+                yield higherOrderMutant
 
-        self.averageDensity = sum(self.mutantsPerLine.values()) / len(self.inMethodLines) if len(
-            self.inMethodLines) > 0 else 0
+            else:
+                # a first-order mutant with overlapping mutations of its own keeps them as they are.
+                yield sum(drawnMutants, None)
+
+    @staticmethod
+    def _overlapsSpans(spanStarts: List[int], spanEnds: List[int], start: int, end: int) -> bool:
+        """
+        Checks if a span overlaps one of the given spans, which are sorted and
+        do not overlap each other.
+
+        :param spanStarts: The sorted start positions of the spans.
+        :type spanStarts: list
+        :param spanEnds: The end positions of the spans.
+        :type spanEnds: list
+        :param start: The start position of the span.
+        :type start: int
+        :param end: The end position of the span.
+        :type end: int
+        :return: True if the span overlaps one of the spans, False otherwise.
+        :rtype: bool
+        """
+        index = bisect_right(spanStarts, end)
+        return index > 0 and spanEnds[index - 1] >= start
+
+    def gatherMutants(self, metaTypes: List[str] = ["Traditional"]):
+        """
+        Gathers all mutants of the specified meta types.
+
+        :param metaTypes: The types of mutation operators to use.
+        :type metaTypes: list
+        :return: A tuple containing a list of mutated source code and a
+                 dictionary mapping mutation operator types to the number of
+                 mutants.
+        :rtype: tuple
+        """
+        mutantTexts = [mutantText for mutant, mutantText in self.iterateMutants(metaTypes)]
 
-        return mutantTexts, mutationTypeCount
+        return mutantTexts, self.mutantTypeCount
+
+    def gatherHigherOrderMutants(self, higherOrderDirective: int, metaTypes: List[str] = ["Traditional"]):
+        """
+        Gathers all mutants and creates higher-order mutants.
+
+        :param higherOrderDirective: The requested higher-order order.
+        :type higherOrderDirective: int
+        :param metaTypes: The type of mutation operators to use.
+        :type metaTypes: list
+        :return: A tuple containing a list of mutated source code and a
+                 dictionary mapping mutation operator types to the number of
+                 mutants.
+        :rtype: tuple
+        """
+        mutantTexts = [mutantText for mutant, mutantText in self.iterateMutants(metaTypes, higherOrderDirective)]
+
+        return mutantTexts, self.mutantTypeCount
 
     @property
     def cssStyle(self):
@@ -1436,56 +2630,88 @@ class JavaMutate(object):
         :return: An HTML report of all mutations for a file.
         :rtype: str
         """
+        return "".join(self.getAggregateReportSegments(littleDarwinVersion))
+
+    def getAggregateReportSegments(self, littleDarwinVersion: str):
+        """
+        Renders the HTML report of all mutations for a file as a sequence of
+        segments. The source code is copied in chunks between the positions
+        where something is inserted: the start and the end of a mutation, a
+        line break, or a tab.
+
+        :param littleDarwinVersion: The version of LittleDarwin.
+        :type littleDarwinVersion: str
+        :return: A generator of the segments of the report.
+        :rtype: collections.abc.Iterator[str]
+        """
+        sourceCode = self.sourceCode
+        inMethodLines = set(self.inMethodLines)
         lineNumber = 1
         col = 0
-        maxLineLength = 0
-        for l in self.sourceCode.expandtabs().splitlines(keepends=False):
-            if len(l) > maxLineLength:
-                maxLineLength = len(l)
+        maxLineLength = max((len(l) for l in sourceCode.expandtabs().splitlines(keepends=False)), default=0)
 
-        output = "<!DOCTYPE html><head><title>LittleDarwin Aggregate Mutation Report</title> <style type='text/css'>"
-        output += self.cssStyle + "</style></head><body><h1>LittleDarwin Aggregate Mutation Report</h1>"
-        output += "<p>Average Density: {:.2f}".format(self.averageDensity) + "</p><div><pre class=\"code\">"
-        output += "<span class=\"{}\"><i>{:04d}</i> ".format(
-            "methodLine" if lineNumber in self.inMethodLines else "outsideLine", lineNumber)
+        yield "<!DOCTYPE html><head><title>LittleDarwin Aggregate Mutation Report</title> <style type='text/css'>"
+        yield self.cssStyle + "</style></head><body><h1>LittleDarwin Aggregate Mutation Report</h1>"
+        yield "<p>Average Density: {:.2f}".format(self.averageDensity) + "</p><div><pre class=\"code\">"
+        yield "<span class=\"{}\"><i>{:04d}</i> ".format(
+            "methodLine" if lineNumber in inMethodLines else "outsideLine", lineNumber)
 
+        # the last mutation that starts at a position is shown there, and the mutations that end at a position are
+        # closed by a single tag.
         mutationStartDict = dict()
-        mutationEndList = list()
+        mutationEndSet = set()
         for mutant in self.mutants:
             assert isinstance(mutant, Mutant)
             for mutation in mutant.mutationList:
-                mutationStartDict[mutation.startPos] = (mutation.mutatorType, str(mutation))
-                mutationEndList.append(mutation.endPos)
+                mutationStartDict[mutation.startPos] = mutation
+                mutationEndSet.add(mutation.endPos)
+
+        eventPositions = set(mutationStartDict.keys())
+        eventPositions.update(mutationEndSet)
+        for character in ("\n", "\t"):
+            position = sourceCode.find(character)
+            while position != -1:
+                eventPositions.add(position)
+                position = sourceCode.find(character, position + 1)
+
+        position = 0
+        for i in sorted(eventPositions):
+            if i < 0 or i >= len(sourceCode):
+                continue
+
+            yield sourceCode[position:i]
+            col += i - position
+            position = i + 1
 
-        for i in range(0, len(self.sourceCode)):
             colRemainder = 0
-            if self.sourceCode[i] == "\t":
+            if sourceCode[i] == "\t":
                 colRemainder = 8 - (col % 8)
                 col += colRemainder
             else:
                 col += 1
 
-            if i in mutationStartDict.keys():
-                mutatorType, tooltipText = mutationStartDict[i]
-                output += "<span class=\"{} tooltip\">".format(mutatorType)
-                output += "<span class=\"tooltiptext\">{}</span>".format(tooltipText)
+            if i in mutationStartDict:
+                mutation = mutationStartDict[i]
+                yield "<span class=\"{} tooltip\">".format(mutation.mutatorType)
+                yield "<span class=\"tooltiptext\">{}</span>".format(str(mutation))
 
-            if self.sourceCode[i] == "\n":
-                output += " " * (maxLineLength - col + 1)
+            if sourceCode[i] == "\n":
+                yield " " * (maxLineLength - col + 1)
 
-            output += self.sourceCode[i] if self.sourceCode[i] != "\t" else " " * colRemainder
+            yield sourceCode[i] if sourceCode[i] != "\t" else " " * colRemainder
 
-            if i in mutationEndList:
-                output += "</span>"
+            if i in mutationEndSet:
+                yield "</span>"
 
-            if self.sourceCode[i] == "\n":
+            if sourceCode[i] == "\n":
                 lineNumber += 1
                 col = 0
-                output += "</span><span class=\"{}\"><i>{:04d}</i> ".format(
-                    "methodLine" if lineNumber in self.inMethodLines else "outsideLine", lineNumber)
+                yield "</span><span class=\"{}\"><i>{:04d}</i> ".format(
+                    "methodLine" if lineNumber in inMethodLines else "outsideLine", lineNumber)
 
-        output += " " * (maxLineLength - col)
-        output += "</pre></div><footer><p style=\"font-size: small\">"
-        output += "Report generated by LittleDarwin {} </p></footer></body></html>".format(littleDarwinVersion)
+        yield sourceCode[position:]
+        col += len(sourceCode) - position
 
-        return output
+        yield " " * (maxLineLength - col)
+        yield "</pre></div><footer><p style=\"font-size: small\">"
+        yield "Report generated by LittleDarwin {} </p></footer></body></html>".format(littleDarwinVersion)
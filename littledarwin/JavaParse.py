@@ -1,19 +1,22 @@
-from typing import Dict
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, NamedTuple, Tuple
 
 from antlr4 import *
 from antlr4.InputStream import InputStream
+from antlr4.Lexer import TokenSource
+from antlr4.ListTokenSource import ListTokenSource
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorListener import ConsoleErrorListener
 from antlr4.error.ErrorStrategy import BailErrorStrategy
-from antlr4.tree.Tree import TerminalNodeImpl
+from antlr4.error.Errors import ParseCancellationException
+from antlr4.tree.Tree import TerminalNode, TerminalNodeImpl
 
+from .CompactTree import CompactTree
+from .FastJavaLexer import FastJavaLexer, FastJavaLexerError
 from .JavaLexer import JavaLexer
 from .JavaParser import JavaParser
-
-try:
-    import graphviz
-
-    noGraphviz = False
-except ImportError as e:
-    noGraphviz = True
+from .SymbolIndex import SymbolIndex
 
 
 class LittleDarwinErrorStrategy(BailErrorStrategy):
@@ -35,6 +38,427 @@ class LittleDarwinErrorStrategy(BailErrorStrategy):
         super().recover(parser, exception)
 
 
+class LazyJavaParser(JavaParser):
+    """
+    This class is a JavaParser that does not parse the bodies of methods and
+    constructors. Each body is replaced by a block that only contains its
+    braces, and the tokens between them are kept in ``deferredTokens``, so
+    that the body can be parsed later with ``JavaParse.expandMethodBodies``.
+    The blocks are collected in ``deferredBlocks`` in the order of the
+    source code.
+    """
+
+    nestedTypeTokens = frozenset([JavaParser.CLASS, JavaParser.INTERFACE, JavaParser.ENUM, JavaParser.RECORD])
+
+    def __init__(self, tokenStream: TokenStream):
+        """
+        Initializes the LazyJavaParser object.
+
+        :param tokenStream: The token stream of the file.
+        :type tokenStream: antlr4.BufferedTokenStream.TokenStream
+        """
+        super().__init__(tokenStream)
+        self.deferredBlocks = list()
+
+    def reset(self):
+        """
+        Resets the parser, and forgets the blocks deferred so far.
+        """
+        super().reset()
+        self.deferredBlocks = list()
+
+    def block(self):
+        """
+        Parses a block. The body of a method or a constructor is skipped by
+        matching its braces, and every other block is parsed as usual.
+
+        :return: The block.
+        :rtype: littledarwin.JavaParser.JavaParser.BlockContext
+        """
+        if not isinstance(self._ctx, (JavaParser.MethodBodyContext, JavaParser.ConstructorBodyContext)) or \
+                self._input.LA(1) != JavaParser.LBRACE:
+            return super().block()
+
+        localctx = JavaParser.BlockContext(self, self._ctx, self.state)
+        self.enterRule(localctx, self.atn.ruleToStartState[self.RULE_block].stateNumber, self.RULE_block)
+        try:
+            self.enterOuterAlt(localctx, 1)
+            self.match(JavaParser.LBRACE)
+
+            deferredTokens = list()
+            depth = 1
+            while True:
+                tokenType = self._input.LA(1)
+                if tokenType == JavaParser.LBRACE:
+                    depth += 1
+                elif tokenType == JavaParser.RBRACE:
+                    depth -= 1
+                if depth == 0 or tokenType == Token.EOF:
+                    break
+                deferredTokens.append(self._input.LT(1))
+                self._input.consume()
+
+            self.match(JavaParser.RBRACE)
+            localctx.deferredTokens = deferredTokens
+            self.deferredBlocks.append(localctx)
+
+        except RecognitionException as re:
+            localctx.exception = re
+            self._errHandler.reportError(self, re)
+            self._errHandler.recover(self, re)
+        finally:
+            self.exitRule()
+        return localctx
+
+    @classmethod
+    def containsNestedType(cls, tokens: list) -> bool:
+        """
+        Checks whether a list of tokens may declare a type, such as a local
+        class or an anonymous class, whose methods are counted separately in
+        the metrics. The check is conservative: it may return True for tokens
+        that do not declare a type, but never the other way around.
+
+        :param tokens: The list of tokens.
+        :type tokens: list
+        :return: True if the tokens may declare a type.
+        :rtype: bool
+        """
+        # each item tells whether a parenthesis holds the arguments of an instance creation.
+        parentheses = list()
+        isAfterNew = False
+        isCreationArguments = False
+
+        for token in tokens:
+            tokenType = token.type
+            if tokenType in cls.nestedTypeTokens:
+                return True
+
+            if tokenType == JavaParser.LBRACE and isCreationArguments:
+                return True
+            isCreationArguments = False
+
+            if tokenType == JavaParser.NEW:
+                isAfterNew = True
+            elif tokenType == JavaParser.LPAREN:
+                parentheses.append(isAfterNew)
+                isAfterNew = False
+            elif tokenType == JavaParser.RPAREN:
+                isCreationArguments = parentheses.pop() if len(parentheses) > 0 else False
+            elif tokenType not in (JavaParser.Identifier, JavaParser.DOT, JavaParser.LT, JavaParser.GT,
+                                   JavaParser.COMMA, JavaParser.QUESTION, JavaParser.EXTENDS, JavaParser.SUPER,
+                                   JavaParser.AT):
+                isAfterNew = False
+
+        return False
+
+
+class FileMetrics(NamedTuple):
+    """
+    This class is an immutable record of the file-level metrics of a parse
+    tree. The per-method metrics are stored as tuples of (method name, value)
+    pairs, in the order in which the methods are found.
+    """
+
+    inMethodLines: Tuple[int, ...]
+    linesOfCodePerMethod: Tuple[Tuple[str, int], ...]
+    cyclomaticComplexityPerMethod: Tuple[Tuple[str, int], ...]
+    methodRanges: Tuple[Tuple[str, Tuple[int, int]], ...]
+
+
+class NodeTable(object):
+    """
+    This class stores the structure of a numerified parse tree in flat arrays
+    indexed by ``nodeIndex``, so that the nodes, their ancestors, and their
+    subtrees can be found without walking the tree. Besides the breadth-first
+    ``nodeIndex``, each node has a pre-order position, and the subtree of a
+    node occupies the positions from its own up to its ``subtreeEnd``. The
+    nodes of each context class are also indexed by their post-order
+    position, so that all nodes of a type within a subtree form a contiguous
+    range.
+    """
+
+    def __init__(self, tree):
+        """
+        Numerifies the given parse tree breadth-first and builds the table in
+        the same traversal.
+
+        :param tree: The root of the parse tree.
+        :type tree: antlr4.tree.Tree.ParseTree
+        """
+        # index 0 is unused, since the node indices start from 1.
+        self.nodes = [None, tree]
+        self.parents = array("l", [0, 0])
+        self.depths = array("l", [0, 0])
+        self.types = array("l", [0, tree.getRuleIndex()])
+
+        position = 1
+        while position < len(self.nodes):
+            node = self.nodes[position]
+            node.nodeIndex = position
+            depth = self.depths[position] + 1
+
+            for child in getattr(node, 'children', None) or []:
+                self.nodes.append(child)
+                self.parents.append(position)
+                self.depths.append(depth)
+                # rules are stored by their rule index, and terminals by their negated token type.
+                self.types.append(-1 - child.symbol.type if isinstance(child, TerminalNode) else child.getRuleIndex())
+
+            position += 1
+
+        # the children of a node are consecutive in breadth-first order, so the subtree sizes can be accumulated
+        # backwards, and the pre-order positions can be handed out forwards.
+        nodeCount = len(self.nodes)
+        subtreeSizes = array("l", [1]) * nodeCount
+        for index in range(nodeCount - 1, 1, -1):
+            subtreeSizes[self.parents[index]] += subtreeSizes[index]
+
+        self.preOrder = array("l", [0]) * nodeCount
+        self.subtreeEnd = array("l", [0]) * nodeCount
+        nextChildPosition = array("l", [0]) * nodeCount
+        self.preOrder[1] = 1
+        nextChildPosition[1] = 2
+        for index in range(1, nodeCount):
+            if index > 1:
+                parent = self.parents[index]
+                self.preOrder[index] = nextChildPosition[parent]
+                nextChildPosition[parent] += subtreeSizes[index]
+                nextChildPosition[index] = self.preOrder[index] + 1
+            self.subtreeEnd[index] = self.preOrder[index] + subtreeSizes[index] - 1
+
+        # the number of nodes that finish before a node in post-order is the number of nodes before it in pre-order
+        # that are not its ancestors, plus its descendants.
+        self.postOrder = array("l", [0]) * nodeCount
+        self.postOrderNodes = array("l", [0]) * nodeCount
+        for index in range(1, nodeCount):
+            postOrderPosition = self.subtreeEnd[index] - self.depths[index]
+            self.postOrder[index] = postOrderPosition
+            self.postOrderNodes[postOrderPosition] = index
+
+        # the post-order positions of the nodes of each class, in ascending order.
+        self.typeIndex = dict()
+        for postOrderPosition in range(1, nodeCount):
+            nodeClass = type(self.nodes[self.postOrderNodes[postOrderPosition]])
+            typeIndexList = self.typeIndex.get(nodeClass)
+            if typeIndexList is None:
+                typeIndexList = self.typeIndex[nodeClass] = array("l")
+            typeIndexList.append(postOrderPosition)
+
+        self._matchingClasses = dict()
+
+    def __len__(self):
+        return len(self.nodes) - 1
+
+    def contains(self, ancestorIndex: int, nodeIndex: int) -> bool:
+        """
+        Checks whether a node is in the subtree of another node.
+
+        :param ancestorIndex: The index of the root of the subtree.
+        :type ancestorIndex: int
+        :param nodeIndex: The index of the node to check.
+        :type nodeIndex: int
+        :return: True if the node is in the subtree, False otherwise.
+        :rtype: bool
+        """
+        return self.preOrder[ancestorIndex] <= self.preOrder[nodeIndex] <= self.subtreeEnd[ancestorIndex]
+
+    def findAll(self, nodeType, rootIndex: int = 1) -> list:
+        """
+        Finds all nodes of a specific type in the subtree of a node. The nodes
+        are returned in descending post-order, which is the order in which a
+        depth-first walk that visits the last child first finds them.
+
+        :param nodeType: The type of node to search for, or a tuple of types.
+        :type nodeType: type
+        :param rootIndex: The index of the root of the subtree.
+        :type rootIndex: int
+        :return: A list of nodes of the specified type.
+        :rtype: list
+        """
+        matchingClasses = self._matchingClasses.get(nodeType)
+        if matchingClasses is None:
+            matchingClasses = [nodeClass for nodeClass in self.typeIndex.keys() if issubclass(nodeClass, nodeType)]
+            self._matchingClasses[nodeType] = matchingClasses
+
+        lastPosition = self.postOrder[rootIndex]
+        firstPosition = lastPosition - (self.subtreeEnd[rootIndex] - self.preOrder[rootIndex])
+
+        resultPositions = list()
+        for nodeClass in matchingClasses:
+            typeIndexList = self.typeIndex[nodeClass]
+            resultPositions.extend(typeIndexList[bisect_left(typeIndexList, firstPosition):
+                                                 bisect_right(typeIndexList, lastPosition)])
+
+        if len(matchingClasses) > 1:
+            resultPositions.sort()
+
+        return [self.nodes[self.postOrderNodes[position]] for position in reversed(resultPositions)]
+
+
+class MethodTable(object):
+    """
+    This class maps the nodes and the character offsets of a parse tree to the
+    method and the class declarations that enclose them. Each kind of
+    declaration is stored as a sorted list of segments, which is built from
+    the nested ranges of the declarations and queried by binary search.
+    """
+
+    def __init__(self, nodeTable: NodeTable, methodNames: dict, classNames: dict):
+        """
+        Builds the segments of the method, constructor, and class
+        declarations of a numerified parse tree.
+
+        :param nodeTable: The node table of the parse tree.
+        :type nodeTable: NodeTable
+        :param methodNames: A dictionary mapping the index of each method and
+                            constructor declaration to its name.
+        :type methodNames: dict
+        :param classNames: A dictionary mapping the index of each class
+                           declaration to its name.
+        :type classNames: dict
+        """
+        self.nodeTable = nodeTable
+        self.methodNames = methodNames
+        self.classNames = classNames
+        self.nodeSegments = dict()
+        self.offsetSegments = dict()
+
+        for declarationType in (JavaParser.MethodDeclarationContext, JavaParser.ConstructorDeclarationContext,
+                                JavaParser.ClassDeclarationContext):
+            declarations = nodeTable.findAll(declarationType)
+            # a declaration encloses its descendants, but not itself.
+            self.nodeSegments[declarationType] = self.buildSegments(
+                [(nodeTable.preOrder[declaration.nodeIndex] + 1, nodeTable.subtreeEnd[declaration.nodeIndex],
+                  declaration.nodeIndex) for declaration in declarations])
+            self.offsetSegments[declarationType] = self.buildSegments(
+                [(declaration.start.start, declaration.stop.stop, declaration.nodeIndex)
+                 for declaration in declarations if declaration.stop is not None])
+
+    @staticmethod
+    def buildSegments(ranges: list) -> tuple:
+        """
+        Converts a list of nested ranges to sorted segments, each of which
+        holds the value of the innermost range that covers it.
+
+        :param ranges: A list of (start, end, value) tuples. Any two ranges are
+                       either disjoint or nested.
+        :type ranges: list
+        :return: A tuple of the start positions of the segments and their
+                 values. The value of an uncovered segment is None.
+        :rtype: tuple
+        """
+        segmentStarts = list()
+        segmentValues = list()
+
+        def addSegment(start, value):
+            if len(segmentStarts) > 0 and segmentStarts[-1] == start:
+                segmentValues[-1] = value
+            else:
+                segmentStarts.append(start)
+                segmentValues.append(value)
+
+        openRanges = list()
+        for start, end, value in sorted(ranges, key=lambda r: (r[0], -r[1])):
+            while len(openRanges) > 0 and openRanges[-1][0] < start:
+                closedEnd = openRanges.pop()[0]
+                addSegment(closedEnd + 1, openRanges[-1][1] if len(openRanges) > 0 else None)
+            addSegment(start, value)
+            openRanges.append((end, value))
+
+        while len(openRanges) > 0:
+            closedEnd = openRanges.pop()[0]
+            addSegment(closedEnd + 1, openRanges[-1][1] if len(openRanges) > 0 else None)
+
+        return segmentStarts, segmentValues
+
+    @staticmethod
+    def lookup(segments: tuple, position: int):
+        """
+        Finds the value of the segment that contains a position.
+
+        :param segments: The segments created by ``buildSegments``.
+        :type segments: tuple
+        :param position: The position.
+        :type position: int
+        :return: The value of the segment, or None if it is not covered.
+        """
+        segmentStarts, segmentValues = segments
+        segment = bisect_right(segmentStarts, position) - 1
+        return segmentValues[segment] if segment >= 0 else None
+
+    def getQualifiedName(self, position: int, segmentsPerType: dict):
+        """
+        Gets the qualified name of the method that encloses a position. A
+        method declaration is preferred over a constructor declaration.
+
+        :param position: The position, in the coordinates of the segments.
+        :type position: int
+        :param segmentsPerType: The segments of each kind of declaration.
+        :type segmentsPerType: dict
+        :return: The name of the method, or "***not in a method***" if the
+                 position is not in a method.
+        :rtype: str
+        """
+        methodIndex = self.lookup(segmentsPerType[JavaParser.MethodDeclarationContext], position)
+        if methodIndex is None:
+            methodIndex = self.lookup(segmentsPerType[JavaParser.ConstructorDeclarationContext], position)
+        if methodIndex is None:
+            return "***not in a method***"
+
+        methodName = self.methodNames[methodIndex]
+        classIndex = self.lookup(segmentsPerType[JavaParser.ClassDeclarationContext], position)
+        if classIndex is None:
+            return methodName
+
+        className = self.classNames[classIndex]
+        return className + '.' + methodName if className is not None else None
+
+    def getMethodNameForNode(self, nodeIndex: int):
+        """
+        Gets the qualified name of the method that contains a node.
+
+        :param nodeIndex: The index of the node.
+        :type nodeIndex: int
+        :return: The name of the method, or "***not in a method***" if the node
+                 is not in a method.
+        :rtype: str
+        """
+        if not 0 < nodeIndex <= len(self.nodeTable):
+            return "***not in a method***"
+
+        return self.getQualifiedName(self.nodeTable.preOrder[nodeIndex], self.nodeSegments)
+
+    def getClassNameForNode(self, nodeIndex: int):
+        """
+        Gets the name of the innermost class that contains a node.
+
+        :param nodeIndex: The index of the node.
+        :type nodeIndex: int
+        :return: The name of the class, or "***not in a class***" if the node
+                 is not in a class.
+        :rtype: str
+        """
+        classIndex = None
+        if 0 < nodeIndex <= len(self.nodeTable):
+            classIndex = self.lookup(self.nodeSegments[JavaParser.ClassDeclarationContext],
+                                     self.nodeTable.preOrder[nodeIndex])
+
+        return self.classNames[classIndex] if classIndex is not None else "***not in a class***"
+
+    def getMethodNameForOffset(self, offset: int):
+        """
+        Gets the qualified name of the method that contains a character
+        offset.
+
+        :param offset: The character offset in the source code.
+        :type offset: int
+        :return: The name of the method, or "***not in a method***" if the
+                 offset is not in a method.
+        :rtype: str
+        """
+        return self.getQualifiedName(offset, self.offsetSegments)
+
+
 class JavaParse(object):
     """
     This class uses ANTLR4 to parse Java source code. It provides methods for
@@ -43,53 +467,245 @@ class JavaParse(object):
     the name of the method that contains a specific node.
     """
 
-    def __init__(self, verbose=False):
+    predictionModes = ("auto", "sll", "ll")
+    lexers = ("fast", "antlr")
+    branchingKeywords = frozenset(["if", "case", "for", "while", "catch", "&&", "||", "?", "foreach"])
+
+    def __init__(self, verbose=False, parseCache=None, predictionMode="auto", lexer="fast", dfaCache=None,
+                 symbolIndex=None):
         """
         Initializes the JavaParse object.
 
         :param verbose: A boolean indicating whether to print verbose output.
         :type verbose: bool
+        :param parseCache: The cache used to store and restore parse trees. If
+                           None, every file is parsed from scratch.
+        :type parseCache: littledarwin.ParseCache.ParseCache, optional
+        :param predictionMode: The prediction mode of the parser. "sll" and
+                               "ll" force a single mode, while "auto" tries
+                               SLL first and falls back to LL if it fails.
+        :type predictionMode: str
+        :param lexer: The lexer used to tokenize the source code. "fast" uses
+                      ``FastJavaLexer``, and falls back to the generated lexer
+                      for the files it cannot tokenize, while "antlr" always
+                      uses the generated lexer.
+        :type lexer: str
+        :param dfaCache: The cache from which the prediction DFA of the parser
+                         is restored before the first file is parsed. If None,
+                         the DFA is built from scratch in each process.
+        :type dfaCache: littledarwin.DFACache.DFACache, optional
+        :param symbolIndex: The index of the declarations of the project, used
+                            by the mutation operators to check the types of
+                            symbols. If None, only the declarations of the
+                            file being mutated are known.
+        :type symbolIndex: littledarwin.SymbolIndex.SymbolIndex, optional
         """
+        assert predictionMode in self.predictionModes
+        assert lexer in self.lexers
+
         self.verbose = verbose
-        self.lookupTable = dict()
+        self.parseCache = parseCache
+        self.predictionMode = predictionMode
+        self.fallbackCount = 0
+        self.lexer = lexer
+        self.lexerFallbackCount = 0
+        self.dfaCache = dfaCache
+        self.symbolIndex = symbolIndex if symbolIndex is not None else SymbolIndex()
 
     # antlr-based parser
-    def parse(self, fileContent):
+    def parse(self, fileContent, methodScope=None):
         """
-        Parses the given Java source code and returns a parse tree.
+        Parses the given Java source code and returns a parse tree. If a parse
+        cache is set, the tree is restored from the cache when possible, and
+        newly parsed trees are stored in it together with their metrics.
+
+        If a method scope is given, the bodies of the methods and constructors
+        outside it are not parsed, and are kept as raw tokens in the tree (see
+        ``LazyJavaParser``). Such trees are not stored in the parse cache.
+
+        The returned tree is converted to the form of ``CompactTree``, so that
+        it does not keep the parser and the token stream alive.
 
         :param fileContent: A string containing the Java source code.
         :type fileContent: str
+        :param methodScope: The names of the methods and constructors whose
+                            bodies are needed, or None to parse the whole file.
+        :type methodScope: set, optional
         :return: A parse tree representing the Java source code.
         :rtype: antlr4.tree.Tree.ParseTree
         """
-        lexer = JavaLexer(InputStream(fileContent))
-        parser = JavaParser(CommonTokenStream(lexer))
+        if self.parseCache is not None:
+            tree = self.parseCache.load(fileContent)
+            if tree is not None:
+                self.numerify(tree)
+                return tree
+
+        if self.dfaCache is not None:
+            self.dfaCache.load()
+
+        tokenStream = CommonTokenStream(self.getTokenSource(fileContent))
+        parser = JavaParser(tokenStream) if methodScope is None else LazyJavaParser(tokenStream)
         parser._errHandler = LittleDarwinErrorStrategy()
-        tree = parser.compilationUnit()
-        self.lookupTable = dict()
+        tree = self.predict(parser)
+
+        if methodScope is not None:
+            tree.deferredBlocks = parser.deferredBlocks
+
+        # the compact tree does not refer to the parser, the token stream, or the ANTLR nodes, so they can be freed.
+        del parser, tokenStream
+        tree = CompactTree.convert(tree)
+
+        if methodScope is not None:
+            self.expandMethodBodies(tree, methodScope)
+            return tree
+
         self.numerify(tree)
 
+        if self.parseCache is not None:
+            self.parseCache.store(fileContent, tree, self.getFileMetrics(tree))
+
         return tree
 
+    def getTokenSource(self, fileContent: str) -> TokenSource:
+        """
+        Creates the token source of the given source code, using the
+        configured lexer. The fast lexer produces the same tokens as the
+        generated lexer, and raises an error instead of recovering from
+        invalid input, in which case the generated lexer is used, so that the
+        errors are reported as before.
+
+        :param fileContent: A string containing the Java source code.
+        :type fileContent: str
+        :return: The token source.
+        :rtype: antlr4.Lexer.TokenSource
+        """
+        if self.lexer == "fast":
+            try:
+                return FastJavaLexer(fileContent).getTokenSource()
+
+            except FastJavaLexerError as e:
+                self.lexerFallbackCount += 1
+                if self.verbose:
+                    print("--> " + str(e) + " Tokenizing again with the generated lexer.")
+
+        return JavaLexer(InputStream(fileContent))
+
+    def predict(self, parser: JavaParser, ruleName: str = "compilationUnit") -> ParserRuleContext:
+        """
+        Runs the parser using the configured prediction mode. In "auto" mode,
+        the much faster SLL prediction is tried first with its error messages
+        suppressed. Since the error strategy bails out on the first error, a
+        successful SLL parse is correct, and only the files on which it fails
+        are parsed again with full LL prediction.
+
+        :param parser: The parser, set up with the token stream of the file.
+        :type parser: littledarwin.JavaParser.JavaParser
+        :param ruleName: The name of the start rule.
+        :type ruleName: str
+        :return: The root of the parse tree.
+        :rtype: antlr4.ParserRuleContext.ParserRuleContext
+        """
+        startRule = getattr(parser, ruleName)
+
+        if self.predictionMode == "ll":
+            parser._interp.predictionMode = PredictionMode.LL
+            return startRule()
+
+        parser._interp.predictionMode = PredictionMode.SLL
+        if self.predictionMode == "sll":
+            return startRule()
+
+        parser.removeErrorListeners()
+        try:
+            return startRule()
+
+        except ParseCancellationException:
+            self.fallbackCount += 1
+            if self.verbose:
+                print("--> SLL prediction failed, parsing again with LL prediction.")
+
+        # reset() also rewinds the token stream to the first token.
+        parser.reset()
+        parser.addErrorListener(ConsoleErrorListener.INSTANCE)
+        parser._interp.predictionMode = PredictionMode.LL
+        return startRule()
+
+    def expandMethodBodies(self, tree: JavaParser.CompilationUnitContext, methodScope=None):
+        """
+        Parses the deferred bodies of a tree created with a method scope, and
+        puts them in place of their placeholder blocks. The bodies that may
+        declare a local or an anonymous class are always parsed, so that the
+        metrics of the methods of that class are calculated as in a full
+        parse. The tree is numerified again afterwards.
+
+        :param tree: The root of the parse tree.
+        :type tree: antlr4.tree.Tree.ParseTree
+        :param methodScope: The names of the methods and constructors whose
+                            bodies are parsed, or None to parse all of them.
+        :type methodScope: set, optional
+        """
+        deferredBlocks = list()
+
+        for block in getattr(tree, 'deferredBlocks', []):
+            methodName = self.getSimpleMethodName(block.parentCtx.parentCtx)
+            if methodScope is not None and methodName not in methodScope and \
+                    not LazyJavaParser.containsNestedType(block.deferredTokens):
+                deferredBlocks.append(block)
+                continue
+
+            tokens = [block.start] + block.deferredTokens + [block.stop]
+            tokenIndices = [token.tokenIndex for token in tokens]
+            parser = JavaParser(CommonTokenStream(ListTokenSource(tokens)))
+            parser._errHandler = LittleDarwinErrorStrategy()
+            expandedBlock = self.predict(parser, "block")
+
+            # the token stream of the body renumbers its tokens, so the indices in the file are restored.
+            for token, tokenIndex in zip(tokens, tokenIndices):
+                token.tokenIndex = tokenIndex
+
+            body = block.parentCtx
+            body.children[body.children.index(block)] = CompactTree.convert(expandedBlock, body)
+
+        tree.deferredBlocks = deferredBlocks
+        tree.fileMetrics = None
+        self.numerify(tree)
+
     def numerify(self, tree):
         """
         Adds a unique ``nodeIndex`` to each node in the parse tree. This is
-        used to identify nodes when creating mutations.
+        used to identify nodes when creating mutations. The nodes are numbered
+        breadth-first, and the resulting ``NodeTable`` is attached to the root
+        as ``nodeTable``.
 
         :param tree: The root of the parse tree.
         :type tree: antlr4.tree.Tree.ParseTree
+        :return: The node table of the tree.
+        :rtype: NodeTable
         """
         assert isinstance(tree, RuleContext)
 
-        numerifyCounter = 1
-        queue = [tree]
+        tree.nodeTable = NodeTable(tree)
+        return tree.nodeTable
+
+    def getNodeTable(self, tree):
+        """
+        Gets the node table of the parse tree that contains the given node,
+        and numerifies the tree if it does not have one yet.
+
+        :param tree: The root of the parse tree, or any node in it.
+        :type tree: antlr4.tree.Tree.ParseTree
+        :return: The node table of the tree.
+        :rtype: NodeTable
+        """
+        root = tree
+        while root.parentCtx is not None:
+            root = root.parentCtx
 
-        while len(queue) > 0:
-            node = queue.pop(0)
-            node.nodeIndex = numerifyCounter
-            numerifyCounter += 1
-            queue.extend(getattr(node, 'children', []))
+        nodeTable = getattr(root, 'nodeTable', None)
+        if nodeTable is None:
+            nodeTable = self.numerify(root)
+
+        return nodeTable
 
     def toString(self, tree):
         """
@@ -115,20 +731,8 @@ class JavaParse(object):
         :return: A list of nodes of the specified type.
         :rtype: list
         """
-        resultList = list()
-        seekStack = [tree]
-
-        while len(seekStack) > 0:
-            node = seekStack.pop()
-            if isinstance(node, nodeType):
-                resultList.append(node)
-
-            try:
-                seekStack.extend(node.getChildren())
-            except AttributeError:
-                pass
-
-        return resultList
+        nodeTable = self.getNodeTable(tree)
+        return nodeTable.findAll(nodeType, tree.nodeIndex)
 
     ## Deprecated
     def seek(self, tree, type):
@@ -167,15 +771,14 @@ class JavaParse(object):
                  is found.
         :rtype: antlr4.tree.Tree.ParseTree
         """
-        try:
-            parent = node.parentCtx
-        except:
-            return None
+        parent = getattr(node, 'parentCtx', None)
 
-        if isinstance(parent, nodeType):
-            return parent
+        while parent is not None:
+            if isinstance(parent, nodeType):
+                return parent
+            parent = parent.parentCtx
 
-        return self.seekFirstMatchingParent(parent, nodeType)
+        return None
 
     def seekNode(self, tree, nodeIndex):
         """
@@ -189,18 +792,12 @@ class JavaParse(object):
                  found.
         :rtype: int
         """
-        if tree.nodeIndex == nodeIndex:
-            return 0
+        nodeTable = self.getNodeTable(tree)
 
-        try:
-            for child in tree.getChildren():
-                nodeFound = self.seekNode(child, nodeIndex)
-                if nodeFound is not None:
-                    return nodeFound + 1
-        except AttributeError:
-            pass
+        if not 0 < nodeIndex <= len(nodeTable) or not nodeTable.contains(tree.nodeIndex, nodeIndex):
+            return None
 
-        return None
+        return nodeTable.depths[nodeIndex] - nodeTable.depths[tree.nodeIndex]
 
     def getNode(self, tree, index):
         """
@@ -214,24 +811,12 @@ class JavaParse(object):
                  found.
         :rtype: antlr4.tree.Tree.ParseTree
         """
-        if index in self.lookupTable:
-            return self.lookupTable[index]
-
-        stack = list()
-        stack.append(tree)
+        nodeTable = self.getNodeTable(tree)
 
-        while len(stack) > 0:
-            tmp = stack.pop()
-            if tmp.nodeIndex not in self.lookupTable:
-                self.lookupTable[tmp.nodeIndex] = tmp
-
-            if tmp.nodeIndex == index:
-                return tmp
-            else:
-                if tmp.getChildCount() != 0:
-                    stack.extend(tmp.children)
+        if not 0 < index <= len(nodeTable) or not nodeTable.contains(tree.nodeIndex, index):
+            return None
 
-        return None
+        return nodeTable.nodes[index]
 
     def setNode(self, tree, index, node):
         """
@@ -269,11 +854,16 @@ class JavaParse(object):
         rootDistance1 = self.seekNode(tree, node1)
         rootDistance2 = self.seekNode(tree, node2)
 
+        if rootDistance1 is None or rootDistance2 is None:
+            return -1
+
+        nodeTable = self.getNodeTable(tree)
+
         if rootDistance1 > rootDistance2:
-            distance = self.seekNode(self.getNode(tree, node2), node1)
+            distance = rootDistance1 - rootDistance2 if nodeTable.contains(node2, node1) else None
 
         elif rootDistance1 < rootDistance2:
-            distance = self.seekNode(self.getNode(tree, node1), node2)
+            distance = rootDistance2 - rootDistance1 if nodeTable.contains(node1, node2) else None
 
         else:
             distance = 0 if node1 == node2 else None
@@ -289,17 +879,7 @@ class JavaParse(object):
         :return: A sorted list of line numbers.
         :rtype: list
         """
-        methodBodyList = self.seekAllNodes(tree, JavaParser.MethodBodyContext)
-        methodBodyList.extend(self.seekAllNodes(tree, JavaParser.ConstructorBodyContext))
-
-        lines = set()
-
-        for methodBody in methodBodyList:
-            terminalNodeList = self.seekAllNodes(methodBody, TerminalNodeImpl)
-            for terminalNode in terminalNodeList:
-                lines.add(terminalNode.symbol.line)
-
-        return sorted(lines)
+        return list(self.getFileMetrics(tree).inMethodLines)
 
     def getLinesOfCodePerMethod(self, tree: JavaParser.CompilationUnitContext) -> dict:
         """
@@ -311,20 +891,7 @@ class JavaParse(object):
                  code.
         :rtype: dict
         """
-        methodBodyList = self.seekAllNodes(tree, JavaParser.MethodBodyContext)
-        methodBodyList.extend(self.seekAllNodes(tree, JavaParser.ConstructorBodyContext))
-
-        linesOfCodePerMethod = dict()
-
-        for methodBody in methodBodyList:
-            lines = set()
-            terminalNodeList = self.seekAllNodes(methodBody, TerminalNodeImpl)
-            for terminalNode in terminalNodeList:
-                lines.add(terminalNode.symbol.line)
-
-            linesOfCodePerMethod[self.getMethodNameForNode(tree, methodBody.nodeIndex)] = len(lines)
-
-        return linesOfCodePerMethod
+        return dict(self.getFileMetrics(tree).linesOfCodePerMethod)
 
     def getText(self, tree: RuleContext):
         """
@@ -364,29 +931,78 @@ class JavaParse(object):
                  character indices.
         :rtype: dict
         """
-        methodDeclarationList = self.seekAllNodes(tree, JavaParser.MethodDeclarationContext)
-        methodDeclarationList.extend(self.seekAllNodes(tree, JavaParser.ConstructorDeclarationContext))
-        resultDict = dict()
+        return dict(self.getFileMetrics(tree).methodRanges)
+
+    def getMethodName(self, methodDeclaration) -> str:
+        """
+        Gets the name of a method or a constructor, followed by its formal
+        parameters.
+
+        :param methodDeclaration: The MethodDeclarationContext or
+                                  ConstructorDeclarationContext of the method.
+        :type methodDeclaration: antlr4.tree.Tree.ParseTree
+        :return: The name of the method, or None if it has no formal
+                 parameters.
+        :rtype: str
+        """
+        methodName = None
+        for index in range(0, len(methodDeclaration.children)):
+            if isinstance(methodDeclaration.children[index], JavaParser.FormalParametersContext):
+                assert isinstance(methodDeclaration.children[index - 1], TerminalNodeImpl)
+                methodName = methodDeclaration.children[index - 1].symbol.text + self.getText(
+                    methodDeclaration.children[index])
+
+        return methodName
+
+    def getSimpleMethodName(self, methodDeclaration) -> str:
+        """
+        Gets the name of a method or a constructor, without its formal
+        parameters.
 
-        for methodDeclaration in methodDeclarationList:
-            gotName = False
-            gotStartStop = False
-            for index in range(0, len(methodDeclaration.children)):
-                if isinstance(methodDeclaration.children[index], JavaParser.FormalParametersContext):
-                    assert isinstance(methodDeclaration.children[index - 1], TerminalNodeImpl)
-                    methodName = methodDeclaration.children[index - 1].symbol.text + self.getText(
-                        methodDeclaration.children[index])
-                    gotName = True
+        :param methodDeclaration: The declaration of the method.
+        :type methodDeclaration: antlr4.tree.Tree.ParseTree
+        :return: The name of the method, or None if it has no formal
+                 parameters.
+        :rtype: str
+        """
+        for index in range(1, len(methodDeclaration.children)):
+            if isinstance(methodDeclaration.children[index], JavaParser.FormalParametersContext):
+                return methodDeclaration.children[index - 1].getText()
 
-                if isinstance(methodDeclaration.children[index], JavaParser.MethodBodyContext):
-                    methodStartStop = (
-                        methodDeclaration.children[index].start.start, methodDeclaration.children[index].stop.stop)
-                    gotStartStop = True
+        return None
 
-            if gotName and gotStartStop:
-                resultDict[methodName] = methodStartStop
+    def getMethodTable(self, tree) -> MethodTable:
+        """
+        Gets the method table of the parse tree, and creates it the first time
+        it is requested.
 
-        return resultDict
+        :param tree: The root of the parse tree.
+        :type tree: antlr4.tree.Tree.ParseTree
+        :return: The method table of the tree.
+        :rtype: MethodTable
+        """
+        nodeTable = self.getNodeTable(tree)
+        methodTable = getattr(nodeTable, 'methodTable', None)
+        if methodTable is not None:
+            return methodTable
+
+        methodNames = dict()
+        for methodDeclaration in nodeTable.findAll((JavaParser.MethodDeclarationContext,
+                                                    JavaParser.ConstructorDeclarationContext)):
+            methodNames[methodDeclaration.nodeIndex] = self.getMethodName(methodDeclaration)
+
+        classNames = dict()
+        for classDeclaration in nodeTable.findAll(JavaParser.ClassDeclarationContext):
+            classNames[classDeclaration.nodeIndex] = None
+            for index in range(0, len(classDeclaration.children)):
+                if isinstance(classDeclaration.children[index - 1], TerminalNodeImpl) and \
+                        isinstance(classDeclaration.children[index], TerminalNodeImpl) and \
+                        classDeclaration.children[index - 1].symbol.text == 'class':
+                    classNames[classDeclaration.nodeIndex] = classDeclaration.children[index].symbol.text
+                    break
+
+        nodeTable.methodTable = MethodTable(nodeTable, methodNames, classNames)
+        return nodeTable.methodTable
 
     def getMethodNameForNode(self, tree: JavaParser.CompilationUnitContext, nodeIndex: int):
         """
@@ -401,33 +1017,42 @@ class JavaParse(object):
                  is not in a method.
         :rtype: str
         """
-        methodName = None
-        node = self.getNode(tree, nodeIndex)
-        methodDeclaration = self.seekFirstMatchingParent(node, JavaParser.MethodDeclarationContext)
-        if methodDeclaration is None:
-            methodDeclaration = self.seekFirstMatchingParent(node, JavaParser.ConstructorDeclarationContext)
-        if methodDeclaration is None:
-            return "***not in a method***"
+        return self.getMethodTable(tree).getMethodNameForNode(nodeIndex)
 
-        for index in range(0, len(methodDeclaration.children)):
-            if isinstance(methodDeclaration.children[index], JavaParser.FormalParametersContext):
-                assert isinstance(methodDeclaration.children[index - 1], TerminalNodeImpl)
-                methodName = methodDeclaration.children[index - 1].symbol.text + self.getText(
-                    methodDeclaration.children[index])
+    def getClassNameForNode(self, tree: JavaParser.CompilationUnitContext, nodeIndex: int):
+        """
+        Gets the name of the innermost class that contains the node with the
+        specified index.
 
-        classDeclaration = self.seekFirstMatchingParent(node, JavaParser.ClassDeclarationContext)
-        if classDeclaration is None:
-            return methodName
+        :param tree: The root of the parse tree.
+        :type tree: antlr4.tree.Tree.ParseTree
+        :param nodeIndex: The index of the node.
+        :type nodeIndex: int
+        :return: The name of the class, or "***not in a class***" if the node
+                 is not in a class.
+        :rtype: str
+        """
+        return self.getMethodTable(tree).getClassNameForNode(nodeIndex)
 
-        for index in range(0, len(classDeclaration.children)):
-            if isinstance(classDeclaration.children[index - 1], TerminalNodeImpl) and \
-                    isinstance(classDeclaration.children[index], TerminalNodeImpl) and \
-                    classDeclaration.children[index - 1].symbol.text == 'class':
-                return classDeclaration.children[index].symbol.text + '.' + methodName
+    def getMethodNameForOffset(self, tree: JavaParser.CompilationUnitContext, offset: int):
+        """
+        Gets the name of the method that contains the specified character
+        offset of the source code.
+
+        :param tree: The root of the parse tree.
+        :type tree: antlr4.tree.Tree.ParseTree
+        :param offset: The character offset.
+        :type offset: int
+        :return: The name of the method, or "***not in a method***" if the
+                 offset is not in a method.
+        :rtype: str
+        """
+        return self.getMethodTable(tree).getMethodNameForOffset(offset)
 
     def getMethodTypeForNode(self, node):
         """
-        Gets the return type of the method that contains the specified node.
+        Gets the return type of the method that contains the specified node,
+        including its array dimensions, such as "int[]".
 
         :param node: The node to check.
         :type node: antlr4.tree.Tree.ParseTree
@@ -439,19 +1064,7 @@ class JavaParse(object):
         if parentMethod is None:
             return None
 
-        assert isinstance(parentMethod, JavaParser.MethodDeclarationContext)
-        parentType = parentMethod.getChild(0)
-
-        if isinstance(parentType, JavaParser.JTypeContext):
-            methodType = parentType.getChild(0)
-            if isinstance(methodType, JavaParser.PrimitiveTypeContext) or \
-                    isinstance(methodType, JavaParser.ClassOrInterfaceTypeContext):
-                return methodType.getText()
-
-        elif isinstance(parentType, TerminalNodeImpl):
-            return "void" if parentType.getText() == "void" else None
-
-        return None
+        return self.symbolIndex.getMethodReturnType(parentMethod)
 
     def getCyclomaticComplexity(self, methodBody) -> int:
         """
@@ -467,19 +1080,8 @@ class JavaParse(object):
                isinstance(methodBody, JavaParser.ConstructorBodyContext)
 
         cyclomaticComplexity = 1
-        keywordList = self.seekAllNodes(methodBody, TerminalNodeImpl)
-
-        for keyword in keywordList:
-            keywordText = keyword.getText()
-            if keywordText == "if" or \
-                    keywordText == "case" or \
-                    keywordText == "for" or \
-                    keywordText == "while" or \
-                    keywordText == "catch" or \
-                    keywordText == "&&" or \
-                    keywordText == "||" or \
-                    keywordText == "?" or \
-                    keywordText == "foreach":
+        for keyword in self.seekAllNodes(methodBody, TerminalNodeImpl):
+            if keyword.getText() in self.branchingKeywords:
                 cyclomaticComplexity += 1
 
         return cyclomaticComplexity
@@ -495,16 +1097,58 @@ class JavaParse(object):
         :rtype: dict
         """
         assert isinstance(tree, JavaParser.CompilationUnitContext)
+
+        return dict(self.getFileMetrics(tree).cyclomaticComplexityPerMethod)
+
+    def getFileMetrics(self, tree: JavaParser.CompilationUnitContext) -> FileMetrics:
+        """
+        Calculates all file-level metrics of the parse tree in a single pass
+        over the tokens of each method body, and attaches them to the tree as
+        ``fileMetrics`` so that they are not calculated again.
+
+        :param tree: The root of the parse tree.
+        :type tree: antlr4.tree.Tree.ParseTree
+        :return: The lines within methods, the lines of code and the
+                 cyclomatic complexity per method, and the method ranges.
+        :rtype: FileMetrics
+        """
+        fileMetrics = getattr(tree, 'fileMetrics', None)
+        if isinstance(fileMetrics, FileMetrics):
+            return fileMetrics
+
+        inMethodLines = set()
+        linesOfCodePerMethod = dict()
         cyclomaticComplexityPerMethod = dict()
 
         methodBodyList = self.seekAllNodes(tree, JavaParser.MethodBodyContext)
         methodBodyList.extend(self.seekAllNodes(tree, JavaParser.ConstructorBodyContext))
 
         for methodBody in methodBodyList:
-            cyclomaticComplexityPerMethod[
-                self.getMethodNameForNode(tree, methodBody.nodeIndex)] = self.getCyclomaticComplexity(methodBody)
+            tokens = [terminalNode.symbol for terminalNode in self.seekAllNodes(methodBody, TerminalNodeImpl)]
+            # the tokens of a body that is not parsed are counted as they would be in the parsed body.
+            tokens.extend(getattr(methodBody.getChild(0), 'deferredTokens', []))
 
-        return cyclomaticComplexityPerMethod
+            lines = set()
+            cyclomaticComplexity = 1
+            for token in tokens:
+                lines.add(token.line)
+                if token.text in self.branchingKeywords:
+                    cyclomaticComplexity += 1
+
+            methodName = self.getMethodNameForNode(tree, methodBody.nodeIndex)
+            inMethodLines.update(lines)
+            linesOfCodePerMethod[methodName] = len(lines)
+            cyclomaticComplexityPerMethod[methodName] = cyclomaticComplexity
+
+        methodRanges = dict()
+        for methodDeclaration in self.seekAllNodes(tree, JavaParser.MethodDeclarationContext):
+            methodBody = methodDeclaration.methodBody()
+            if methodBody is not None:
+                methodRanges[self.getMethodName(methodDeclaration)] = (methodBody.start.start, methodBody.stop.stop)
+
+        tree.fileMetrics = FileMetrics(tuple(sorted(inMethodLines)), tuple(linesOfCodePerMethod.items()),
+                                       tuple(cyclomaticComplexityPerMethod.items()), tuple(methodRanges.items()))
+        return tree.fileMetrics
 
     def tree2DOT(self, tree):
         """
@@ -517,7 +1161,10 @@ class JavaParse(object):
                  installed.
         :rtype: graphviz.Digraph
         """
-        if noGraphviz:
+        # graphviz is only needed here, so it is not imported with the module.
+        try:
+            import graphviz
+        except ImportError as e:
             return None
 
         assert isinstance(tree, JavaParser.CompilationUnitContext)
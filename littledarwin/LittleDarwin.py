@@ -31,10 +31,14 @@ framework. It contains the logic for parsing command-line arguments, running the
 mutation phase, and running the build phase.
 """
 
+import collections
 import datetime
 import io
+import multiprocessing
+import multiprocessing.util
 import os
 import platform
+import re
 import shelve
 import shutil
 import signal
@@ -45,10 +49,9 @@ import time
 from optparse import OptionParser
 
 from littledarwin import License
-from .JavaIO import JavaIO
-from .JavaMutate import JavaMutate
-# LittleDarwin modules
-from .JavaParse import JavaParse
+# LittleDarwin modules. the modules that load the generated parser are imported in the mutation phase, so that the
+# build phase and the help text do not wait for them.
+from .CoverageReport import CoverageReport, TestCoverageMap
 from .ReportGenerator import ReportGenerator
 
 ### DEBUG ###
@@ -135,10 +138,19 @@ def mutationPhase(options, filterType, filterList, higherOrder):
     :param higherOrder: The order of mutation to perform.
     :type higherOrder: int
     """
+    from .DFACache import DFACache
+    from .JavaIO import JavaIO
+    from .JavaMutate import JavaMutate
+    from .JavaParse import JavaParse
+    from .MutantSampler import MutantSampler
+    from .ParseCache import ParseCache
+
     # creating our module objects.
     javaIO = JavaIO(options.isVerboseActive)
-    javaParse = JavaParse(options.isVerboseActive)
     totalMutantCount = 0
+    subsumedReplacementCount = 0
+    unsampledMutantCount = 0
+    schemataMutantCount = 0
 
     try:
         assert os.path.isdir(options.sourcePath)
@@ -148,7 +160,15 @@ def mutationPhase(options, filterType, filterList, higherOrder):
     # getting the list of files.
     javaIO.listFiles(targetPath=os.path.abspath(options.sourcePath), buildPath=os.path.abspath(options.buildPath),
                      filterType=filterType, filterList=filterList)
+    # unchanged files are restored from the parse cache instead of being parsed again.
+    parseCache = ParseCache(os.path.join(javaIO.targetDirectory, "ParseCache"),
+                            options.isVerboseActive) if options.isParseCacheActive else None
+    # the prediction DFA built by the parser in earlier runs and in other processes is restored before parsing.
+    dfaCache = DFACache(os.path.join(javaIO.targetDirectory, "DFACache"),
+                        options.isVerboseActive) if options.isDFACacheActive else None
+    javaParse = JavaParse(options.isVerboseActive, parseCache, options.predictionMode, options.lexer, dfaCache)
     fileCounter = 0
+    skippedFileCount = 0
     fileCount = len(javaIO.fileList)
     # creating a database for generated mutants. the format of this database is different on different platforms,
     # so it cannot be simply copied from a platform to another.
@@ -158,76 +178,152 @@ def mutationPhase(options, filterType, filterList, higherOrder):
     print("Target Path: ", javaIO.targetDirectory)
     print("Creating Mutation Database: ", databasePath)
     mutationDatabase = shelve.open(databasePath, "c")
+    # the mutant schemata of each file, and the mutants it holds, are stored in a database of their own.
+    schemataDatabase = shelve.open(databasePath + "-schemata", "c") if options.isSchemataActive else None
+    # the lines replaced by the mutants of each file are stored as well, for the coverage of the build phase.
+    lineSpansDatabase = shelve.open(databasePath + "-lines", "c")
     mutantTypeDatabase = dict()
     averageDensityDict = dict()
 
-    # go through each file, parse it, calculate all mutations, and generate files accordingly.
-    for srcFile in javaIO.fileList:
-        print("\n(" + str(fileCounter + 1) + "/" + str(fileCount) + ") Source file: ", srcFile)
-        targetList = list()
+    enabledMutators = ["Traditional"]
+
+    if options.isNullCheck:
+        enabledMutators = ["Null"]
+
+    if options.isSufficient:
+        enabledMutators = ["Sufficient"]
+
+    if options.isAll:
+        enabledMutators = ["All"]
+
+    if options.isMethodLevel:
+        enabledMutators = ["Method"]
+
+    # with a method scope, only the bodies of the listed methods are parsed and mutated.
+    methodScope = None
+    if options.methodList != "***dummy***":
+        with io.open(options.methodList, mode='r', errors='replace') as contentFile:
+            methodScope = frozenset(l.strip() for l in contentFile.readlines() if l.strip())
+
+    # the mutants of each file are sampled with a seed of their own, so that the sample of a file is the same in
+    # serial and parallel runs.
+    mutantSampler = None
+    if options.sampling != "none":
+        mutantSampler = MutantSampler(options.sampling, options.samplingRate, options.samplingQuota,
+                                      options.samplingSeed)
+
+    # the declarations of all the files are indexed before any file is mutated, so that the mutation operators can
+    # check the types of the symbols declared in other files. the index is passed to the workers with javaParse. it
+    # is only built if one of the enabled operators uses it, since the traditional operators do not.
+    workerArguments = (javaIO, javaParse, enabledMutators, higherOrder, options.isVerboseActive, methodScope,
+                       mutantSampler, options.isSchemataActive)
+    if options.isSymbolIndexActive and JavaMutate.usesSymbolIndex(enabledMutators):
+        print("Indexing the declarations of", fileCount, "source files.")
+        if options.jobs > 1:
+            indexPool = multiprocessing.Pool(options.jobs, initializer=initializeMutationWorker,
+                                             initargs=workerArguments)
+            fileIndexes = indexPool.map(indexFileInWorker, javaIO.fileList)
+            indexPool.close()
+            indexPool.join()
+            if dfaCache is not None:
+                dfaCache.mergeWorkers()
+        else:
+            fileIndexes = (indexFile(srcFile, javaIO, javaParse) for srcFile in javaIO.fileList)
+
+        for fileIndex in fileIndexes:
+            if fileIndex is not None:
+                javaParse.symbolIndex.update(fileIndex)
+        print("Types indexed: ", len(javaParse.symbolIndex))
+
+    # go through each file, parse it, calculate all mutations, and generate files accordingly. with more than one
+    # job, the files are processed in worker processes, and their results are consumed here in the order of the file
+    # list, so that the database and the output are the same as in a serial run. the workers run at most a bounded
+    # number of files ahead of the files recorded in the database.
+    workerPool = None
+    if options.jobs > 1:
+        workerPool = multiprocessing.Pool(options.jobs, initializer=initializeMutationWorker,
+                                          initargs=workerArguments)
+        maxInFlight = options.maxInFlight if options.maxInFlight > 0 else 2 * options.jobs
+        fileResults = imapBounded(workerPool, mutateFileInWorker, javaIO.fileList, maxInFlight)
+    else:
+        fileResults = (mutateFile(srcFile, *workerArguments) for srcFile in javaIO.fileList)
 
-        try:
-            # parsing the source file into a tree.
-            sourceCode = javaIO.getFileContent(srcFile)
-            tree = javaParse.parse(sourceCode)
+    for fileResult in fileResults:
+        print("\n(" + str(fileCounter + 1) + "/" + str(fileCount) + ") Source file: ", fileResult["srcFile"])
+
+        if workerPool is not None:
+            javaParse.fallbackCount += fileResult["fallbackCount"]
+            javaParse.lexerFallbackCount += fileResult["lexerFallbackCount"]
+            if parseCache is not None:
+                parseCache.hits += fileResult["cacheHits"]
+                parseCache.misses += fileResult["cacheMisses"]
 
-        except Exception as e:
+        if fileResult["parseError"] is not None:
             print("Error in parsing Java code, skipping the file.")
-            sys.stderr.write(str(e))
+            sys.stderr.write(fileResult["parseError"])
             continue
 
-        fileCounter += 1
-
-        enabledMutators = ["Traditional"]
-
-        if options.isNullCheck:
-            enabledMutators = ["Null"]
-
-        if options.isAll:
-            enabledMutators = ["All"]
-
-        if options.isMethodLevel:
-            enabledMutators = ["Method"]
-
-        # apply mutations on the tree and receive the resulting mutants as a list of strings, and a detailed
-        # list of which operators created how many mutants.
-
-        javaMutate = JavaMutate(tree, sourceCode, javaParse, options.isVerboseActive)
+        if fileResult["skipped"]:
+            print("No mutation candidates, skipping the file.")
+            fileCounter += 1
+            skippedFileCount += 1
+            averageDensityDict[fileResult["fileRelativePath"]] = 0.0
+            continue
 
-        if higherOrder == 1:
-            mutated, mutantTypes = javaMutate.gatherMutants(enabledMutators)
-        else:
-            mutated, mutantTypes = javaMutate.gatherHigherOrderMutants(higherOrder, enabledMutators)
+        fileCounter += 1
 
-        print("--> Mutations found: ", len(mutated))
+        print("--> Mutations found: ", fileResult["mutantCount"])
 
         # go through all mutant types, and add them in total. also output the info to the user.
+        mutantTypes = fileResult["mutantTypes"]
         for mutantType in mutantTypes.keys():
             if mutantTypes[mutantType] > 0:
                 print("---->", mutantType, ":", mutantTypes[mutantType])
             mutantTypeDatabase[mutantType] = mutantTypes[mutantType] + mutantTypeDatabase.get(mutantType, 0)
-        totalMutantCount += len(mutated)
+        totalMutantCount += fileResult["mutantCount"]
+        subsumedReplacementCount += fileResult["subsumedReplacementCount"]
+        unsampledMutantCount += fileResult["unsampledMutantCount"]
 
-        # for each mutant, generate the file, and add it to the list.
-        fileRelativePath = os.path.relpath(srcFile, javaIO.sourceDirectory)
-        densityReport = javaMutate.aggregateReport(littleDarwinVersion)
-        averageDensityDict[fileRelativePath] = javaMutate.averageDensity
-        aggregateComplexity = javaIO.getAggregateComplexityReport(javaMutate.mutantsPerMethod,
-                                                                  javaParse.getCyclomaticComplexityAllMethods(tree),
-                                                                  javaParse.getLinesOfCodePerMethod(tree))
-
-        for mutatedFile in mutated:
-            targetList.append(javaIO.generateNewFile(srcFile, mutatedFile, javaMutate.mutantsPerLine,
-                                                     densityReport, aggregateComplexity))
+        fileRelativePath = fileResult["fileRelativePath"]
+        averageDensityDict[fileRelativePath] = fileResult["averageDensity"]
 
         # if the list is not empty (some mutants were found), put the data in the database.
-        if len(targetList) != 0:
-            mutationDatabase[fileRelativePath] = targetList
-
-        del javaMutate
+        if len(fileResult["targetList"]) != 0:
+            mutationDatabase[fileRelativePath] = fileResult["targetList"]
+            lineSpansDatabase[fileRelativePath] = fileResult["lineSpans"]
+
+        if schemataDatabase is not None and fileResult["schemata"] is not None:
+            print("--> Mutants in the mutant schemata: ", len(fileResult["schemata"][1]))
+            schemataDatabase[fileRelativePath] = fileResult["schemata"]
+            schemataMutantCount += len(fileResult["schemata"][1])
+
+    if workerPool is not None:
+        workerPool.close()
+        workerPool.join()
+        if dfaCache is not None:
+            dfaCache.mergeWorkers()
+    elif dfaCache is not None:
+        dfaCache.store()
 
     mutationDatabase.close()
+    lineSpansDatabase.close()
+    if schemataDatabase is not None:
+        schemataDatabase.close()
+    if parseCache is not None:
+        print("\nParse cache: ", parseCache.hits, "hits,", parseCache.misses, "misses")
+    if options.predictionMode == "auto":
+        print("Files parsed again with LL prediction: ", javaParse.fallbackCount)
+    if options.lexer == "fast":
+        print("Files tokenized again with the generated lexer: ", javaParse.lexerFallbackCount)
+    print("Files skipped without parsing: ", skippedFileCount)
     print("\nTotal mutations found: ", totalMutantCount)
+    if "Sufficient" in enabledMutators:
+        # the sufficient operators generate more mutants than the default ones, so this is not a number of builds.
+        print("Replacements subsumed versus the full ROR/COR sets: ", subsumedReplacementCount)
+    if mutantSampler is not None:
+        print("Mutants left out by sampling: ", unsampledMutantCount)
+    if schemataDatabase is not None:
+        print("Mutants in the mutant schemata: ", schemataMutantCount)
     if totalMutantCount == 0:
         print("No mutants generated? Something must be wrong.")
         sys.exit(6)
@@ -241,6 +337,244 @@ def mutationPhase(options, filterType, filterList, higherOrder):
             print("-->", mutantType + ":", mutantTypeDatabase[mutantType])
 
 
+# the objects used by a mutation phase worker process, set once per process by initializeMutationWorker.
+_mutationWorkerArguments = None
+
+
+def initializeMutationWorker(javaIO, javaParse, enabledMutators, higherOrder, verbose, methodScope, mutantSampler,
+                             isSchemataActive):
+    """
+    Initializes a worker process of the parallel mutation phase.
+
+    :param javaIO: The JavaIO object, with the file list already created.
+    :type javaIO: littledarwin.JavaIO.JavaIO
+    :param javaParse: The JavaParse object used to parse the files.
+    :type javaParse: littledarwin.JavaParse.JavaParse
+    :param enabledMutators: The enabled mutation operator groups.
+    :type enabledMutators: list
+    :param higherOrder: The order of mutation to perform.
+    :type higherOrder: int
+    :param verbose: Whether to print verbose output.
+    :type verbose: bool
+    :param methodScope: The names of the methods to mutate, or None.
+    :type methodScope: frozenset
+    :param mutantSampler: The sampler of the mutants, or None.
+    :type mutantSampler: littledarwin.MutantSampler.MutantSampler
+    :param isSchemataActive: Whether to generate the mutant schemata of each
+                             file.
+    :type isSchemataActive: bool
+    """
+    global _mutationWorkerArguments
+    _mutationWorkerArguments = (javaIO, javaParse, enabledMutators, higherOrder, verbose, methodScope, mutantSampler,
+                                isSchemataActive)
+
+    # each worker stores the DFA states it has built in a file of its own when the pool is closed, and the parent
+    # merges them into the cache after joining the pool.
+    if javaParse.dfaCache is not None:
+        multiprocessing.util.Finalize(None, javaParse.dfaCache.storeWorker, exitpriority=10)
+
+
+def imapBounded(pool, function, iterable, maxInFlight: int):
+    """
+    Applies a function to the items of an iterable in a process pool, and
+    yields the results in the order of the items, like ``Pool.imap``. Unlike
+    ``Pool.imap``, at most maxInFlight items are submitted to the pool ahead
+    of the results consumed by the caller.
+
+    :param pool: The process pool.
+    :type pool: multiprocessing.pool.Pool
+    :param function: The function to apply.
+    :type function: function
+    :param iterable: The items.
+    :type iterable: collections.abc.Iterable
+    :param maxInFlight: The maximum number of items submitted and not yet
+                        consumed.
+    :type maxInFlight: int
+    :return: A generator of the results.
+    :rtype: collections.abc.Iterator
+    """
+    pendingResults = collections.deque()
+    for item in iterable:
+        if len(pendingResults) >= maxInFlight:
+            yield pendingResults.popleft().get()
+        pendingResults.append(pool.apply_async(function, (item,)))
+
+    while len(pendingResults) > 0:
+        yield pendingResults.popleft().get()
+
+
+def mutateFileInWorker(srcFile):
+    """
+    Processes a source file in a worker process of the parallel mutation
+    phase.
+
+    :param srcFile: The path to the source file.
+    :type srcFile: str
+    :return: The result of ``mutateFile``.
+    :rtype: dict
+    """
+    return mutateFile(srcFile, *_mutationWorkerArguments)
+
+
+def indexFileInWorker(srcFile):
+    """
+    Indexes a source file in a worker process of the parallel mutation phase.
+
+    :param srcFile: The path to the source file.
+    :type srcFile: str
+    :return: The result of ``indexFile``.
+    :rtype: littledarwin.SymbolIndex.SymbolIndex
+    """
+    javaIO, javaParse = _mutationWorkerArguments[:2]
+    return indexFile(srcFile, javaIO, javaParse)
+
+
+def indexFile(srcFile, javaIO, javaParse):
+    """
+    Parses the declarations of a source file, without its method bodies, and
+    indexes the types, the fields, and the methods it declares. The parse
+    statistics of javaParse are left unchanged, since the file is parsed
+    again when it is mutated.
+
+    :param srcFile: The path to the source file.
+    :type srcFile: str
+    :param javaIO: The JavaIO object, with the file list already created.
+    :type javaIO: littledarwin.JavaIO.JavaIO
+    :param javaParse: The JavaParse object used to parse the file.
+    :type javaParse: littledarwin.JavaParse.JavaParse
+    :return: The index of the file, or None if it cannot be parsed.
+    :rtype: littledarwin.SymbolIndex.SymbolIndex
+    """
+    from .SymbolIndex import SymbolIndex
+
+    parseCache = javaParse.parseCache
+    statistics = (javaParse.fallbackCount, javaParse.lexerFallbackCount) + \
+        ((parseCache.hits, parseCache.misses) if parseCache is not None else ())
+    try:
+        tree = javaParse.parse(javaIO.getFileContent(srcFile), frozenset())
+    except Exception as e:
+        tree = None
+    finally:
+        javaParse.fallbackCount, javaParse.lexerFallbackCount = statistics[:2]
+        if parseCache is not None:
+            parseCache.hits, parseCache.misses = statistics[2:]
+
+    if tree is None:
+        return None
+
+    fileIndex = SymbolIndex()
+    fileIndex.addTree(tree)
+    return fileIndex
+
+
+def mutateFile(srcFile, javaIO, javaParse, enabledMutators, higherOrder, verbose, methodScope=None,
+               mutantSampler=None, isSchemataActive=False):
+    """
+    Parses a source file, generates its mutants, and writes them to the
+    results directory.
+
+    :param srcFile: The path to the source file.
+    :type srcFile: str
+    :param javaIO: The JavaIO object, with the file list already created.
+    :type javaIO: littledarwin.JavaIO.JavaIO
+    :param javaParse: The JavaParse object used to parse the file.
+    :type javaParse: littledarwin.JavaParse.JavaParse
+    :param enabledMutators: The enabled mutation operator groups.
+    :type enabledMutators: list
+    :param higherOrder: The order of mutation to perform.
+    :type higherOrder: int
+    :param verbose: Whether to print verbose output.
+    :type verbose: bool
+    :param methodScope: The names of the methods to mutate, or None to mutate
+                        the whole file.
+    :type methodScope: frozenset, optional
+    :param mutantSampler: The sampler that selects the mutants to write, or
+                          None to write all of them.
+    :type mutantSampler: littledarwin.MutantSampler.MutantSampler, optional
+    :param isSchemataActive: Whether to write the mutant schemata of the file
+                             besides its mutants.
+    :type isSchemataActive: bool, optional
+    :return: A dictionary containing the generated files and the statistics
+             of the file. If the file cannot be parsed, ``parseError``
+             contains the error message. If the file cannot yield any mutant,
+             it is not parsed, and ``skipped`` is True.
+    :rtype: dict
+    """
+    from .JavaMutate import JavaMutate, MutantSchemata
+
+    parseCache = javaParse.parseCache
+    fallbackCount = javaParse.fallbackCount
+    lexerFallbackCount = javaParse.lexerFallbackCount
+    cacheHits, cacheMisses = (parseCache.hits, parseCache.misses) if parseCache is not None else (0, 0)
+    fileResult = {"srcFile": srcFile, "parseError": None, "skipped": False, "fallbackCount": 0,
+                  "lexerFallbackCount": 0, "cacheHits": 0, "cacheMisses": 0}
+
+    try:
+        sourceCode = javaIO.getFileContent(srcFile)
+        # a file whose tokens show that it yields no mutants is not parsed at all.
+        if not JavaMutate.hasMutationCandidates(sourceCode, enabledMutators, methodScope):
+            fileResult["skipped"] = True
+            fileResult["fileRelativePath"] = os.path.relpath(srcFile, javaIO.sourceDirectory)
+            return fileResult
+
+        # parsing the source file into a tree.
+        tree = javaParse.parse(sourceCode, methodScope)
+
+    except Exception as e:
+        fileResult["parseError"] = str(e)
+        tree = None
+
+    fileResult["fallbackCount"] = javaParse.fallbackCount - fallbackCount
+    fileResult["lexerFallbackCount"] = javaParse.lexerFallbackCount - lexerFallbackCount
+    if parseCache is not None:
+        fileResult["cacheHits"] = parseCache.hits - cacheHits
+        fileResult["cacheMisses"] = parseCache.misses - cacheMisses
+
+    if tree is None:
+        return fileResult
+
+    # apply mutations on the tree, and write each mutant to its file as soon as it is generated, so that the texts
+    # of the mutants are never all in memory at once.
+    javaMutate = JavaMutate(tree, sourceCode, javaParse, verbose, methodScope)
+    targetList = list()
+    fileRelativePath = os.path.relpath(srcFile, javaIO.sourceDirectory)
+    # the mutants are also added to the mutant schemata, where each one is selected by the number of its file.
+    mutantSchemata = MutantSchemata(tree, sourceCode, javaParse, "LittleDarwinSchemata_" + re.sub(
+        r"\W", "_", os.path.splitext(os.path.basename(srcFile))[0])) if isSchemataActive else None
+    schemataTargetList = list()
+    # the lines replaced by each mutant are kept, to check whether the tests cover them in the build phase.
+    lineSpans = dict()
+    for mutant, mutantText in javaMutate.iterateMutants(enabledMutators, higherOrder, mutantSampler,
+                                                        fileRelativePath):
+        targetList.append(javaIO.generateNewFile(srcFile, mutantText))
+        lineSpans[targetList[-1]] = mutant.getLineSpans()
+        if mutantSchemata is not None and mutantSchemata.addMutant(
+                mutant, int(os.path.splitext(os.path.basename(targetList[-1]))[0])):
+            schemataTargetList.append(targetList[-1])
+
+    fileResult["schemata"] = None
+    if mutantSchemata is not None and len(mutantSchemata) > 0:
+        fileResult["schemata"] = (javaIO.generateSchemataFile(srcFile, mutantSchemata.getTextSegments()),
+                                  schemataTargetList)
+
+    # the reports need the density counters of all the mutants.
+    if len(targetList) > 0:
+        densityReport = javaMutate.getAggregateReportSegments(littleDarwinVersion)
+        aggregateComplexity = javaIO.getAggregateComplexityReport(javaMutate.mutantsPerMethod, javaMutate.fileMetrics)
+        javaIO.generateReports(srcFile, javaMutate.mutantsPerLine, densityReport, aggregateComplexity)
+
+    fileResult["fileRelativePath"] = fileRelativePath
+    fileResult["mutantCount"] = len(targetList)
+    fileResult["mutantTypes"] = javaMutate.mutantTypeCount
+    fileResult["subsumedReplacementCount"] = javaMutate.subsumedReplacementCount
+    fileResult["unsampledMutantCount"] = javaMutate.unsampledMutantCount
+    fileResult["averageDensity"] = javaMutate.averageDensity
+    fileResult["targetList"] = targetList
+    fileResult["lineSpans"] = lineSpans
+
+    return fileResult
+
+
 def buildPhase(options):
     """
     Performs the build phase of LittleDarwin.
@@ -265,7 +599,8 @@ def buildPhase(options):
     mutantsPath = os.path.dirname(databasePath)
     assert os.path.isdir(mutantsPath)
     resultsDatabasePath = databasePath + "-results"
-    reportGenerator.initiateDatabase(resultsDatabasePath)
+    isCoverageActive = options.coverageReport != "***dummy***" or options.testCoverage != "***dummy***"
+    reportGenerator.initiateDatabase(resultsDatabasePath, isCoverageActive)
     try:
         if os.path.basename(options.buildPath) == "pom.xml":
             assert os.path.isfile(options.buildPath)
@@ -302,6 +637,33 @@ def buildPhase(options):
         print(
             "Cannot open mutation database. It may be corrupted or unavailable. Delete all generated files and run the mutant generation phase again.")
         sys.exit(2)
+    # the mutant schemata are used if they were generated in the mutation phase.
+    schemataDatabase = None
+    if options.isSchemataActive:
+        try:
+            schemataDatabase = shelve.open(databasePath + "-schemata", "r")
+        except:
+            print("Cannot open mutant schemata database. The mutants are built one by one.")
+    # the mutants on lines that the tests do not execute survive, so they are not built. with a coverage report per
+    # test, each mutant is tested only by the tests that execute its lines.
+    coverageReport = None
+    testCoverageMap = None
+    lineSpansDatabase = None
+    if isCoverageActive:
+        try:
+            if options.coverageReport != "***dummy***":
+                coverageReport = CoverageReport(options.coverageReport)
+            if options.testCoverage != "***dummy***":
+                testCoverageMap = TestCoverageMap(options.testCoverage)
+                assert len(testCoverageMap.testNames) > 0, "no test report in " + options.testCoverage
+        except Exception as exception:
+            print("Cannot read the coverage report: " + str(exception))
+            sys.exit(8)
+        try:
+            lineSpansDatabase = shelve.open(databasePath + "-lines", "r")
+        except:
+            print("Cannot open the database of the mutated lines. Run the mutation phase again to use the coverage "
+                  "report. All the mutants are built.")
     databaseKeys = list(mutationDatabase.keys())
     assert isinstance(databaseKeys, list)
     # let's sort the mutants by name to create the possibility of following the flow of the process by user.
@@ -320,10 +682,12 @@ def buildPhase(options):
     fileCounter = 0
     # initial build check to avoid false results. the system must be able to build cleanly without errors.
     # use build command for the initial build unless it is explicitly provided.
+    # the initial build, and any build that cannot select the tests of a mutant, runs all the tests of the map.
+    allTests = testCoverageMap.testNames if testCoverageMap is not None else list()
     if options.initialBuildCommand == "***dummy***":
-        commandString = options.buildCommand.split(',')
+        commandString = fillTestTemplate(options.buildCommand.split(','), allTests)
     else:
-        commandString = options.initialBuildCommand.split(',')
+        commandString = fillTestTemplate(options.initialBuildCommand.split(','), allTests)
     print("Initial build...", end=" ", flush=True)
 
     try:
@@ -353,8 +717,38 @@ def buildPhase(options):
         sys.exit(3)
     totalMutantCount = 0
     totalMutantCounter = 0
+    # the mutants on lines that the tests do not execute survive without a build, and are not counted in the total
+    # number of builds.
+    notCoveredMutants = dict()
+    notCoveredMutantCount = 0
+    coveringTests = dict()
     for key in databaseKeys:
-        totalMutantCount += len(mutationDatabase[key])
+        notCoveredMutants[key] = set()
+        coveringTests[key] = dict()
+        if lineSpansDatabase is not None and key in lineSpansDatabase:
+            lineSpans = lineSpansDatabase[key]
+            for replacementFileRel in mutationDatabase[key]:
+                if replacementFileRel not in lineSpans:
+                    continue
+                if coverageReport is not None and not coverageReport.isCovered(key, lineSpans[replacementFileRel]):
+                    notCoveredMutants[key].add(replacementFileRel)
+                elif testCoverageMap is not None:
+                    coveringTests[key][replacementFileRel] = testCoverageMap.getCoveringTests(
+                        key, lineSpans[replacementFileRel])
+                    if not coveringTests[key][replacementFileRel]:
+                        notCoveredMutants[key].add(replacementFileRel)
+        totalMutantCount += len(mutationDatabase[key]) - len(notCoveredMutants[key])
+        notCoveredMutantCount += len(notCoveredMutants[key])
+    if isCoverageActive:
+        print("Mutants that survive without a build, since the tests do not cover them: ", notCoveredMutantCount)
+    if testCoverageMap is not None:
+        selectedTestCount = sum(len(coveringTests[key].get(replacementFileRel, allTests)) for key in databaseKeys
+                                for replacementFileRel in mutationDatabase[key]
+                                if replacementFileRel not in notCoveredMutants[key])
+        print("Tests run per mutant, out of", len(allTests), "tests: ",
+              "{:.1f}".format(selectedTestCount / float(max(1, totalMutantCount))))
+    if isCoverageActive:
+        print("\n")
     startTime = time.time()
     # running the build system for each mutant.
     for key in databaseKeys:
@@ -368,9 +762,47 @@ def buildPhase(options):
 
         successList = list()
         failureList = list()
-
-        # for each mutant, replace the original file, run the build, store the results
+        notCoveredList = list()
+
+        # the mutant schemata of the file is built once, and each of its mutants is selected by an environment
+        # variable when it is tested. if the schemata cannot be built, its mutants are built one by one.
+        schemataMutants = dict()
+        if schemataDatabase is not None and key in schemataDatabase and \
+                not notCoveredMutants[key].issuperset(schemataDatabase[key][1]):
+            schemataFileRel, schemataTargetList = schemataDatabase[key]
+            schemataFile = os.path.abspath(os.path.join(mutantsPath, schemataFileRel))
+            shutil.copyfile(schemataFile, os.path.join(options.sourcePath, key))
+            print("Building the mutant schemata...", end=" ", flush=True)
+            processKilled, processExitCode, schemataOutput = timeoutAlternative(
+                fillTestTemplate(options.buildCommand.split(','), allTests), workingDirectory=buildDir, timeout=int(options.timeout),
+                environment=dict(os.environ, LITTLEDARWIN_MUTANT="0"))
+
+            with open(os.path.splitext(schemataFile)[0] + ".txt", 'w', encoding="utf-8") as contentFile:
+                contentFile.write(str(schemataOutput))
+
+            if processKilled or processExitCode:
+                print("failed, building its mutants one by one.")
+            else:
+                print("done.")
+                schemataMutants = {replacementFileRel: os.path.splitext(os.path.basename(replacementFileRel))[0]
+                                   for replacementFileRel in schemataTargetList}
+
+        # the mutants that the tests do not cover are recorded as survived first.
         for replacementFileRel in mutationDatabase[key]:
+            if replacementFileRel in notCoveredMutants[key]:
+                replacementFile = os.path.abspath(os.path.join(mutantsPath, replacementFileRel))
+                mutantCounter += 1
+                successList.append(os.path.basename(replacementFile))
+                notCoveredList.append(os.path.basename(replacementFile))
+
+                with open(os.path.splitext(replacementFile)[0] + ".txt", 'w', encoding="utf-8") as contentFile:
+                    contentFile.write("survived (not covered): the tests do not execute the mutated lines.")
+
+        # for each mutant, replace the original file, run the build, store the results. the mutants of the schemata
+        # come first, while it is in place of the original file.
+        for replacementFileRel in sorted((fileRel for fileRel in mutationDatabase[key] if
+                                          fileRel not in notCoveredMutants[key]),
+                                         key=lambda fileRel: fileRel not in schemataMutants):
             replacementFile = os.path.abspath(os.path.join(mutantsPath, replacementFileRel))
             mutantCounter += 1
             totalMutantCounter += 1
@@ -379,12 +811,18 @@ def buildPhase(options):
             runOutput = ""
             runOutputTest = ""
 
-            # replace the original file with the mutant
-            shutil.copyfile(replacementFile, os.path.join(options.sourcePath, key))
-
-            commandString = options.buildCommand.split(',')
+            # only the tests that cover the mutant are run, if the commands have a placeholder for them.
+            mutantTests = coveringTests[key].get(replacementFileRel, allTests)
+            commandString = fillTestTemplate(options.buildCommand.split(','), mutantTests)
             if separateTestSuite:
-                testCommandString = options.testCommand.split(',')
+                testCommandString = fillTestTemplate(options.testCommand.split(','), mutantTests)
+
+            environment = None
+            if replacementFileRel in schemataMutants:
+                environment = dict(os.environ, LITTLEDARWIN_MUTANT=schemataMutants[replacementFileRel])
+            else:
+                # replace the original file with the mutant
+                shutil.copyfile(replacementFile, os.path.join(options.sourcePath, key))
 
             try:
                 # if we have timeout support, simply run the command with timeout support from subprocess32
@@ -397,19 +835,23 @@ def buildPhase(options):
 
                 # else, run our alternative method
                 # else:
-                processKilled, processExitCode, runOutput = timeoutAlternative(commandString,
-                                                                               workingDirectory=buildDir,
-                                                                               timeout=int(options.timeout))
+                # the mutant schemata is already built, so only the test-suite is run, if it is separate.
+                if environment is None or not separateTestSuite:
+                    processKilled, processExitCode, runOutput = timeoutAlternative(commandString,
+                                                                                   workingDirectory=buildDir,
+                                                                                   timeout=int(options.timeout),
+                                                                                   environment=environment)
 
-                # raise the same exception as the original check_output.
-                if processKilled or processExitCode:
-                    raise subprocess.CalledProcessError(1 if processKilled else processExitCode, commandString,
-                                                        runOutput)
+                    # raise the same exception as the original check_output.
+                    if processKilled or processExitCode:
+                        raise subprocess.CalledProcessError(1 if processKilled else processExitCode, commandString,
+                                                            runOutput)
 
                 if separateTestSuite:
                     processKilled, processExitCode, runOutputTest = timeoutAlternative(testCommandString,
                                                                                        workingDirectory=testDir,
-                                                                                       timeout=int(options.timeout))
+                                                                                       timeout=int(options.timeout),
+                                                                                       environment=environment)
 
                     # raise the same exception as the original check_output.
                     if processKilled or processExitCode:
@@ -460,7 +902,8 @@ def buildPhase(options):
         # append the information for this file to the reports.
         textReportData.append(key + ": survived (" + str(len(successList)) + "/" + str(mutantCount) + ") -> " + str(
             successList) + " - killed (" + str(len(failureList)) + "/" + str(mutantCount) + ") -> " + str(
-            failureList) + "\r\n")
+            failureList) + (" - not covered (" + str(len(notCoveredList)) + "/" + str(mutantCount) + ") -> " + str(
+            notCoveredList) if isCoverageActive else "") + "\r\n")
         htmlReportData.append([key, len(successList), mutantCount])
 
         # we are done with the file. let's return it to the original state.
@@ -471,7 +914,8 @@ def buildPhase(options):
         targetHTMLOutputFile = os.path.join(os.path.dirname(replacementFile), "index.html")
         with open(targetHTMLOutputFile, 'w', encoding="utf-8") as contentFile:
             contentFile.write(
-                reportGenerator.generateHTMLReportPerFile(key, targetHTMLOutputFile, successList, failureList))
+                reportGenerator.generateHTMLReportPerFile(key, targetHTMLOutputFile, successList, failureList,
+                                                          notCoveredList))
 
         print("\n\n")
     # write final text report.
@@ -530,8 +974,45 @@ def parseCmdArgs(optionParser: OptionParser, mockArgs: list = None) -> object:
                             help="Use null check mutation operators.")
     optionParser.add_option("--method-level", action="store_true", dest="isMethodLevel", default=False,
                             help="Use method level mutation operators.")
+    optionParser.add_option("--sufficient", action="store_true", dest="isSufficient", default=False,
+                            help="Use the traditional mutation operators with sufficient sets of replacements.")
     optionParser.add_option("--all", action="store_true", dest="isAll", default=False,
                             help="Use all mutation operators.")
+    optionParser.add_option("--no-parse-cache", action="store_false", dest="isParseCacheActive", default=True,
+                            help="Do not use the parse tree cache stored in the results directory.")
+    optionParser.add_option("--no-dfa-cache", action="store_false", dest="isDFACacheActive", default=True,
+                            help="Do not use the prediction DFA of the parser stored in the results directory.")
+    optionParser.add_option("--no-symbol-index", action="store_false", dest="isSymbolIndexActive", default=True,
+                            help="Do not index the declarations of all the source files before mutating them.")
+    optionParser.add_option("-j", "--jobs", type="int", action="store", dest="jobs", default=1,
+                            help="Number of worker processes used to generate the mutants.")
+    optionParser.add_option("--max-in-flight", type="int", action="store", dest="maxInFlight", default=0,
+                            help="Maximum number of files mutated by the workers ahead of the database. "
+                                 "The default is twice the number of jobs.")
+    optionParser.add_option("--sampling", type="choice", action="store", dest="sampling", default="none",
+                            choices=["none", "uniform", "operator", "method", "class", "weighted"],
+                            help="Sample the mutants of each file: none, uniform, operator, method, class, or "
+                                 "weighted (by the cyclomatic complexity of the method).")
+    optionParser.add_option("--sampling-rate", type="float", action="store", dest="samplingRate", default=0.1,
+                            help="Fraction of the mutants kept by the uniform, operator, and weighted sampling.")
+    optionParser.add_option("--sampling-quota", type="int", action="store", dest="samplingQuota", default=10,
+                            help="Number of mutants kept per method or class by the method and class sampling.")
+    optionParser.add_option("--sampling-seed", type="int", action="store", dest="samplingSeed", default=0,
+                            help="Seed of the mutant sampling.")
+    optionParser.add_option("--schemata", action="store_true", dest="isSchemataActive", default=False,
+                            help="Generate a mutant schemata of each file, and build it once for all its mutants.")
+    optionParser.add_option("--coverage-report", action="store", dest="coverageReport", default="***dummy***",
+                            help="JaCoCo or Clover XML report of the line coverage of the test-suite. The mutants on lines that are not covered survive without a build.")
+    optionParser.add_option("--test-coverage", action="store", dest="testCoverage", default="***dummy***",
+                            help="Directory of JaCoCo or Clover XML line coverage reports, one per test, named after the test. Each mutant is tested only by the tests that cover it, which replace {tests} in the build and test commands.")
+    optionParser.add_option("--prediction-mode", type="choice", action="store", dest="predictionMode",
+                            default="auto", choices=["auto", "sll", "ll"],
+                            help="Prediction mode of the parser: auto (SLL with LL fallback), sll, or ll.")
+    optionParser.add_option("--lexer", type="choice", action="store", dest="lexer", default="fast",
+                            choices=["fast", "antlr"],
+                            help="Lexer used to tokenize the source files: fast (with antlr fallback), or antlr.")
+    optionParser.add_option("--methods", action="store", dest="methodList", default="***dummy***",
+                            help="Mutate only the methods and constructors named in this file (one name per line).")
     optionParser.add_option("--whitelist", action="store", dest="whitelist", default="***dummy***",
                             help="Analyze only included packages or files defined in this file (one package name or path to file per line).")
     optionParser.add_option("--blacklist", action="store", dest="blacklist", default="***dummy***",
@@ -557,6 +1038,12 @@ def parseCmdArgs(optionParser: OptionParser, mockArgs: list = None) -> object:
             filterType = "blacklist"
     if filterList is not None:
         filterList = [_f for _f in filterList if _f]
+    if not 0 < options.samplingRate <= 1 or options.samplingQuota < 1:
+        print("The sampling rate must be in (0, 1], and the sampling quota must be positive.")
+        sys.exit(7)
+    if options.testCoverage != "***dummy***" and "{tests}" not in options.buildCommand + options.testCommand:
+        print("The build or the test command must have a {tests} placeholder for the tests that cover each mutant.")
+        sys.exit(9)
     if options.isLicenseActive:
         License.outputLicense()
         sys.exit(0)
@@ -570,11 +1057,26 @@ def parseCmdArgs(optionParser: OptionParser, mockArgs: list = None) -> object:
     return options, filterType, filterList, higherOrder
 
 
+def fillTestTemplate(commandString, tests):
+    """
+    Replaces the ``{tests}`` placeholder in the arguments of a command with
+    the names of the given tests, separated by commas.
+
+    :param commandString: The command, as a list of strings.
+    :type commandString: list
+    :param tests: The names of the tests to run.
+    :type tests: list
+    :return: The command with the names of the tests.
+    :rtype: list
+    """
+    return [argument.replace("{tests}", ",".join(tests)) for argument in commandString]
+
+
 # Alternative to subprocess32
 
 # this method uses threading backend to create a watchdog thread that kills the build system and any child processes
 # after the timeout is passed.
-def timeoutAlternative(commandString, workingDirectory, timeout, inputData=None):
+def timeoutAlternative(commandString, workingDirectory, timeout, inputData=None, environment=None):
     """
     Runs a command with a timeout, and kills it if it takes too long.
 
@@ -589,6 +1091,9 @@ def timeoutAlternative(commandString, workingDirectory, timeout, inputData=None)
     :type timeout: int
     :param inputData: Input data to pass to the process's stdin.
     :type inputData: bytes, optional
+    :param environment: The environment variables of the process, or None to
+                        inherit the environment of LittleDarwin.
+    :type environment: dict, optional
     :return: A tuple containing a boolean indicating if the process was
              killed, the process's return code, and the process's stdout.
     :rtype: tuple
@@ -641,10 +1146,11 @@ def timeoutAlternative(commandString, workingDirectory, timeout, inputData=None)
     # starting the process with the given parameters.
     if platform.system() != "Windows":
         process = subprocess.Popen(commandString, cwd=workingDirectory, stdin=subprocess.PIPE,
-                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT, preexec_fn=os.setsid)
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT, preexec_fn=os.setsid,
+                                   env=environment)
     else:  # in Windows
         process = subprocess.Popen(commandString, cwd=workingDirectory, stdin=subprocess.PIPE,
-                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=environment)
 
     # passing the process and timeout references to threading's timer method, so that it kills the process
     # if timeout expires.
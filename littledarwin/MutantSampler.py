@@ -0,0 +1,133 @@
+import heapq
+import math
+import random
+from typing import List
+
+
+class MutantSampler(object):
+    """
+    This class selects a sample of the mutants of a file before they are
+    rendered, so that only the mutants in the sample are written out and
+    built. The mutants can be sampled uniformly, per stratum (the mutation
+    operator, the method, or the class of each mutant), or with weights, such
+    as the cyclomatic complexity of the method of each mutant.
+
+    The sample of each file is drawn by a random generator seeded with the
+    seed of the sampler and a key of the file, so that it does not depend on
+    the order in which the files are mutated, or on the process that mutates
+    them.
+    """
+
+    strategies = ("uniform", "operator", "method", "class", "weighted")
+
+    def __init__(self, strategy: str = "uniform", rate: float = 0.1, quota: int = 10, seed: int = 0):
+        """
+        Initializes a MutantSampler object.
+
+        :param strategy: The sampling strategy. ``uniform`` samples the mutants
+                         of a file with the same probability, ``operator``
+                         samples the mutants of each mutation operator at the
+                         same rate, ``method`` and ``class`` keep up to a
+                         quota of mutants per method and per class, and
+                         ``weighted`` samples the mutants in proportion to
+                         their weights.
+        :type strategy: str
+        :param rate: The fraction of the mutants to keep, for the uniform,
+                     operator, and weighted strategies.
+        :type rate: float
+        :param quota: The number of mutants to keep per method or class.
+        :type quota: int
+        :param seed: The seed of the random generators.
+        :type seed: int
+        """
+        assert strategy in self.strategies
+        assert 0 < rate <= 1
+        assert quota > 0
+
+        self.strategy = strategy
+        self.rate = rate
+        self.quota = quota
+        self.seed = seed
+
+    def getRandom(self, sampleKey: str) -> random.Random:
+        """
+        Creates the random generator of a file.
+
+        :param sampleKey: The key of the file, such as its relative path.
+        :type sampleKey: str
+        :return: The random generator.
+        :rtype: random.Random
+        """
+        return random.Random("{}/{}".format(self.seed, sampleKey))
+
+    def getSampleSize(self, populationSize: int) -> int:
+        """
+        Calculates the number of mutants to keep out of a population, which is
+        at least one for a population that is not empty.
+
+        :param populationSize: The number of mutants.
+        :type populationSize: int
+        :return: The number of mutants to keep.
+        :rtype: int
+        """
+        return min(populationSize, int(math.ceil(self.rate * populationSize)))
+
+    def sample(self, mutants: list, sampleKey: str = "", strata: list = None, weights: List[float] = None) -> list:
+        """
+        Selects a sample of the mutants, in their original order.
+
+        :param mutants: The mutants.
+        :type mutants: list
+        :param sampleKey: The key of the file, such as its relative path.
+        :type sampleKey: str
+        :param strata: The stratum of each mutant, for the operator, method,
+                       and class strategies.
+        :type strata: list
+        :param weights: The positive weight of each mutant, for the weighted
+                        strategy.
+        :type weights: list
+        :return: The selected mutants.
+        :rtype: list
+        """
+        randomGenerator = self.getRandom(sampleKey)
+
+        if self.strategy == "uniform":
+            selectedIndexes = randomGenerator.sample(range(len(mutants)), self.getSampleSize(len(mutants)))
+
+        elif self.strategy == "weighted":
+            selectedIndexes = self.sampleWeighted(randomGenerator, weights, self.getSampleSize(len(mutants)))
+
+        else:
+            assert len(strata) == len(mutants)
+            indexesPerStratum = dict()
+            for index, stratum in enumerate(strata):
+                indexesPerStratum.setdefault(stratum, list()).append(index)
+
+            selectedIndexes = list()
+            for indexes in indexesPerStratum.values():
+                sampleSize = self.getSampleSize(len(indexes)) if self.strategy == "operator" else min(self.quota,
+                                                                                                     len(indexes))
+                selectedIndexes.extend(randomGenerator.sample(indexes, sampleSize))
+
+        return [mutants[index] for index in sorted(selectedIndexes)]
+
+    @staticmethod
+    def sampleWeighted(randomGenerator: random.Random, weights: List[float], sampleSize: int) -> list:
+        """
+        Selects a weighted sample without replacement, in a single pass over
+        the weights (Efraimidis and Spirakis, "Weighted random sampling with a
+        reservoir", 2006): each item gets the key u ** (1 / weight) for a
+        uniform u, and the items with the largest keys are selected. The keys
+        are compared as logarithms, which keeps small weights apart.
+
+        :param randomGenerator: The random generator.
+        :type randomGenerator: random.Random
+        :param weights: The positive weight of each item.
+        :type weights: list
+        :param sampleSize: The number of items to select.
+        :type sampleSize: int
+        :return: The indexes of the selected items.
+        :rtype: list
+        """
+        keys = ((math.log(1.0 - randomGenerator.random()) / weight, index) for index, weight in enumerate(weights))
+        return [index for key, index in heapq.nlargest(sampleSize, keys)]
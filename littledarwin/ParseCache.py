@@ -0,0 +1,237 @@
+import hashlib
+import os
+import pickle
+
+from antlr4.tree.Tree import TerminalNodeImpl
+
+from .CompactTree import CompactToken, CompactTree
+from .JavaParse import FileMetrics
+from .JavaParser import JavaParser, serializedATN
+
+
+class ParseCache(object):
+    """
+    This class implements a persistent, content-addressed cache of parse trees.
+    Each entry is keyed by the hash of the source code it was created from, and
+    contains a compact serialized form of the parse tree and the metrics
+    calculated on it. Restoring a tree from the cache does not require the
+    lexer or the parser.
+    """
+
+    cacheFormatVersion = 2
+    _grammarFingerprint = None
+
+    def __init__(self, cacheDirectory: str, verbose: bool = False):
+        """
+        Initializes the ParseCache object.
+
+        :param cacheDirectory: The directory in which the cache entries are
+                               stored.
+        :type cacheDirectory: str
+        :param verbose: Whether to print verbose output.
+        :type verbose: bool
+        """
+        self.verbose = verbose
+        self.cacheDirectory = os.path.abspath(cacheDirectory)
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.exists(self.cacheDirectory):
+            os.makedirs(self.cacheDirectory, exist_ok=True)
+
+    @classmethod
+    def grammarFingerprint(cls) -> str:
+        """
+        Returns a fingerprint of the generated parser, so that the entries
+        created by a different grammar are never used.
+
+        :return: The fingerprint of the generated parser.
+        :rtype: str
+        """
+        if cls._grammarFingerprint is None:
+            cls._grammarFingerprint = hashlib.sha256(str(serializedATN()).encode("utf-8")).hexdigest()
+
+        return cls._grammarFingerprint
+
+    def getKey(self, sourceCode: str) -> str:
+        """
+        Calculates the cache key of the given source code.
+
+        :param sourceCode: The source code.
+        :type sourceCode: str
+        :return: The cache key.
+        :rtype: str
+        """
+        keyHash = hashlib.sha256()
+        keyHash.update("{}:{}:".format(self.cacheFormatVersion, self.grammarFingerprint()).encode("utf-8"))
+        keyHash.update(sourceCode.encode("utf-8", errors="surrogatepass"))
+        return keyHash.hexdigest()
+
+    def getEntryPath(self, key: str) -> str:
+        """
+        Returns the path of the file that holds the cache entry with the given
+        key.
+
+        :param key: The cache key.
+        :type key: str
+        :return: The path of the cache entry.
+        :rtype: str
+        """
+        return os.path.join(self.cacheDirectory, key[:2], key + ".pickle")
+
+    def load(self, sourceCode: str):
+        """
+        Restores the parse tree of the given source code from the cache.
+
+        :param sourceCode: The source code.
+        :type sourceCode: str
+        :return: The restored parse tree with its metrics attached as
+                 ``fileMetrics``, or None if the source code is not in the
+                 cache.
+        :rtype: antlr4.tree.Tree.ParseTree
+        """
+        entryPath = self.getEntryPath(self.getKey(sourceCode))
+
+        try:
+            with open(entryPath, 'rb') as entryFile:
+                entry = pickle.load(entryFile)
+            tree = self.deserialize(entry["tree"])
+            tree.fileMetrics = entry["metrics"]
+
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        except Exception as e:
+            # a corrupt entry is treated as a miss, and is overwritten later.
+            if self.verbose:
+                print("--> corrupt parse cache entry, ignoring: ", entryPath)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return tree
+
+    def store(self, sourceCode: str, tree: JavaParser.CompilationUnitContext, metrics: FileMetrics):
+        """
+        Stores the parse tree of the given source code and its metrics in the
+        cache.
+
+        :param sourceCode: The source code.
+        :type sourceCode: str
+        :param tree: The root of the parse tree.
+        :type tree: antlr4.tree.Tree.ParseTree
+        :param metrics: The metrics calculated on the parse tree.
+        :type metrics: littledarwin.JavaParse.FileMetrics
+        """
+        entryPath = self.getEntryPath(self.getKey(sourceCode))
+        os.makedirs(os.path.dirname(entryPath), exist_ok=True)
+
+        # write to a temporary file first, so that concurrent readers never see a partial entry.
+        temporaryPath = "{}.{}.tmp".format(entryPath, os.getpid())
+        with open(temporaryPath, 'wb') as entryFile:
+            pickle.dump({"tree": self.serialize(tree), "metrics": metrics}, entryFile,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporaryPath, entryPath)
+
+    @staticmethod
+    def serialize(tree: JavaParser.CompilationUnitContext) -> tuple:
+        """
+        Converts a parse tree to a compact representation made of plain lists.
+
+        The nodes are stored in pre-order. A rule node is stored as its class
+        index, its number of children, and the indices of its start and stop
+        tokens. A terminal node is stored as a negative number that encodes the
+        index of its token.
+
+        :param tree: The root of the parse tree.
+        :type tree: antlr4.tree.Tree.ParseTree
+        :return: A tuple containing the class names, the tokens, and the nodes.
+        :rtype: tuple
+        """
+        classNames = list()
+        classIndices = dict()
+        tokens = list()
+        tokenIndices = dict()
+        nodes = list()
+
+        def tokenIndex(token):
+            if token is None:
+                return -1
+            index = tokenIndices.get(id(token))
+            if index is None:
+                index = len(tokens)
+                tokenIndices[id(token)] = index
+                tokens.append((token.type, token.channel, token.start, token.stop, token.line, token.column,
+                               token.tokenIndex, token.text))
+            return index
+
+        stack = [tree]
+        while len(stack) > 0:
+            node = stack.pop()
+
+            if isinstance(node, TerminalNodeImpl):
+                nodes.append(-1 - tokenIndex(node.symbol))
+                continue
+
+            className = type(node).__name__
+            classIndex = classIndices.get(className)
+            if classIndex is None:
+                classIndex = len(classNames)
+                classIndices[className] = classIndex
+                classNames.append(className)
+
+            children = node.children if node.children is not None else []
+            nodes.extend((classIndex, len(children), tokenIndex(node.start), tokenIndex(node.stop)))
+            stack.extend(reversed(children))
+
+        return classNames, tokens, nodes
+
+    @staticmethod
+    def deserialize(data: tuple) -> JavaParser.CompilationUnitContext:
+        """
+        Rebuilds a parse tree from its compact representation. The nodes and
+        the tokens are created directly in the form of ``CompactTree``.
+
+        :param data: The compact representation created by ``serialize``.
+        :type data: tuple
+        :return: The root of the parse tree.
+        :rtype: antlr4.tree.Tree.ParseTree
+        """
+        classNames, tokenData, nodes = data
+        classes = [CompactTree.getCompactClass(getattr(JavaParser, className)) for className in classNames]
+        terminalNodeClass = CompactTree.getCompactClass(TerminalNodeImpl)
+        tokens = [CompactToken(*token) for token in tokenData]
+
+        root = None
+        # each item is a parent node and the number of children it still expects.
+        pending = list()
+        position = 0
+
+        while position < len(nodes):
+            code = nodes[position]
+            parent = pending[-1][0] if len(pending) > 0 else None
+
+            if code < 0:
+                node = CompactTree.createTerminalNode(terminalNodeClass, parent, tokens[-1 - code])
+                position += 1
+                childCount = 0
+            else:
+                node = CompactTree.createRuleNode(classes[code], parent,
+                                                  tokens[nodes[position + 2]] if nodes[position + 2] >= 0 else None,
+                                                  tokens[nodes[position + 3]] if nodes[position + 3] >= 0 else None)
+                childCount = nodes[position + 1]
+                position += 4
+
+            if parent is None:
+                root = node
+            else:
+                parent.addChild(node)
+                pending[-1][1] -= 1
+                while len(pending) > 0 and pending[-1][1] == 0:
+                    pending.pop()
+
+            if childCount > 0:
+                pending.append([node, childCount])
+
+        return root
@@ -16,16 +16,23 @@ class ReportGenerator(object):
         :type littleDarwinVersion: str
         """
         self.database = None
+        self.notCoveredDatabase = None
         self.ldVersion = littleDarwinVersion
 
-    def initiateDatabase(self, databasePath):
+    def initiateDatabase(self, databasePath, isCoverageActive=False):
         """
-        Initiates the results database.
+        Initiates the results database. The survived mutants that the tests
+        do not cover are also stored in a database of their own, next to the
+        results database, so that the results keep their format.
 
         :param databasePath: The path to the results database.
         :type databasePath: str
+        :param isCoverageActive: Whether the coverage of the tests is used.
+        :type isCoverageActive: bool
         """
         self.database = shelve.open(databasePath, "c")
+        if isCoverageActive:
+            self.notCoveredDatabase = shelve.open(databasePath + "-notcovered", "c")
 
     def generateHTMLFinalReport(self, resultData, reportPath):
         """
@@ -94,7 +101,7 @@ class ReportGenerator(object):
 
         return '\n'.join(reportOutput)
 
-    def generateHTMLReportPerFile(self, filePath, reportPath, survived, killed):
+    def generateHTMLReportPerFile(self, filePath, reportPath, survived, killed, notCovered=None):
         """
         Generates an HTML report for a single file.
 
@@ -106,6 +113,9 @@ class ReportGenerator(object):
         :type survived: list
         :param killed: A list of the names of the killed mutants.
         :type killed: list
+        :param notCovered: A list of the names of the survived mutants that
+                           the tests do not cover.
+        :type notCovered: list
         :return: The HTML report as a string.
         :rtype: str
         """
@@ -123,6 +133,8 @@ class ReportGenerator(object):
                 return str(inputVar)
 
         self.database[filePath] = (survived, killed)
+        if self.notCoveredDatabase is not None:
+            self.notCoveredDatabase[filePath] = notCovered if notCovered is not None else list()
 
         reportBeginning = """<!DOCTYPE html><html><head><title>LittleDarwin Mutation Coverage Report</title>
              <style type='text/css'> body { font-family: "Carlito", "Calibri", "Helvetica Neue", sans-serif; } 
@@ -188,7 +200,9 @@ class ReportGenerator(object):
 
         for item in joinedList:
             output.append(
-                "<tr><td><a href=\"" + xstr(item[0]) + "\">" + xstr(item[1]) + "</a></td> <td><a href=\"" + xstr(
+                "<tr><td><a href=\"" + xstr(item[0]) + "\">" + xstr(item[1]) + (
+                    " (not covered)" if notCovered is not None and item[1] in notCovered else "") +
+                "</a></td> <td><a href=\"" + xstr(
                     item[2]) + "\">" + xstr(item[3]) + "</a></td><td><a href=\"" + xstr(item[4]) + "\">" + xstr(
                     item[5]) + "</a></td><td><a href=\"" + xstr(item[6]) + "\">" + xstr(item[7]) + "</a></td></tr>")
 
@@ -0,0 +1,885 @@
+from typing import NamedTuple, Tuple
+
+from antlr4.tree.Tree import TerminalNode
+
+from .JavaParser import JavaParser
+
+
+class TypeDeclaration(NamedTuple):
+    """
+    This class is an immutable record of a type declared in the project. The
+    functional return type is the return type of the only abstract method of
+    an interface, or None if the type is not such an interface.
+    """
+
+    kind: str
+    typeParameters: Tuple[str, ...]
+    functionalReturnType: str
+
+
+class MethodSignature(NamedTuple):
+    """
+    This class is an immutable record of the return type and the parameter
+    types of a method declared in the project.
+    """
+
+    returnType: str
+    parameterTypes: Tuple[str, ...]
+
+
+class SymbolIndex(object):
+    """
+    This class indexes the types, the fields, and the methods declared in the
+    files of a project, so that the mutation operators can avoid creating
+    mutants that do not compile, such as a ``null`` returned where a
+    primitive value is expected. The project index is built once per run from
+    the declarations of all the files (see ``addTree``). The types of the
+    local variables and of the expressions are looked up in the parse tree of
+    the file being mutated, whose own declarations are indexed on first use,
+    and then in the project index.
+
+    Type names are kept as they appear in the source code, with their type
+    arguments and array dimensions, such as ``List<String>`` or ``int[]``. A
+    type that cannot be determined is None.
+    """
+
+    primitiveTypes = frozenset(["boolean", "byte", "char", "short", "int", "long", "float", "double"])
+    boxedTypes = frozenset(["Boolean", "Byte", "Character", "Short", "Integer", "Long", "Float", "Double"])
+    typeDeclarationKinds = {JavaParser.ClassDeclarationContext: "class",
+                            JavaParser.InterfaceDeclarationContext: "interface",
+                            JavaParser.EnumDeclarationContext: "enum",
+                            JavaParser.RecordDeclarationContext: "record",
+                            JavaParser.AnnotationTypeDeclarationContext: "annotation"}
+    methodDeclarations = (JavaParser.MethodDeclarationContext, JavaParser.InterfaceMethodDeclarationContext)
+    typeBodies = (JavaParser.ClassBodyContext, JavaParser.InterfaceBodyContext, JavaParser.EnumBodyDeclarationsContext,
+                  JavaParser.RecordBodyContext, JavaParser.AnnotationTypeBodyContext)
+
+    # the return types of the functional interfaces of the standard library, by simple name. "Object" stands for
+    # any reference type.
+    libraryFunctionalReturnTypes = {
+        "Runnable": "void", "Callable": "Object", "Comparator": "int", "Supplier": "Object", "Function": "Object",
+        "BiFunction": "Object", "UnaryOperator": "Object", "BinaryOperator": "Object", "Predicate": "boolean",
+        "BiPredicate": "boolean", "Consumer": "void", "BiConsumer": "void", "IntFunction": "Object",
+        "LongFunction": "Object", "DoubleFunction": "Object", "IntPredicate": "boolean", "LongPredicate": "boolean",
+        "DoublePredicate": "boolean", "IntSupplier": "int", "LongSupplier": "long", "DoubleSupplier": "double",
+        "BooleanSupplier": "boolean", "IntUnaryOperator": "int", "LongUnaryOperator": "long",
+        "DoubleUnaryOperator": "double", "IntBinaryOperator": "int", "LongBinaryOperator": "long",
+        "DoubleBinaryOperator": "double", "ToIntFunction": "int", "ToLongFunction": "long",
+        "ToDoubleFunction": "double", "ToIntBiFunction": "int", "ToLongBiFunction": "long",
+        "ToDoubleBiFunction": "double", "IntToLongFunction": "long", "IntToDoubleFunction": "double",
+        "LongToIntFunction": "int", "LongToDoubleFunction": "double", "DoubleToIntFunction": "int",
+        "DoubleToLongFunction": "long", "IntConsumer": "void", "LongConsumer": "void", "DoubleConsumer": "void",
+        "ObjIntConsumer": "void", "ObjLongConsumer": "void", "ObjDoubleConsumer": "void"}
+
+    def __init__(self):
+        """
+        Initializes an empty SymbolIndex object.
+        """
+        # simple name -> TypeDeclaration, or None if different types are declared with the same name.
+        self.typeDeclarations = dict()
+        # method name -> set of MethodSignature
+        self.methodSignatures = dict()
+        # field name -> set of type names
+        self.fieldTypes = dict()
+
+    def __len__(self):
+        return len(self.typeDeclarations)
+
+    def addTypeDeclaration(self, name: str, typeDeclaration: TypeDeclaration):
+        """
+        Adds a type declaration to the index. A name declared with different
+        types is marked as ambiguous.
+
+        :param name: The simple name of the type.
+        :type name: str
+        :param typeDeclaration: The type declaration, or None if it is
+                                ambiguous.
+        :type typeDeclaration: TypeDeclaration
+        """
+        if name in self.typeDeclarations and self.typeDeclarations[name] != typeDeclaration:
+            typeDeclaration = None
+        self.typeDeclarations[name] = typeDeclaration
+
+    def update(self, other: 'SymbolIndex'):
+        """
+        Adds the symbols of another index to this index.
+
+        :param other: The other index.
+        :type other: SymbolIndex
+        """
+        for name, typeDeclaration in other.typeDeclarations.items():
+            self.addTypeDeclaration(name, typeDeclaration)
+        for name, signatures in other.methodSignatures.items():
+            self.methodSignatures.setdefault(name, set()).update(signatures)
+        for name, typeNames in other.fieldTypes.items():
+            self.fieldTypes.setdefault(name, set()).update(typeNames)
+
+    def addTree(self, tree):
+        """
+        Adds the types, the fields, and the methods declared in a parse tree
+        to the index. The method bodies are not needed, so the tree may be
+        parsed with a method scope.
+
+        :param tree: The root of the parse tree.
+        :type tree: antlr4.tree.Tree.ParseTree
+        """
+        stack = [tree]
+        while len(stack) > 0:
+            node = stack.pop()
+            if isinstance(node, TerminalNode) or node.children is None:
+                continue
+            stack.extend(node.children)
+
+            kind = next((kind for declarationClass, kind in self.typeDeclarationKinds.items()
+                         if isinstance(node, declarationClass)), None)
+            if kind is not None:
+                functionalReturnType = self.getFunctionalMethodType(node) if kind == "interface" else None
+                self.addTypeDeclaration(self.getDeclaredName(node), TypeDeclaration(
+                    kind, self.getDeclaredTypeParameters(node), functionalReturnType))
+
+            elif isinstance(node, self.methodDeclarations):
+                signature = MethodSignature(self.getMethodReturnType(node), tuple(
+                    typeName for name, typeName, isFinal in self.getFormalParameters(node)))
+                self.methodSignatures.setdefault(self.getDeclaredName(node), set()).add(signature)
+
+            elif isinstance(node, (JavaParser.FieldDeclarationContext, JavaParser.ConstDeclarationContext,
+                                   JavaParser.RecordComponentContext)):
+                for name, typeName in self.getDeclaredVariables(node):
+                    self.fieldTypes.setdefault(name, set()).add(typeName)
+                    if isinstance(node, JavaParser.RecordComponentContext):
+                        self.methodSignatures.setdefault(name, set()).add(MethodSignature(typeName, ()))
+
+    @staticmethod
+    def isReferenceType(typeName: str) -> bool:
+        """
+        Checks whether a type is a reference type, to which ``null`` can be
+        assigned.
+
+        :param typeName: The name of the type.
+        :type typeName: str
+        :return: True if the type is a reference type.
+        :rtype: bool
+        """
+        return typeName not in SymbolIndex.primitiveTypes and typeName != "void"
+
+    @staticmethod
+    def getSimpleTypeName(typeName: str) -> str:
+        """
+        Removes the qualifier and the type arguments from a type name.
+
+        :param typeName: The name of the type.
+        :type typeName: str
+        :return: The simple name of the type.
+        :rtype: str
+        """
+        return typeName.split("<", 1)[0].rsplit(".", 1)[-1]
+
+    @staticmethod
+    def getDeclaredName(declaration) -> str:
+        """
+        Gets the name declared by a type or a method declaration.
+
+        :param declaration: The declaration.
+        :type declaration: antlr4.tree.Tree.ParseTree
+        :return: The declared name.
+        :rtype: str
+        """
+        for child in declaration.children:
+            if isinstance(child, TerminalNode) and child.symbol.type == JavaParser.Identifier:
+                return child.symbol.text
+
+        return None
+
+    @staticmethod
+    def getDeclaredTypeParameters(declaration) -> tuple:
+        """
+        Gets the names of the type parameters of a declaration.
+
+        :param declaration: A type, a method, or a constructor declaration.
+        :type declaration: antlr4.tree.Tree.ParseTree
+        :return: The names of the type parameters.
+        :rtype: tuple
+        """
+        typeParameters = declaration.getChild(0, JavaParser.TypeParametersContext) if declaration.children else None
+        if typeParameters is None:
+            return tuple()
+
+        return tuple(SymbolIndex.getDeclaredName(typeParameter) for typeParameter in typeParameters.children
+                     if isinstance(typeParameter, JavaParser.TypeParameterContext))
+
+    @staticmethod
+    def getDimensions(node) -> str:
+        """
+        Gets the array dimensions that a declarator adds to the declared type.
+
+        :param node: A declarator, or a method declaration.
+        :type node: antlr4.tree.Tree.ParseTree
+        :return: A "[]" for each dimension.
+        :rtype: str
+        """
+        return "[]" * sum(1 for child in node.children if isinstance(child, TerminalNode) and child.symbol.text == "[")
+
+    @staticmethod
+    def getMethodReturnType(declaration) -> str:
+        """
+        Gets the return type of a method declaration, including the array
+        dimensions that follow its formal parameters.
+
+        :param declaration: The method declaration.
+        :type declaration: antlr4.tree.Tree.ParseTree
+        :return: The return type, or "void".
+        :rtype: str
+        """
+        for child in declaration.children:
+            if isinstance(child, JavaParser.JTypeContext):
+                return child.getText() + SymbolIndex.getDimensions(declaration)
+            if isinstance(child, TerminalNode) and child.symbol.text == "void":
+                return "void"
+
+        return None
+
+    def getFunctionalMethodType(self, interfaceDeclaration) -> str:
+        """
+        Gets the return type of the only abstract method of an interface that
+        extends no other interface.
+
+        :param interfaceDeclaration: The interface declaration.
+        :type interfaceDeclaration: JavaParser.InterfaceDeclarationContext
+        :return: The return type, or None if the interface is not functional.
+        :rtype: str
+        """
+        if any(isinstance(child, TerminalNode) and child.symbol.text == "extends"
+               for child in interfaceDeclaration.children):
+            return None
+
+        abstractMethods = list()
+        interfaceBody = interfaceDeclaration.getChild(0, JavaParser.InterfaceBodyContext)
+        for bodyDeclaration in interfaceBody.children:
+            memberDeclaration = bodyDeclaration.getChild(0, JavaParser.InterfaceMemberDeclarationContext) \
+                if not isinstance(bodyDeclaration, TerminalNode) else None
+            if memberDeclaration is None:
+                continue
+
+            methodDeclaration = memberDeclaration.getChild(0, JavaParser.InterfaceMethodDeclarationContext)
+            genericDeclaration = memberDeclaration.getChild(0, JavaParser.GenericInterfaceMethodDeclarationContext)
+            if genericDeclaration is not None:
+                methodDeclaration = genericDeclaration.getChild(0, JavaParser.InterfaceMethodDeclarationContext)
+
+            # the public methods of Object do not count as abstract methods of the interface.
+            if methodDeclaration is not None and methodDeclaration.getChild(0, JavaParser.MethodBodyContext) is None \
+                    and self.getDeclaredName(methodDeclaration) not in ("equals", "hashCode", "toString"):
+                abstractMethods.append(methodDeclaration)
+
+        return self.getMethodReturnType(abstractMethods[0]) if len(abstractMethods) == 1 else None
+
+    def getFormalParameters(self, declaration) -> list:
+        """
+        Gets the formal parameters of a method, a constructor, or a lambda
+        expression.
+
+        :param declaration: The declaration, or the lambda expression.
+        :type declaration: antlr4.tree.Tree.ParseTree
+        :return: A list of (name, type name, is final) tuples. The type of an
+                 inferred lambda parameter is None.
+        :rtype: list
+        """
+        formalParameters = declaration.getChild(0, JavaParser.FormalParametersContext) or \
+            declaration.getChild(0, JavaParser.LambdaParametersContext)
+        if formalParameters is None or formalParameters.children is None:
+            return list()
+
+        parameterList = formalParameters.getChild(0, JavaParser.FormalParameterListContext)
+        if parameterList is not None:
+            parameters = parameterList.children
+        elif formalParameters.getChild(0, JavaParser.InferredFormalParameterListContext) is not None:
+            parameters = formalParameters.getChild(0, JavaParser.InferredFormalParameterListContext).children
+        else:
+            # the parameters of a lambda expression with var or with types, declared inline.
+            parameters = formalParameters.children
+
+        parameterTuples = list()
+        typeName, isFinal = None, False
+        for parameter in parameters:
+            if isinstance(parameter, (JavaParser.FormalParameterContext, JavaParser.LastFormalParameterContext)):
+                isFinal = any(isinstance(child, JavaParser.VariableModifierContext) and child.getText() == "final"
+                              for child in parameter.children)
+                for name, typeName in self.getDeclaredVariables(parameter):
+                    parameterTuples.append((name, typeName, isFinal))
+            elif isinstance(parameter, JavaParser.VariableModifierContext):
+                isFinal = isFinal or parameter.getText() == "final"
+            elif isinstance(parameter, JavaParser.JTypeContext):
+                typeName = parameter.getText()
+            elif isinstance(parameter, TerminalNode) and parameter.symbol.type == JavaParser.Identifier:
+                parameterTuples.append((parameter.symbol.text, typeName, isFinal))
+                typeName, isFinal = None, False
+
+        return parameterTuples
+
+    def getDeclaredVariables(self, declaration) -> list:
+        """
+        Gets the variables declared by a field, a constant, a local variable,
+        a formal parameter, a record component, a resource, or the variable of
+        an enhanced for statement.
+
+        :param declaration: The declaration.
+        :type declaration: antlr4.tree.Tree.ParseTree
+        :return: A list of (name, type name) tuples. The type of a variable
+                 declared with ``var`` is None.
+        :rtype: list
+        """
+        typeName = None
+        declarators = list()
+        for child in declaration.children:
+            if isinstance(child, (JavaParser.JTypeContext, JavaParser.ClassOrInterfaceTypeContext)):
+                typeName = child.getText()
+            elif isinstance(child, TerminalNode) and child.symbol.text == "...":
+                typeName += "[]"
+            elif isinstance(child, JavaParser.VariableDeclaratorsContext):
+                declarators.extend(declarator.children[0] for declarator in child.children
+                                   if isinstance(declarator, JavaParser.VariableDeclaratorContext))
+            elif isinstance(child, (JavaParser.VariableDeclaratorIdContext, JavaParser.ConstantDeclaratorContext)):
+                declarators.append(child)
+
+        return [(declarator.children[0].getText(),
+                 typeName + self.getDimensions(declarator) if typeName is not None else None)
+                for declarator in declarators]
+
+    def getFileIndex(self, node) -> 'SymbolIndex':
+        """
+        Gets the index of the declarations of the file that contains a node,
+        and creates it the first time it is requested.
+
+        :param node: A node of the parse tree.
+        :type node: antlr4.tree.Tree.ParseTree
+        :return: The index of the file.
+        :rtype: SymbolIndex
+        """
+        root = node
+        while root.parentCtx is not None:
+            root = root.parentCtx
+
+        fileIndex = getattr(root, 'symbolIndex', None)
+        if fileIndex is None:
+            fileIndex = SymbolIndex()
+            fileIndex.addTree(root)
+            root.symbolIndex = fileIndex
+
+        return fileIndex
+
+    def getTypeDeclaration(self, node, typeName: str) -> TypeDeclaration:
+        """
+        Finds the declaration of a type in the file that contains a node, or
+        in the project.
+
+        :param node: A node of the parse tree.
+        :type node: antlr4.tree.Tree.ParseTree
+        :param typeName: The name of the type.
+        :type typeName: str
+        :return: The type declaration, or None if the type is not declared in
+                 the project, or is declared more than once.
+        :rtype: TypeDeclaration
+        """
+        simpleName = self.getSimpleTypeName(typeName)
+        fileIndex = self.getFileIndex(node)
+        if simpleName in fileIndex.typeDeclarations:
+            return fileIndex.typeDeclarations[simpleName]
+
+        return self.typeDeclarations.get(simpleName)
+
+    def getFunctionalReturnType(self, node, typeName: str) -> str:
+        """
+        Gets the return type of the lambda expressions of a functional
+        interface type.
+
+        :param node: A node of the parse tree.
+        :type node: antlr4.tree.Tree.ParseTree
+        :param typeName: The name of the functional interface type.
+        :type typeName: str
+        :return: The return type, or None if it is unknown.
+        :rtype: str
+        """
+        if typeName is None or typeName.endswith("]"):
+            return None
+
+        simpleName = self.getSimpleTypeName(typeName)
+        if simpleName in self.getFileIndex(node).typeDeclarations or simpleName in self.typeDeclarations:
+            typeDeclaration = self.getTypeDeclaration(node, simpleName)
+            return typeDeclaration.functionalReturnType if typeDeclaration is not None else None
+
+        return self.libraryFunctionalReturnTypes.get(simpleName)
+
+    def getMethodReturnTypeByName(self, node, name: str, argumentCount: int) -> str:
+        """
+        Finds the return type of the methods with a name and a number of
+        parameters, declared in the file that contains a node or in the
+        project.
+
+        :param node: A node of the parse tree.
+        :type node: antlr4.tree.Tree.ParseTree
+        :param name: The name of the method.
+        :type name: str
+        :param argumentCount: The number of arguments of the call.
+        :type argumentCount: int
+        :return: The return type, or None if there is no such method or the
+                 methods do not agree on whether it is a reference type.
+        :rtype: str
+        """
+        signatures = self.getFileIndex(node).methodSignatures.get(name, set()) | self.methodSignatures.get(name, set())
+        returnTypes = [signature.returnType for signature in signatures
+                       if len(signature.parameterTypes) == argumentCount and signature.returnType is not None]
+        if len(returnTypes) == 0 or len(set(self.isReferenceType(returnType) for returnType in returnTypes)) > 1:
+            return None
+
+        return returnTypes[0]
+
+    def getParameterType(self, node, name: str, argumentCount: int, position: int) -> str:
+        """
+        Finds the type of a parameter of the methods with a name and a number
+        of parameters, declared in the file that contains a node or in the
+        project.
+
+        :param node: A node of the parse tree.
+        :type node: antlr4.tree.Tree.ParseTree
+        :param name: The name of the method.
+        :type name: str
+        :param argumentCount: The number of arguments of the call.
+        :type argumentCount: int
+        :param position: The position of the parameter.
+        :type position: int
+        :return: The type of the parameter, or None if there is no such
+                 method or the methods disagree on it.
+        :rtype: str
+        """
+        signatures = self.getFileIndex(node).methodSignatures.get(name, set()) | self.methodSignatures.get(name, set())
+        parameterTypes = set(signature.parameterTypes[position] for signature in signatures
+                             if len(signature.parameterTypes) == argumentCount)
+
+        return parameterTypes.pop() if len(parameterTypes) == 1 else None
+
+    def getTypeParameters(self, node) -> set:
+        """
+        Gets the type parameters in scope at a node.
+
+        :param node: A node of the parse tree.
+        :type node: antlr4.tree.Tree.ParseTree
+        :return: The names of the type parameters.
+        :rtype: set
+        """
+        typeParameters = set()
+        current = node
+        while current is not None:
+            if not isinstance(current, TerminalNode) and current.children is not None:
+                typeParameters.update(self.getDeclaredTypeParameters(current))
+            current = current.parentCtx
+
+        return typeParameters
+
+    def isReifiableArray(self, node, typeName: str) -> bool:
+        """
+        Checks whether an array type can be created with ``new``, which is not
+        the case for the arrays of a parameterized type or of a type
+        parameter.
+
+        :param node: A node of the parse tree, in the scope of the type.
+        :type node: antlr4.tree.Tree.ParseTree
+        :param typeName: The name of the array type.
+        :type typeName: str
+        :return: True if the array can be created.
+        :rtype: bool
+        """
+        elementType = typeName.split("[", 1)[0]
+        return "<" not in elementType and elementType not in self.getTypeParameters(node)
+
+    def findVariableInScope(self, scope, child, name: str) -> tuple:
+        """
+        Looks for the declaration of a variable in a node, among the
+        declarations that are visible to one of its children.
+
+        :param scope: The node.
+        :type scope: antlr4.tree.Tree.ParseTree
+        :param child: The child of the node that uses the variable.
+        :type child: antlr4.tree.Tree.ParseTree
+        :param name: The name of the variable.
+        :type name: str
+        :return: A tuple of whether the variable is declared, and its type.
+        :rtype: tuple
+        """
+        declarations = list()
+
+        if isinstance(scope, (JavaParser.BlockContext, JavaParser.SwitchBlockSectionContext)):
+            for blockStatement in scope.children:
+                if blockStatement is child:
+                    break
+                if isinstance(blockStatement, JavaParser.BlockStatementContext):
+                    statement = blockStatement.getChild(0, JavaParser.LocalVariableDeclarationStatementContext)
+                    if statement is not None:
+                        declarations.append(statement.children[0])
+
+        elif isinstance(scope, JavaParser.StatementContext):
+            forControl = scope.getChild(0, JavaParser.ForControlContext)
+            if forControl is not None:
+                forInit = forControl.getChild(0, JavaParser.ForInitContext)
+                if forInit is not None:
+                    declarations.extend(forInit.getChildren(
+                        lambda forInitChild: isinstance(forInitChild, JavaParser.LocalVariableDeclarationContext)))
+                declarations.extend(forControl.getChildren(
+                    lambda forControlChild: isinstance(forControlChild, JavaParser.EnhancedForControlContext)))
+
+            resourceSpecification = scope.getChild(0, JavaParser.ResourceSpecificationContext)
+            if resourceSpecification is not None:
+                resources = resourceSpecification.getChild(0, JavaParser.ResourcesContext)
+                declarations.extend(resources.getChildren(
+                    lambda resource: isinstance(resource, JavaParser.ResourceContext)))
+
+        elif isinstance(scope, JavaParser.CatchClauseContext):
+            if scope.getChild(0, TerminalNode) is not None and any(
+                    isinstance(catchChild, TerminalNode) and catchChild.symbol.text == name
+                    for catchChild in scope.children):
+                return True, "Throwable"
+
+        elif isinstance(scope, (JavaParser.LambdaExpressionContext, JavaParser.ConstructorDeclarationContext) +
+                        self.methodDeclarations):
+            for parameterName, typeName, isFinal in self.getFormalParameters(scope):
+                if parameterName == name:
+                    return True, typeName
+
+        elif isinstance(scope, self.typeBodies):
+            stack = list(scope.children)
+            while len(stack) > 0:
+                member = stack.pop()
+                if isinstance(member, (JavaParser.FieldDeclarationContext, JavaParser.ConstDeclarationContext)):
+                    declarations.append(member)
+                elif isinstance(member, (JavaParser.ClassBodyDeclarationContext, JavaParser.MemberDeclarationContext,
+                                         JavaParser.InterfaceBodyDeclarationContext,
+                                         JavaParser.InterfaceMemberDeclarationContext)):
+                    stack.extend(member.children)
+
+        elif isinstance(scope, JavaParser.RecordDeclarationContext):
+            recordHeader = scope.getChild(0, JavaParser.RecordHeaderContext)
+            if recordHeader is not None:
+                declarations.extend(recordHeader.getChildren(
+                    lambda component: isinstance(component, JavaParser.RecordComponentContext)))
+
+        elif isinstance(scope, JavaParser.EnumDeclarationContext):
+            enumConstants = scope.getChild(0, JavaParser.EnumConstantsContext)
+            if enumConstants is not None and any(self.getDeclaredName(enumConstant) == name
+                                                 for enumConstant in enumConstants.children
+                                                 if isinstance(enumConstant, JavaParser.EnumConstantContext)):
+                return True, self.getDeclaredName(scope)
+
+        for declaration in declarations:
+            for variableName, typeName in self.getDeclaredVariables(declaration):
+                if variableName == name:
+                    return True, typeName
+
+        return False, None
+
+    def getVariableType(self, node, name: str, fieldsOnly: bool = False) -> str:
+        """
+        Gets the type of the variable with a name, as seen from a node. The
+        local variables, the parameters, and the fields of the enclosing types
+        are looked up in the parse tree, and the fields declared elsewhere in
+        the project index.
+
+        :param node: The node that uses the variable.
+        :type node: antlr4.tree.Tree.ParseTree
+        :param name: The name of the variable.
+        :type name: str
+        :param fieldsOnly: Whether to look up fields only, as in ``this.x``.
+        :type fieldsOnly: bool
+        :return: The type of the variable, or None if it is unknown.
+        :rtype: str
+        """
+        child, current = node, node.parentCtx
+        while current is not None:
+            if not fieldsOnly or isinstance(current, self.typeBodies + (JavaParser.RecordDeclarationContext,
+                                                                        JavaParser.EnumDeclarationContext)):
+                isDeclared, typeName = self.findVariableInScope(current, child, name)
+                if isDeclared:
+                    return typeName
+            child, current = current, current.parentCtx
+
+        # an inherited field, or a variable of a pattern, whose type may be different.
+        typeNames = self.fieldTypes.get(name, set())
+        return next(iter(typeNames)) if len(typeNames) == 1 else None
+
+    def getExpressionType(self, expression) -> str:
+        """
+        Gets the type of an expression, when it can be determined from the
+        declarations of the project. The types of the results of numeric and
+        boolean operators are approximated by "int" and "boolean", so only
+        whether the type is a reference type is reliable. The type of the
+        ``null`` literal is "null".
+
+        :param expression: The expression.
+        :type expression: JavaParser.ExpressionContext
+        :return: The type of the expression, or None if it is unknown.
+        :rtype: str
+        """
+        children = expression.children or []
+        if len(children) == 0:
+            return None
+
+        first = children[0]
+        texts = [child.symbol.text if isinstance(child, TerminalNode) else None for child in children]
+
+        if isinstance(first, JavaParser.PrimaryContext):
+            return self.getPrimaryType(first)
+
+        if texts[0] == "new":
+            creator = children[1]
+            createdName = creator.getChild(0, JavaParser.CreatedNameContext)
+            if createdName is None:
+                return None
+            arrayCreatorRest = creator.getChild(0, JavaParser.ArrayCreatorRestContext)
+            return createdName.getText() + ("[]" if arrayCreatorRest is not None else "")
+
+        if texts[0] == "(" and isinstance(children[1], JavaParser.JTypeContext):
+            return children[1].getText()
+
+        if texts[0] in ("!",):
+            return "boolean"
+        if texts[0] in ("+", "-", "~"):
+            return "int"
+        if texts[0] in ("++", "--"):
+            return self.getExpressionType(children[1])
+        if len(children) == 2 and texts[1] in ("++", "--"):
+            return self.getExpressionType(first)
+
+        if len(children) >= 3 and isinstance(first, JavaParser.ExpressionContext):
+            operator = texts[1]
+            if operator in ("<", ">", "<=", ">=", "==", "!=", "&&", "||", "instanceof"):
+                if texts[2] in ("<", ">"):
+                    return "int"  # a shift
+                return "boolean"
+            if operator in ("*", "/", "%", "-"):
+                return "int"
+            if operator in ("&", "|", "^"):
+                return "boolean" if self.getExpressionType(first) in ("boolean", "Boolean") else "int"
+            if operator == "+":
+                operandTypes = [self.getExpressionType(first), self.getExpressionType(children[2])]
+                if "String" in operandTypes:
+                    return "String"
+                if all(operandType is not None and (operandType in self.primitiveTypes or
+                                                    operandType in self.boxedTypes) for operandType in operandTypes):
+                    return "int"
+                return None
+            if operator == "?":
+                branchTypes = [self.getExpressionType(children[2]), self.getExpressionType(children[4])]
+                if None in branchTypes:
+                    return None
+                if "null" in branchTypes or all(self.isReferenceType(branchType) and branchType not in self.boxedTypes
+                                                for branchType in branchTypes):
+                    return next((branchType for branchType in branchTypes if branchType != "null"), "null")
+                if all(branchType in self.primitiveTypes for branchType in branchTypes):
+                    return branchTypes[0]
+                return None
+            if operator is not None and operator.endswith("=") and len(children) == 3:
+                return self.getExpressionType(first)
+            if operator == "[":
+                arrayType = self.getExpressionType(first)
+                return arrayType[:-2] if arrayType is not None and arrayType.endswith("[]") else None
+            if operator == ".":
+                if isinstance(children[2], TerminalNode) and children[2].symbol.type == JavaParser.Identifier and \
+                        self.isThis(first):
+                    return self.getVariableType(expression, children[2].symbol.text, fieldsOnly=True)
+                return None
+            if operator == "(":
+                return self.getCallType(expression)
+
+        return None
+
+    @staticmethod
+    def isThis(expression) -> bool:
+        """
+        Checks whether an expression is ``this``.
+
+        :param expression: The expression.
+        :type expression: JavaParser.ExpressionContext
+        :return: True if the expression is ``this``.
+        :rtype: bool
+        """
+        return isinstance(expression.children[0], JavaParser.PrimaryContext) and expression.getText() == "this"
+
+    def getCalledName(self, call) -> str:
+        """
+        Gets the name of the method called by an expression, if it is called
+        without a qualifier or on ``this``.
+
+        :param call: The method call expression.
+        :type call: JavaParser.ExpressionContext
+        :return: The name of the method, or None.
+        :rtype: str
+        """
+        callee = call.children[0]
+        if isinstance(callee.children[0], JavaParser.PrimaryContext):
+            primary = callee.children[0]
+            if isinstance(primary.children[0], TerminalNode) and primary.children[0].symbol.type == JavaParser.Identifier:
+                return primary.children[0].symbol.text
+        elif len(callee.children) == 3 and isinstance(callee.children[0], JavaParser.ExpressionContext) and \
+                self.isThis(callee.children[0]) and isinstance(callee.children[2], TerminalNode):
+            return callee.children[2].symbol.text
+
+        return None
+
+    @staticmethod
+    def getArguments(call) -> list:
+        """
+        Gets the arguments of a method call expression.
+
+        :param call: The method call expression.
+        :type call: JavaParser.ExpressionContext
+        :return: The argument expressions.
+        :rtype: list
+        """
+        expressionList = call.getChild(0, JavaParser.ExpressionListContext)
+        if expressionList is None:
+            return list()
+
+        return [argument for argument in expressionList.children if isinstance(argument, JavaParser.ExpressionContext)]
+
+    def getCallType(self, call) -> str:
+        """
+        Gets the return type of the method called by an expression.
+
+        :param call: The method call expression.
+        :type call: JavaParser.ExpressionContext
+        :return: The return type, or None if it is unknown.
+        :rtype: str
+        """
+        name = self.getCalledName(call)
+        if name is None:
+            return None
+
+        return self.getMethodReturnTypeByName(call, name, len(self.getArguments(call)))
+
+    def getPrimaryType(self, primary) -> str:
+        """
+        Gets the type of a primary expression.
+
+        :param primary: The primary expression.
+        :type primary: JavaParser.PrimaryContext
+        :return: The type of the expression, or None if it is unknown.
+        :rtype: str
+        """
+        first = primary.children[0]
+        if isinstance(first, JavaParser.LiteralContext):
+            token = first.children[0].symbol
+            if token.type == JavaParser.IntegerLiteral:
+                return "long" if token.text[-1] in "lL" else "int"
+            if token.type == JavaParser.FloatingPointLiteral:
+                return "float" if token.text[-1] in "fF" else "double"
+            return {JavaParser.CharacterLiteral: "char", JavaParser.StringLiteral: "String",
+                    JavaParser.TEXT_BLOCK: "String", JavaParser.BooleanLiteral: "boolean",
+                    JavaParser.NullLiteral: "null"}.get(token.type)
+
+        if isinstance(first, TerminalNode):
+            if first.symbol.text == "(":
+                return self.getExpressionType(primary.children[1])
+            if first.symbol.text == "this":
+                return "Object"
+            if first.symbol.type == JavaParser.Identifier:
+                return self.getVariableType(primary, first.symbol.text)
+
+        if len(primary.children) == 3 and isinstance(primary.children[2], TerminalNode) and \
+                primary.children[2].symbol.text == "class":
+            return "Class"
+
+        return None
+
+    def getLambdaReturnType(self, lambdaExpression) -> str:
+        """
+        Gets the return type of a lambda expression, from the functional
+        interface that is its target type. The target type is known if the
+        lambda expression initializes or is assigned to a variable, is cast,
+        is returned, or is passed to a method declared in the project.
+
+        :param lambdaExpression: The lambda expression.
+        :type lambdaExpression: JavaParser.LambdaExpressionContext
+        :return: The return type, or None if it is unknown.
+        :rtype: str
+        """
+        expression = lambdaExpression.parentCtx
+        parent = expression.parentCtx
+        targetType = None
+
+        if isinstance(parent, JavaParser.VariableInitializerContext):
+            declarator = parent.parentCtx
+            declaration = declarator.parentCtx
+            if isinstance(declaration, JavaParser.VariableDeclaratorsContext):
+                declaration = declaration.parentCtx
+            variableName = declarator.children[0].getText() if isinstance(
+                declarator, JavaParser.VariableDeclaratorContext) else self.getDeclaredName(declarator)
+            targetType = dict(self.getDeclaredVariables(declaration)).get(variableName)
+
+        elif isinstance(parent, JavaParser.ExpressionListContext) and isinstance(parent.parentCtx,
+                                                                                JavaParser.ExpressionContext):
+            call = parent.parentCtx
+            name = self.getCalledName(call)
+            if name is not None:
+                arguments = self.getArguments(call)
+                targetType = self.getParameterType(call, name, len(arguments), arguments.index(expression))
+
+        elif isinstance(parent, JavaParser.ExpressionContext):
+            if isinstance(parent.children[0], TerminalNode) and parent.children[0].symbol.text == "(":
+                targetType = parent.children[1].getText()
+            elif len(parent.children) == 3 and parent.children[2] is expression and \
+                    isinstance(parent.children[1], TerminalNode) and parent.children[1].symbol.text == "=":
+                targetType = self.getExpressionType(parent.children[0])
+
+        elif isinstance(parent, JavaParser.StatementContext) and isinstance(parent.children[0], TerminalNode) and \
+                parent.children[0].symbol.text == "return":
+            targetType = self.getReturnType(parent.children[0])
+
+        return self.getFunctionalReturnType(lambdaExpression, targetType)
+
+    def getReturnType(self, node) -> str:
+        """
+        Gets the type returned by the method or the lambda expression that
+        contains a node.
+
+        :param node: The node, such as a ``return`` keyword.
+        :type node: antlr4.tree.Tree.ParseTree
+        :return: The return type, or None if it is unknown.
+        :rtype: str
+        """
+        current = node.parentCtx
+        while current is not None:
+            if isinstance(current, JavaParser.LambdaExpressionContext):
+                return self.getLambdaReturnType(current)
+            if isinstance(current, self.methodDeclarations):
+                return self.getMethodReturnType(current)
+            if isinstance(current, JavaParser.ConstructorDeclarationContext):
+                return "void"
+            if isinstance(current, self.typeBodies):
+                return None
+            current = current.parentCtx
+
+        return None
+
+    @staticmethod
+    def isCaptured(body, name: str) -> bool:
+        """
+        Checks whether a name is used in a lambda expression or in a class
+        body inside a method body, where the variable with that name must be
+        effectively final.
+
+        :param body: The method body.
+        :type body: antlr4.tree.Tree.ParseTree
+        :param name: The name of the variable.
+        :type name: str
+        :return: True if the name is used in a lambda expression or a class.
+        :rtype: bool
+        """
+        stack = [(body, False)]
+        while len(stack) > 0:
+            node, isInside = stack.pop()
+            if isinstance(node, TerminalNode):
+                if isInside and node.symbol.text == name:
+                    return True
+                continue
+
+            isInside = isInside or isinstance(node, (JavaParser.LambdaBodyContext, JavaParser.ClassBodyContext))
+            stack.extend((child, isInside) for child in node.children or [])
+
+        return False
@@ -0,0 +1,81 @@
+import unittest
+
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.tree.Tree import TerminalNodeImpl
+
+from littledarwin.CompactTree import CompactToken, CompactTree
+from littledarwin.JavaLexer import JavaLexer
+from littledarwin.JavaMutate import JavaMutate
+from littledarwin.JavaParse import JavaParse
+from littledarwin.JavaParser import JavaParser
+
+
+class TestCompactTree(unittest.TestCase):
+    def setUp(self):
+        self.sourceCode = """
+public class Counter {
+    private int count;
+
+    public int next(int step) {
+        count += step;
+        return count > 10 ? -count : count++;
+    }
+
+    public Object wrap() {
+        return new Object() { public String toString() { return "" + count; } };
+    }
+}
+"""
+
+    def parseWithAntlr(self):
+        parser = JavaParser(CommonTokenStream(JavaLexer(InputStream(self.sourceCode))))
+        return parser.compilationUnit()
+
+    @staticmethod
+    def getTokenValues(tree):
+        tokens = list()
+        stack = [tree]
+        while len(stack) > 0:
+            node = stack.pop()
+            if isinstance(node, TerminalNodeImpl):
+                tokens.append(node.symbol)
+            else:
+                tokens.extend([node.start, node.stop])
+                stack.extend(reversed(node.children or []))
+
+        return [(token.type, token.channel, token.start, token.stop, token.line, token.column, token.tokenIndex,
+                 token.text) for token in tokens]
+
+    def test_convert(self):
+        expectedTree = self.parseWithAntlr()
+        expectedString = expectedTree.toStringTree(recog=JavaParser)
+        expectedTokens = self.getTokenValues(expectedTree)
+
+        tree = CompactTree.convert(self.parseWithAntlr())
+        self.assertEqual(tree.toStringTree(recog=JavaParser), expectedString)
+        self.assertEqual(self.getTokenValues(tree), expectedTokens)
+        self.assertIsNone(tree.parser)
+        self.assertIsInstance(tree, JavaParser.CompilationUnitContext)
+        self.assertEqual(type(tree).__name__, "CompilationUnitContext")
+        self.assertFalse(hasattr(tree.start, '__dict__'))
+
+        postfixes = [expression.postfix for expression in JavaParse().seekAllNodes(tree, JavaParser.ExpressionContext)
+                     if expression.postfix is not None]
+        self.assertEqual([postfix.text for postfix in postfixes], ["++"])
+        self.assertIsInstance(postfixes[0], CompactToken)
+
+    def test_parse(self):
+        javaParse = JavaParse()
+        tree = javaParse.parse(self.sourceCode)
+        self.assertIs(type(tree), CompactTree.getCompactClass(JavaParser.CompilationUnitContext))
+        self.assertIs(CompactTree.getCompactClass(type(tree)), type(tree))
+        self.assertEqual(tree.toStringTree(recog=JavaParser), self.parseWithAntlr().toStringTree(recog=JavaParser))
+
+        expectedMutants = JavaMutate(javaParse.parse(self.sourceCode), self.sourceCode, javaParse).gatherMutants()
+        antlrTree = self.parseWithAntlr()
+        javaParse.numerify(antlrTree)
+        self.assertEqual(JavaMutate(antlrTree, self.sourceCode, javaParse).gatherMutants(), expectedMutants)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+# TestCoverageMap is not imported by name, since pytest would collect it as a test class.
+from littledarwin import CoverageReport as coverageReportModule
+from littledarwin.CoverageReport import CoverageReport
+from littledarwin.JavaMutate import JavaMutate
+from littledarwin.JavaParse import JavaParse
+
+
+class TestCoverageReport(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.jacocoReport = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<report name="example">
+    <package name="com/example">
+        <class name="com/example/Factorial" sourcefilename="Factorial.java"/>
+        <sourcefile name="Factorial.java">
+            <line nr="3" mi="0" ci="2" mb="0" cb="0"/>
+            <line nr="4" mi="3" ci="0" mb="2" cb="0"/>
+            <line nr="5" mi="2" ci="0" mb="0" cb="0"/>
+            <line nr="8" mi="0" ci="4" mb="1" cb="1"/>
+        </sourcefile>
+    </package>
+</report>
+"""
+        self.cloverReport = """<?xml version="1.0" encoding="UTF-8"?>
+<coverage generated="0" clover="4.4.1">
+    <project timestamp="0">
+        <package name="com.example">
+            <file name="Factorial.java" path="/home/user/project/src/main/java/com/example/Factorial.java">
+                <line num="3" count="1" type="method"/>
+                <line num="4" truecount="0" falsecount="0" type="cond"/>
+                <line num="5" count="0" type="stmt"/>
+                <line num="8" truecount="2" falsecount="0" type="cond"/>
+            </file>
+        </package>
+    </project>
+</coverage>
+"""
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def writeReport(self, reportText):
+        reportPath = os.path.join(self.tempDir.name, "coverage.xml")
+        with open(reportPath, 'w', encoding="utf-8") as reportFile:
+            reportFile.write(reportText)
+        return reportPath
+
+    def test_isCovered(self):
+        for reportText in [self.jacocoReport, self.cloverReport]:
+            coverageReport = CoverageReport(self.writeReport(reportText))
+            filePath = os.path.join("java", "com", "example", "Factorial.java")
+
+            self.assertEqual(coverageReport.findMatchingFile(filePath), {3: 1 if reportText == self.cloverReport
+                                                                         else 2, 4: 0, 5: 0, 8: 2 if reportText ==
+                                                                         self.cloverReport else 4})
+            self.assertTrue(coverageReport.isCovered(filePath, [(3, 3)]))
+            self.assertFalse(coverageReport.isCovered(filePath, [(4, 4)]))
+            self.assertFalse(coverageReport.isCovered(filePath, [(4, 7)]))
+            self.assertTrue(coverageReport.isCovered(filePath, [(5, 8)]))
+            self.assertTrue(coverageReport.isCovered(filePath, [(4, 4), (8, 8)]))
+
+            # the lines without coverage data, and the files that are not in the report, are covered.
+            self.assertTrue(coverageReport.isCovered(filePath, [(6, 7)]))
+            self.assertTrue(coverageReport.isCovered("java/com/other/Factorial.java", [(4, 4)]))
+            self.assertIsNone(coverageReport.findMatchingFile("Example.java"))
+
+    def test_getCoveringTests(self):
+        reportDirectory = os.path.join(self.tempDir.name, "tests")
+        os.mkdir(reportDirectory)
+        for testName, reportText in [("FactorialTest#testZero", self.jacocoReport),
+                                     ("FactorialTest#testOne", self.jacocoReport.replace('nr="4" mi="3" ci="0"',
+                                                                                         'nr="4" mi="0" ci="3"')),
+                                     ("OtherTest", self.jacocoReport.replace("Factorial.java", "Other.java"))]:
+            with open(os.path.join(reportDirectory, testName + ".xml"), 'w', encoding="utf-8") as reportFile:
+                reportFile.write(reportText)
+
+        testCoverageMap = coverageReportModule.TestCoverageMap(reportDirectory)
+        filePath = "java/com/example/Factorial.java"
+        self.assertEqual(testCoverageMap.testNames, ["FactorialTest#testOne", "FactorialTest#testZero", "OtherTest"])
+        self.assertEqual(testCoverageMap.getCoveringTests(filePath, [(3, 3)]),
+                         ["FactorialTest#testOne", "FactorialTest#testZero", "OtherTest"])
+        self.assertEqual(testCoverageMap.getCoveringTests(filePath, [(4, 4)]), ["FactorialTest#testOne", "OtherTest"])
+        self.assertEqual(testCoverageMap.getCoveringTests(filePath, [(5, 5)]), ["OtherTest"])
+        self.assertEqual(testCoverageMap.getCoveringTests("java/com/example/Other.java", [(5, 5)]),
+                         ["FactorialTest#testOne", "FactorialTest#testZero"])
+
+    def test_unknownFormat(self):
+        with self.assertRaises(ValueError):
+            CoverageReport(self.writeReport("<cobertura/>"))
+
+    def test_getLineSpans(self):
+        sourceCode = "class A {\n    int f(int a) {\n        return a\n            + 1;\n    }\n}\n"
+        javaParse = JavaParse()
+        javaMutate = JavaMutate(javaParse.parse(sourceCode), sourceCode, javaParse)
+        mutants = [mutant for mutant, _ in javaMutate.iterateMutants(["All"])]
+
+        lineSpans = sorted(mutant.getLineSpans()[0] for mutant in mutants)
+        self.assertIn((2, 5), lineSpans)
+        self.assertIn((4, 4), lineSpans)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from antlr4.dfa.DFA import DFA
+
+from littledarwin.DFACache import DFACache
+from littledarwin.JavaParse import JavaParse
+from littledarwin.JavaParser import JavaParser
+
+
+class TestDFACache(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.cacheDirectory = os.path.join(self.tempDir.name, "DFACache")
+        self.resetDFA()
+        self.factorialSourceCode = """
+public class Factorial {
+    public static int factorial(int n) {
+         int result = 1;
+         for(int i = 2; i <= n; i++)
+            result *= i;
+         return n < 0 ? -1 : result;
+    }
+}
+"""
+        self.genericSourceCode = """
+import java.util.*;
+
+public class Registry<T extends Comparable<T>> {
+    private final Map<String, List<T>> entries = new HashMap<>();
+
+    public void add(String key, T value) {
+        entries.computeIfAbsent(key, k -> new ArrayList<>()).add(value);
+    }
+}
+"""
+
+    def tearDown(self):
+        self.resetDFA()
+        self.tempDir.cleanup()
+
+    @staticmethod
+    def resetDFA():
+        """
+        Starts the DFA of the parser and the record of the restored caches
+        from scratch, as in a new process.
+        """
+        JavaParser.decisionsToDFA[:] = [DFA(decisionState, decision)
+                                        for decision, decisionState in enumerate(JavaParser.atn.decisionToState)]
+        DFACache._stateCounts.clear()
+
+    def parse(self, sourceCode):
+        return JavaParse(dfaCache=DFACache(self.cacheDirectory)).parse(sourceCode).toStringTree(recog=JavaParser)
+
+    def test_storeAndRestore(self):
+        expectedTree = self.parse(self.factorialSourceCode)
+        stateCount = DFACache.getStateCount()
+        self.assertGreater(stateCount, 0)
+        DFACache(self.cacheDirectory).store()
+        self.assertTrue(os.path.isfile(os.path.join(self.cacheDirectory, DFACache.cacheFileName)))
+
+        self.resetDFA()
+        DFACache(self.cacheDirectory).load()
+        self.assertEqual(DFACache.getStateCount(), stateCount)
+        self.assertEqual(self.parse(self.factorialSourceCode), expectedTree)
+        self.assertEqual(DFACache.getStateCount(), stateCount)
+
+    def test_storeMergesOtherProcesses(self):
+        self.parse(self.factorialSourceCode)
+        factorialStateCount = DFACache.getStateCount()
+        DFACache(self.cacheDirectory).store()
+
+        # another process, which has not restored the cache, stores the states of another file.
+        self.resetDFA()
+        DFACache._stateCounts[os.path.join(self.cacheDirectory, DFACache.cacheFileName)] = 0
+        self.parse(self.genericSourceCode)
+        genericStateCount = DFACache.getStateCount()
+        DFACache(self.cacheDirectory).store()
+        self.assertGreater(DFACache.getStateCount(), max(factorialStateCount, genericStateCount))
+
+        mergedStateCount = DFACache.getStateCount()
+        self.resetDFA()
+        DFACache(self.cacheDirectory).load()
+        self.assertEqual(DFACache.getStateCount(), mergedStateCount)
+
+    def test_mergeWorkers(self):
+        # two workers of a pool store the states of different files, each in a file of its own.
+        cache = DFACache(self.cacheDirectory)
+        self.parse(self.factorialSourceCode)
+        factorialStateCount = DFACache.getStateCount()
+        cache.storeWorker()
+        os.replace(cache.getWorkerCachePath(os.getpid()), cache.getWorkerCachePath(os.getpid() + 1))
+
+        self.resetDFA()
+        self.parse(self.genericSourceCode)
+        genericStateCount = DFACache.getStateCount()
+        cache.storeWorker()
+        self.assertFalse(os.path.exists(cache.cachePath))
+
+        # the parent merges the states of both workers after joining the pool.
+        self.resetDFA()
+        cache.mergeWorkers()
+        mergedStateCount = DFACache.getStateCount()
+        self.assertGreater(mergedStateCount, max(factorialStateCount, genericStateCount))
+        self.assertEqual(os.listdir(self.cacheDirectory), [DFACache.cacheFileName])
+
+        self.resetDFA()
+        DFACache(self.cacheDirectory).load()
+        self.assertEqual(DFACache.getStateCount(), mergedStateCount)
+
+    def test_storeError(self):
+        self.parse(self.factorialSourceCode)
+        with mock.patch("os.replace", side_effect=PermissionError("cache file in use")):
+            DFACache(self.cacheDirectory).store()
+
+        self.assertEqual(os.listdir(self.cacheDirectory), [])
+
+    def test_fingerprintMismatch(self):
+        self.parse(self.factorialSourceCode)
+        DFACache(self.cacheDirectory).store()
+
+        self.resetDFA()
+        fingerprint = DFACache.fingerprint()
+        try:
+            DFACache._fingerprint = "another grammar"
+            self.assertFalse(DFACache(self.cacheDirectory).read())
+        finally:
+            DFACache._fingerprint = fingerprint
+        self.assertEqual(DFACache.getStateCount(), 0)
+
+        with open(os.path.join(self.cacheDirectory, DFACache.cacheFileName), 'wb') as cacheFile:
+            cacheFile.write(b"not a cache")
+        self.assertFalse(DFACache(self.cacheDirectory).read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.error.ErrorListener import ErrorListener
+
+from littledarwin.FastJavaLexer import FastJavaLexer, FastJavaLexerError
+from littledarwin.JavaLexer import JavaLexer
+from littledarwin.JavaParse import JavaParse
+from littledarwin.JavaParser import JavaParser
+
+
+class CountingErrorListener(ErrorListener):
+    def __init__(self):
+        self.errorCount = 0
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.errorCount += 1
+
+
+class TestFastJavaLexer(unittest.TestCase):
+    def setUp(self):
+        self.sourceCode = """package p;
+
+public sealed class Sample permits A, B {
+    /* block
+       comment */
+    static final long L = 0x7fff_ffffL + 0b1010 + 017 + 0 + 1_000;
+    static final double D = 1.5e-3 + .5f + 3. + 2e10D + 0x1.8p1 + 1f;
+    String s = "tab\\t\\u0041\\101 \\"quoted\\"";
+    char c = '\\n', d = 'x', e = '\\'';
+    String t = \"\"\"
+        text "block"
+        \"\"\";
+    int ωmega = 1, Δx = 2, _x$ = 3; // trailing comment
+    non-sealed class N {}
+
+    boolean m(int a, int... b) {
+        a >>>= 2; a <<= 1; a >>= 1;
+        Runnable r = () -> System.out::println;
+        return a >= 0 && a != 1 || b.length > 0 ? true : false == (null == null);
+    }
+}
+"""
+
+    @staticmethod
+    def getTokenValues(tokens):
+        return [(token.type, token.channel, token.start, token.stop, token.line, token.column, token.text)
+                for token in tokens]
+
+    def getJavaLexerTokens(self, sourceCode):
+        lexer = JavaLexer(InputStream(sourceCode))
+        lexer.removeErrorListeners()
+        errorListener = CountingErrorListener()
+        lexer.addErrorListener(errorListener)
+        tokenStream = CommonTokenStream(lexer)
+        tokenStream.fill()
+        return self.getTokenValues(tokenStream.tokens), errorListener.errorCount
+
+    def test_sameTokensAsJavaLexer(self):
+        expectedTokens, errorCount = self.getJavaLexerTokens(self.sourceCode)
+        self.assertEqual(errorCount, 0)
+        self.assertEqual(self.getTokenValues(FastJavaLexer(self.sourceCode).getAllTokens()), expectedTokens)
+
+    def test_sameTokensOnNumbers(self):
+        for number in ["0", "00", "08", "0_7", "1__2", "1_", "0x", "0xAp", "1e", "1.e2", "1..2", "0b12", "09.5",
+                       "0x1p-2f", "1.2.3", "5L", "0L.5", "3e+4d", ".5.5", "0_x1", "1.f"]:
+            expectedTokens, errorCount = self.getJavaLexerTokens(number)
+            if errorCount > 0:
+                self.assertRaises(FastJavaLexerError, FastJavaLexer(number).getAllTokens)
+            else:
+                self.assertEqual(self.getTokenValues(FastJavaLexer(number).getAllTokens()), expectedTokens, number)
+
+    def test_invalidInput(self):
+        for sourceCode in ["int a = #1;", "String s = \"unterminated;", "char c = 'ab';", " "]:
+            expectedTokens, errorCount = self.getJavaLexerTokens(sourceCode)
+            self.assertGreater(errorCount, 0)
+            self.assertRaises(FastJavaLexerError, FastJavaLexer(sourceCode).getAllTokens)
+
+    def test_parseWithFallback(self):
+        fastJavaParse = JavaParse(lexer="fast")
+        antlrJavaParse = JavaParse(lexer="antlr")
+
+        fastTree = fastJavaParse.parse(self.sourceCode)
+        antlrTree = antlrJavaParse.parse(self.sourceCode)
+        self.assertEqual(fastTree.toStringTree(recog=JavaParser), antlrTree.toStringTree(recog=JavaParser))
+        self.assertEqual(fastJavaParse.lexerFallbackCount, 0)
+
+        # a non-breaking space is not accepted by the fast lexer, nor by the generated lexer, which skips it.
+        sourceCode = self.sourceCode.replace("public sealed", "public sealed")
+        fastJavaParse.parse(sourceCode)
+        self.assertEqual(fastJavaParse.lexerFallbackCount, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import re
 import unittest
 
 from littledarwin.JavaParse import JavaParse
@@ -153,6 +154,27 @@ public class NullOperators {
         self.assertIn("a != b", str(mutator.mutants[4]))
         self.assertIn("a == b", str(mutator.mutants[5]))
 
+    def test_RelationalOperatorReplacementSufficient(self):
+        sourceCode = """
+public class RelationalOperator {
+    public boolean relational(int a, int b, String s, boolean p) {
+        if (a > b && s != null) return p == a < b;
+        return a == b;
+    }
+}
+"""
+        tree = self.javaParse.parse(sourceCode)
+        mutator = RelationalOperatorReplacementSufficient(tree, sourceCode, self.javaParse)
+        mutatedCodes = [mutant.mutatedCode for mutant in mutator.mutants]
+        self.assertEqual(len(mutator.mutants), 13)
+        for mutatedText in ["a >= b && s != null", "a != b && s != null", "false && s != null",
+                            "a > b && false", "a > b && true", "p == a <= b", "p == (a != b)", "p == false",
+                            "return a <= b", "return a >= b", "return false", "return true;"]:
+            self.assertTrue(any(mutatedText in mutatedCode for mutatedCode in mutatedCodes), mutatedText)
+
+        # "p == a < b" and "s != null" are not numeric equalities: 4 and 1 replacements are subsumed for the others.
+        self.assertEqual(mutator.getSubsumedReplacementCount(), 4 * 3 + 1 * 2)
+
     def test_ConditionalOperatorReplacement(self):
         sourceCode = """
 public class ConditionalOperator {
@@ -168,6 +190,27 @@ public class ConditionalOperator {
         self.assertEqual(replacements.count('||'), 1)
         self.assertEqual(replacements.count('&&'), 1)
 
+    def test_ConditionalOperatorReplacementSufficient(self):
+        sourceCode = """
+public class ConditionalOperator {
+    public boolean conditional(boolean a, boolean b) {
+        return a && b | a;
+    }
+}
+"""
+        tree = self.javaParse.parse(sourceCode)
+        mutator = ConditionalOperatorReplacementSufficient(tree, sourceCode, self.javaParse)
+        replacements = [m.mutationList[0].replacementText for m in mutator.mutants]
+        self.assertEqual(replacements, ["(a) == (b | a)", "a", "b | a", "false"])
+        self.assertIn("return (a) == (b | a);", str(mutator.mutants[0]))
+        self.assertEqual(mutator.getSubsumedReplacementCount(), 3)
+
+        javaMutate = JavaMutate(tree, sourceCode, self.javaParse)
+        mutantTexts, mutantTypes = javaMutate.gatherMutants(["Sufficient"])
+        self.assertEqual(mutantTypes["ConditionalOperatorReplacementSufficient"], 4)
+        self.assertNotIn("ConditionalOperatorReplacement", mutantTypes)
+        self.assertEqual(javaMutate.subsumedReplacementCount, 3)
+
     def test_LogicalOperatorReplacement(self):
         tree = self.javaParse.parse(self.traditionalOperatorsSourceCode)
         mutator = LogicalOperatorReplacement(tree, self.traditionalOperatorsSourceCode, self.javaParse)
@@ -252,6 +295,63 @@ public class NullifyInputVariable {
         self.assertEqual(len(mutator.mutants), 1)
         self.assertIn("a = null;", str(mutator.mutants[0]))
 
+    def test_NullifyInputVariable_unassignable(self):
+        sourceCode = """
+public class NullifyInputVariable {
+    public void nullifyInputVariable(String names[], final Object a, Object b, int[] c, int d) {
+        Runnable r = () -> System.out.println(b);
+    }
+}
+"""
+        tree = self.javaParse.parse(sourceCode)
+        mutator = NullifyInputVariable(tree, sourceCode, self.javaParse)
+        self.assertEqual([mutant.mutationList[0].replacementText for mutant in mutator.mutants],
+                         ["{ names = null;", "{ c = null;"])
+
+    def test_NullifyReturnValue_lambda(self):
+        sourceCode = """
+import java.util.Comparator;
+import java.util.function.*;
+
+public class Lambdas {
+    interface Namer { String name(int index); }
+
+    public int[] indices(int count) {
+        Predicate<String> isEmpty = s -> { return s.isEmpty(); };
+        Comparator<String> byLength = (x, y) -> { return x.length() - y.length(); };
+        Namer namer = index -> { return "item" + index; };
+        Supplier<Object> supplier = () -> { return "a" + count; };
+        return new int[count];
+    }
+}
+"""
+        tree = self.javaParse.parse(sourceCode)
+        mutator = NullifyReturnValue(tree, sourceCode, self.javaParse)
+        self.assertEqual(sorted(mutant.mutationList[0].lineNumber for mutant in mutator.mutants), [11, 12, 13])
+
+    def test_RemoveMethod_arrays(self):
+        sourceCode = """
+import java.util.List;
+
+public class Arrays<T> {
+    public int[] numbers(int count) {
+        return new int[count + 1];
+    }
+
+    public T[] elements(int count) {
+        return (T[]) new Object[count + 1];
+    }
+
+    public List<String>[] lists(int count) {
+        return new List[count + 1];
+    }
+}
+"""
+        tree = self.javaParse.parse(sourceCode)
+        mutator = RemoveMethod(tree, sourceCode, self.javaParse)
+        self.assertEqual(sorted(mutant.mutationList[0].replacementText for mutant in mutator.mutants),
+                         ["{\n    return new int[] {};\n}\n", "{\n    return null;\n}\n",
+                          "{\n    return null;\n}\n"])
 
     def test_RemoveMethod_smart_pattern(self):
         sourceCode = '''
@@ -376,6 +476,255 @@ class Injected {}
         mutator = RemoveMethod(tree, sourceCode, self.javaParse)
         self.assertEqual(len(mutator.mutants), 1)
 
+    def test_methodScope(self):
+        methodScope = {"removeNullCheck", "nullifyReturnValue"}
+        tree = self.javaParse.parse(self.nullOperatorsSourceCode)
+        javaMutate = JavaMutate(tree, self.nullOperatorsSourceCode, self.javaParse)
+        mutantTexts, mutantTypes = javaMutate.gatherMutants(["All"])
+        expectedMutantTexts = [mutantText for mutant, mutantText in zip(javaMutate.mutants, mutantTexts)
+                               if self.javaParse.getMethodNameForNode(tree, mutant.mutationList[0].nodeID).split(
+                                   ".")[1].split("(")[0] in methodScope]
+
+        scopedTree = self.javaParse.parse(self.nullOperatorsSourceCode, methodScope)
+        self.assertEqual(len(scopedTree.deferredBlocks), 2)
+        scopedJavaMutate = JavaMutate(scopedTree, self.nullOperatorsSourceCode, self.javaParse, methodScope=methodScope)
+        scopedMutantTexts, scopedMutantTypes = scopedJavaMutate.gatherMutants(["All"])
+
+        self.assertGreater(len(scopedMutantTexts), 0)
+        self.assertLess(len(scopedMutantTexts), len(mutantTexts))
+        # the nodes are numbered differently in the smaller tree.
+        self.assertEqual([re.sub(r"mutated node: \d+", "", mutantText) for mutantText in scopedMutantTexts],
+                         [re.sub(r"mutated node: \d+", "", mutantText) for mutantText in expectedMutantTexts])
+        self.assertEqual(scopedJavaMutate.inMethodLines, javaMutate.inMethodLines)
+
+    def test_Mutant(self):
+        sourceCode = "int a = b + c;\nint d = e - f;\n"
+        plus = Mutation(startPos=10, endPos=10, lineNumber=1, nodeID=1, mutatorType="A", replacementText="-")
+        minus = Mutation(startPos=25, endPos=25, lineNumber=2, nodeID=2, mutatorType="A", replacementText="+")
+        statement = Mutation(startPos=0, endPos=13, lineNumber=1, nodeID=3, mutatorType="B", replacementText=";")
+
+        mutant = Mutant(mutantID=1, mutationList=[minus, plus], sourceCode=sourceCode)
+        self.assertFalse(hasattr(mutant, "__dict__"))
+        self.assertEqual(mutant.mutatedCode, "int a = b - c;\nint d = e + f;\n")
+        self.assertEqual(mutant.mutatedCode, mutant.mutateCode())
+        self.assertEqual("".join(mutant.getTextSegments()), str(mutant))
+        self.assertTrue(str(mutant).startswith(mutant.stub))
+
+        # overlapping mutations are applied one after the other.
+        overlappingMutant = Mutant(mutantID=2, mutationList=[statement, plus], sourceCode=sourceCode)
+        self.assertEqual(overlappingMutant.mutatedCode, overlappingMutant.mutateCode())
+
+    def test_LineIndex(self):
+        sourceCode = "int a = b + c;\r\nint d = e - f;\rint g = h;\n\nint i = j;\n"
+        lineIndex = LineIndex(sourceCode)
+        for lineNumber, line in enumerate(sourceCode.splitlines(), start=1):
+            self.assertEqual(lineIndex.getLine(lineNumber), line)
+
+        mutations = [Mutation(startPos=10, endPos=10, lineNumber=1, nodeID=1, mutatorType="A", replacementText="-"),
+                     Mutation(startPos=16, endPos=29, lineNumber=2, nodeID=2, mutatorType="B", replacementText=";"),
+                     Mutation(startPos=27, endPos=43, lineNumber=2, nodeID=3, mutatorType="C", replacementText="\n"),
+                     Mutation(startPos=31, endPos=31, lineNumber=3, nodeID=4, mutatorType="D", replacementText="\n")]
+        for mutation in mutations:
+            mutatedLines = mutation.applyMutation(sourceCode).splitlines()
+            for lineNumber in range(1, len(mutatedLines) + 1):
+                self.assertEqual(lineIndex.getMutatedLine(mutation, lineNumber), mutatedLines[lineNumber - 1])
+
+        self.assertIs(LineIndex.getLineIndex(sourceCode), LineIndex.getLineIndex(sourceCode))
+
+        # the line numbers of positions only count the line breaks of Java.
+        lineIndex = LineIndex("a\r\nb\x0cc\rd\ne")
+        self.assertEqual([lineIndex.getLineNumber(position) for position in range(10)],
+                         [1, 1, 1, 2, 2, 2, 2, 3, 3, 4])
+
+    def test_composeMutants(self):
+        sourceCode = "int a = b + c;\nint d = e - f;\n"
+        plus = Mutation(startPos=10, endPos=10, lineNumber=1, nodeID=1, mutatorType="A", replacementText="-")
+        minus = Mutation(startPos=25, endPos=25, lineNumber=2, nodeID=2, mutatorType="A", replacementText="+")
+        statement = Mutation(startPos=0, endPos=13, lineNumber=1, nodeID=3, mutatorType="B", replacementText=";")
+
+        composedMutant = Mutant.compose([Mutant(mutantID=2, mutationList=[minus], sourceCode=sourceCode),
+                                         Mutant(mutantID=3, mutationList=[plus], sourceCode=sourceCode)])
+        self.assertEqual(composedMutant.mutationList, [plus, minus])
+        self.assertEqual(composedMutant.mutatedCode, "int a = b - c;\nint d = e + f;\n")
+        self.assertIsNone(Mutant.compose([Mutant(mutantID=1, mutationList=[statement], sourceCode=sourceCode),
+                                          Mutant(mutantID=3, mutationList=[plus], sourceCode=sourceCode)]))
+
+        for higherOrder in [2, 5, 10]:
+            javaMutate = JavaMutate(self.javaParse.parse(self.traditionalOperatorsSourceCode),
+                                    self.traditionalOperatorsSourceCode, self.javaParse)
+            javaMutate.instantiateMutationOperators(["All"])
+            firstOrderMutations = [mutant.mutationList[0] for mO in javaMutate.mutationOperators for mutant in
+                                   mO.mutants]
+            higherOrderMutants = list(javaMutate.combineMutants(higherOrder, ["All"]))
+
+            self.assertCountEqual([mutation for mutant in higherOrderMutants for mutation in mutant.mutationList],
+                                  firstOrderMutations)
+            for mutant in higherOrderMutants:
+                self.assertLessEqual(len(mutant.mutationList), higherOrder)
+                for mutation, nextMutation in zip(mutant.mutationList, mutant.mutationList[1:]):
+                    self.assertLess(mutation.endPos, nextMutation.startPos)
+
+    def test_iterateMutants(self):
+        for metaTypes in [["Traditional"], ["All"]]:
+            javaMutate = JavaMutate(self.javaParse.parse(self.traditionalOperatorsSourceCode),
+                                    self.traditionalOperatorsSourceCode, self.javaParse)
+            expectedTexts, expectedTypeCount = javaMutate.gatherMutants(metaTypes)
+
+            javaMutate = JavaMutate(self.javaParse.parse(self.traditionalOperatorsSourceCode),
+                                    self.traditionalOperatorsSourceCode, self.javaParse)
+            mutants = javaMutate.iterateMutants(metaTypes)
+            mutant, mutantText = next(mutants)
+            self.assertEqual(javaMutate.mutantTypeCount, expectedTypeCount)
+            self.assertEqual(mutantText, str(mutant))
+            self.assertEqual([mutantText] + [text for _, text in mutants], expectedTexts)
+            self.assertEqual(sum(javaMutate.mutantsPerLine.values()), len(expectedTexts))
+
+        javaMutate = JavaMutate(self.javaParse.parse(self.traditionalOperatorsSourceCode),
+                                self.traditionalOperatorsSourceCode, self.javaParse)
+        higherOrderMutants = list(javaMutate.iterateMutants(["Traditional"], 2))
+        self.assertEqual(javaMutate.mutantTypeCount, {"Higher-Order": len(higherOrderMutants)})
+        for methodName in javaMutate.mutantsPerMethod.keys():
+            self.assertIsInstance(methodName, str)
+
+    def test_MutantSchemata(self):
+        sourceCode = """class A {
+    int f = 1 + 2;
+    A(int a) {
+        f = a * 2;
+    }
+    int g(int a) {
+        if (a > 0)
+            a += 1;
+        return a;
+    }
+}
+"""
+        tree = self.javaParse.parse(sourceCode)
+        javaMutate = JavaMutate(tree, sourceCode, self.javaParse)
+        mutantSchemata = MutantSchemata(tree, sourceCode, self.javaParse, "S")
+        # the mutants are numbered by position, since the order of the mutation operators is not fixed.
+        mutants = sorted((mutant for mutant, _ in javaMutate.iterateMutants(["Traditional", "Method"])),
+                         key=lambda mutant: (mutant.mutationList[0].startPos, mutant.mutationList[0].replacementText))
+        addedMutants = [mutantSchemata.addMutant(mutant, mutantID) for mutantID, mutant in enumerate(mutants, start=1)]
+
+        # the constant expression of the field initializer and the constructor body cannot be guarded.
+        self.assertEqual(addedMutants, [False, False, True, True, True, True, True])
+        self.assertEqual(len(mutantSchemata), 5)
+
+        schemataCode = "".join(mutantSchemata.getTextSegments())
+        self.assertIn("    int f = 1 + 2;\n", schemataCode)
+        self.assertIn("f = (S.MUTANT == 3 ? (a / 2) : (a * 2));", schemataCode)
+        self.assertIn("int g(int a) { if (S.MUTANT == 4) {", schemataCode)
+        self.assertIn("} else if (S.MUTANT == 5) {", schemataCode)
+        self.assertIn("if ((S.MUTANT == 6 ? (a <= 0) : (a > 0)))", schemataCode)
+        self.assertIn("{ if (S.MUTANT == 7) { a -= 1; } else { a += 1; } }", schemataCode)
+        self.assertIn("final class S {", schemataCode)
+        self.javaParse.parse(schemataCode)
+
+    def test_MutantSchemataFieldInitializers(self):
+        sourceCode = """class A {
+    static final int B = 2;
+    static final int C = B * 3;
+    int d = C - B;
+    int h(int x) {
+        switch (x) {
+            case C:
+                return x * 2;
+            default:
+                return 0;
+        }
+    }
+}
+"""
+        tree = self.javaParse.parse(sourceCode)
+        javaMutate = JavaMutate(tree, sourceCode, self.javaParse)
+        mutantSchemata = MutantSchemata(tree, sourceCode, self.javaParse, "S")
+        mutants = sorted((mutant for mutant, _ in javaMutate.iterateMutants(["Traditional"])),
+                         key=lambda mutant: (mutant.mutationList[0].startPos, mutant.mutationList[0].replacementText))
+        addedMutants = [mutantSchemata.addMutant(mutant, mutantID) for mutantID, mutant in enumerate(mutants, start=1)]
+
+        # the field initializers that refer to other fields are not guarded, so that C stays a constant of the
+        # case label.
+        self.assertEqual(addedMutants, [False, False, True])
+        schemataCode = "".join(mutantSchemata.getTextSegments())
+        self.assertIn("    static final int C = B * 3;\n    int d = C - B;\n", schemataCode)
+        self.assertIn("            case C:\n                return (S.MUTANT == 3 ? (x / 2) : (x * 2));", schemataCode)
+        self.javaParse.parse(schemataCode)
+
+    def test_aggregateReport(self):
+        sourceCode = "class A {\n\tint f(int a) {\n\t\treturn a\t+ 1;\n\t}\n}\n"
+        javaMutate = JavaMutate(self.javaParse.parse(sourceCode), sourceCode, self.javaParse)
+        javaMutate.gatherMutants(["Traditional"])
+        report = javaMutate.aggregateReport("0.0")
+
+        self.assertEqual(report, "".join(javaMutate.getAggregateReportSegments("0.0")))
+        self.assertTrue(report.endswith("Report generated by LittleDarwin 0.0 </p></footer></body></html>"))
+        self.assertEqual(report[report.index('<pre class="code">') + 18:report.index('</pre>')],
+                         '<span class="outsideLine"><i>0001</i> class A {                           \n</span>'
+                         '<span class="methodLine"><i>0002</i>         int f(int a) {              \n</span>'
+                         '<span class="methodLine"><i>0003</i>                 return a        '
+                         '<span class="ArithmeticOperatorReplacementBinary tooltip"><span class="tooltiptext">'
+                         'Mutated Text: - \nMutation Operator Type: ArithmeticOperatorReplacementBinary \n'
+                         'Node ID: 33</span>+</span> 1;\n</span>'
+                         '<span class="methodLine"><i>0004</i>         }                           \n</span>'
+                         '<span class="outsideLine"><i>0005</i> }                                   \n</span>'
+                         '<span class="outsideLine"><i>0006</i>                                     ')
+
+    def test_MutationDispatcher(self):
+        tree = self.javaParse.parse(self.traditionalOperatorsSourceCode)
+        operatorClasses = [ArithmeticOperatorReplacementBinary, RelationalOperatorReplacement,
+                           ArithmeticOperatorReplacementShortcut, ShiftOperatorReplacement, RemoveMethod]
+        dispatcher = MutationDispatcher(tree, self.javaParse, operatorClasses)
+
+        expressions = self.javaParse.seekAllNodes(tree, JavaParser.ExpressionContext)
+        for operatorClass in operatorClasses[:-1]:
+            self.assertEqual(dispatcher.getNodes(operatorClass),
+                             [expression for expression in expressions if
+                              MutationDispatcher.getRoutingToken(expression) in operatorClass.candidateTokens])
+        self.assertEqual(dispatcher.getNodes(RemoveMethod),
+                         self.javaParse.seekAllNodes(tree, JavaParser.MethodBodyContext) +
+                         self.javaParse.seekAllNodes(tree, JavaParser.ConstructorBodyContext))
+
+        # the operators find the same mutants with the shared dispatcher as on their own.
+        for sourceCode in [self.traditionalOperatorsSourceCode, self.nullOperatorsSourceCode]:
+            for metaTypes in [["Traditional"], ["All"]]:
+                javaMutate = JavaMutate(self.javaParse.parse(sourceCode), sourceCode, self.javaParse)
+                javaMutate.instantiateMutationOperators(metaTypes)
+                for mO in javaMutate.mutationOperators:
+                    expectedMutants = type(mO)(self.javaParse.parse(sourceCode), sourceCode, self.javaParse).mutants
+                    self.assertEqual([str(mutant) for mutant in mO.mutants],
+                                     [str(mutant) for mutant in expectedMutants])
+
+    def test_hasMutationCandidates(self):
+        for sourceCode in [self.factorialSourceCode, self.traditionalOperatorsSourceCode,
+                           self.nullOperatorsSourceCode]:
+            for metaTypes in [["Traditional"], ["Null"], ["Method"], ["All"]]:
+                mutantTexts, mutantTypes = JavaMutate(self.javaParse.parse(sourceCode), sourceCode,
+                                                      self.javaParse).gatherMutants(metaTypes)
+                if len(mutantTexts) > 0:
+                    self.assertTrue(JavaMutate.hasMutationCandidates(sourceCode, metaTypes))
+
+        interfaceSourceCode = """
+public interface Shape {
+    // the area is width * height, or -1 if unknown.
+    double area(Object unit);
+    String NAME = "a+b";
+}
+"""
+        for metaTypes in [["Traditional"], ["Null"], ["Method"], ["All"]]:
+            self.assertFalse(JavaMutate.hasMutationCandidates(interfaceSourceCode, metaTypes))
+
+        self.assertTrue(JavaMutate.hasMutationCandidates(self.factorialSourceCode, ["Method"], {"factorial"}))
+        self.assertFalse(JavaMutate.hasMutationCandidates(self.factorialSourceCode, ["Method"], {"fibonacci"}))
+        self.assertFalse(JavaMutate.hasMutationCandidates("class Empty { void reset() { } }", ["Null"]))
+        self.assertTrue(JavaMutate.hasMutationCandidates("class Setter { void set(Object o) { } }", ["Null"]))
+        self.assertTrue(JavaMutate.hasMutationCandidates("class Invalid { # }", ["Traditional"]))
+
+    def test_usesSymbolIndex(self):
+        self.assertFalse(JavaMutate.usesSymbolIndex(["Traditional"]))
+        for metaTypes in [["Null"], ["Method"], ["Sufficient"], ["All"]]:
+            self.assertTrue(JavaMutate.usesSymbolIndex(metaTypes))
+
 
 if __name__ == '__main__':
     unittest.main()
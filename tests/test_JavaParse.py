@@ -2,8 +2,11 @@ import base64
 import bz2
 import unittest
 
-from littledarwin.JavaParse import JavaParse
+from littledarwin.JavaParse import FileMetrics, JavaParse
+from littledarwin.JavaParser import JavaParser
+from antlr4 import ParserRuleContext
 from antlr4.error.Errors import ParseCancellationException
+from antlr4.tree.Tree import TerminalNodeImpl
 
 
 
@@ -1140,6 +1143,24 @@ public class SyntaxError {
     def test_parseUnderscore(self):
         self.assertRaises(ParseCancellationException, self.javaParse.parse, "int _ = 0;")
 
+    def test_predictionModesProduceSameTree(self):
+        for sourceCode in [self.factorialSourceCode, self.java8SourceCode, self.java17SourceCode]:
+            llTree = JavaParse(predictionMode="ll").parse(sourceCode)
+            autoJavaParse = JavaParse(predictionMode="auto")
+            autoTree = autoJavaParse.parse(sourceCode)
+
+            self.assertEqual(llTree.toStringTree(recog=JavaParser), autoTree.toStringTree(recog=JavaParser))
+            self.assertEqual(autoJavaParse.fallbackCount, 0)
+
+    def test_predictionFallback(self):
+        autoJavaParse = JavaParse(predictionMode="auto")
+        self.assertRaises(ParseCancellationException, autoJavaParse.parse, "int _ = 0;")
+        self.assertEqual(autoJavaParse.fallbackCount, 1)
+
+        sllJavaParse = JavaParse(predictionMode="sll")
+        self.assertRaises(ParseCancellationException, sllJavaParse.parse, "int _ = 0;")
+        self.assertEqual(sllJavaParse.fallbackCount, 0)
+
     ## Too slow
     # def test_parseManyStrings(self):
     #     parsedTree = self.javaParse.parse(self.manyStringsSourceCode)
@@ -1155,6 +1176,30 @@ public class SyntaxError {
         self.assertIn('factorial', methodName)
         self.assertEqual("***not in a method***", self.javaParse.getMethodNameForNode(parsedTree, 3))
 
+    def test_getMethodNameForOffset(self):
+        sourceCode = """
+class Outer {
+    Outer(int a) { a = a + 1; }
+    void run(String s) {
+        class Local {
+            Local() { int b = 2; }
+        }
+        int c = 3;
+    }
+    int d = 4;
+}
+"""
+        parsedTree = self.javaParse.parse(sourceCode)
+
+        def methodNameAt(text):
+            return self.javaParse.getMethodNameForOffset(parsedTree, sourceCode.index(text))
+
+        self.assertEqual(methodNameAt("a + 1"), "Outer.Outer( int a )")
+        self.assertEqual(methodNameAt("c = 3"), "Outer.run( String s )")
+        # the nearest method declaration is preferred over the nearest constructor declaration.
+        self.assertEqual(methodNameAt("b = 2"), "Local.run( String s )")
+        self.assertEqual(methodNameAt("d = 4"), "***not in a method***")
+
     def test_getCyclomaticComplexity(self):
         parsedTree = self.javaParse.parse(self.factorialSourceCode)
         cyclomaticComplexityDict = self.javaParse.getCyclomaticComplexityAllMethods(parsedTree)
@@ -1169,6 +1214,43 @@ public class SyntaxError {
         self.assertEqual(cyclomaticComplexityDict[keyMain], 2)
         self.assertEqual(cyclomaticComplexityDict[keyFactorial], 2)
 
+    def test_getFileMetrics(self):
+        parsedTree = self.javaParse.parse(self.factorialSourceCode)
+        fileMetrics = self.javaParse.getFileMetrics(parsedTree)
+
+        self.assertIsInstance(fileMetrics, FileMetrics)
+        self.assertIs(self.javaParse.getFileMetrics(parsedTree), fileMetrics)
+        self.assertEqual(list(fileMetrics.inMethodLines), [3, 4, 5, 6, 7, 9, 10, 11, 12, 13, 14])
+        self.assertEqual(dict(fileMetrics.cyclomaticComplexityPerMethod),
+                         self.javaParse.getCyclomaticComplexityAllMethods(parsedTree))
+        self.assertEqual(dict(fileMetrics.linesOfCodePerMethod), {"Factorial.main( String [ ] args )": 5,
+                                                                  "Factorial.factorial( int n )": 6})
+        self.assertEqual(dict(fileMetrics.methodRanges), self.javaParse.getMethodRanges(parsedTree))
+        self.assertRaises(AttributeError, setattr, fileMetrics, "inMethodLines", ())
+
+    def test_parseWithMethodScope(self):
+        sourceCode = self.factorialSourceCode.replace(
+            "int result = 1;", "int result = new Object() { int one() { return 1; } }.one();")
+        fullTree = self.javaParse.parse(sourceCode)
+
+        lazyTree = self.javaParse.parse(sourceCode, methodScope={"main"})
+        self.assertEqual(len(lazyTree.deferredBlocks), 0)
+        self.assertEqual(lazyTree.toStringTree(recog=JavaParser), fullTree.toStringTree(recog=JavaParser))
+
+        # the body of factorial declares an anonymous class, so it is parsed to calculate the metrics.
+        lazyTree = self.javaParse.parse(self.factorialSourceCode, methodScope={"main"})
+        self.assertEqual([self.javaParse.getSimpleMethodName(block.parentCtx.parentCtx)
+                          for block in lazyTree.deferredBlocks], ["factorial"])
+        self.assertEqual(self.javaParse.seekAllNodes(lazyTree.deferredBlocks[0], TerminalNodeImpl)[0].getText(), "}")
+        self.assertEqual(self.javaParse.getFileMetrics(lazyTree),
+                         self.javaParse.getFileMetrics(self.javaParse.parse(self.factorialSourceCode)))
+
+        self.javaParse.expandMethodBodies(lazyTree)
+        self.assertEqual(len(lazyTree.deferredBlocks), 0)
+        fullTree = self.javaParse.parse(self.factorialSourceCode)
+        self.assertEqual(lazyTree.toStringTree(recog=JavaParser), fullTree.toStringTree(recog=JavaParser))
+        self.assertEqual(len(lazyTree.nodeTable), len(fullTree.nodeTable))
+
     def test_getMethodRanges(self):
         parsedTree = self.javaParse.parse(self.factorialSourceCode)
         methodRanges = self.javaParse.getMethodRanges(parsedTree)
@@ -1204,6 +1286,51 @@ public class SyntaxError {
             self.assertTrue(hasattr(node, 'nodeIndex'))
             nodeStack.extend(getattr(node, 'children', []))
 
+    def test_nodeTable(self):
+        tree = self.javaParse.parse(self.factorialSourceCode)
+        nodeTable = tree.nodeTable
+
+        nodeStack = [(tree, 0)]
+        nodeCount = 0
+        while len(nodeStack) > 0:
+            node, depth = nodeStack.pop()
+            nodeCount += 1
+            self.assertIs(self.javaParse.getNode(tree, node.nodeIndex), node)
+            self.assertEqual(self.javaParse.seekNode(tree, node.nodeIndex), depth)
+            if node.parentCtx is not None:
+                self.assertEqual(nodeTable.parents[node.nodeIndex], node.parentCtx.nodeIndex)
+                self.assertEqual(self.javaParse.distance(tree, node.parentCtx.nodeIndex, node.nodeIndex), 1)
+            nodeStack.extend((child, depth + 1) for child in getattr(node, 'children', None) or [])
+
+        self.assertEqual(len(nodeTable), nodeCount)
+        self.assertEqual(nodeTable.subtreeEnd[tree.nodeIndex], nodeCount)
+        self.assertIsNone(self.javaParse.getNode(tree, nodeCount + 1))
+
+    def test_seekAllNodes(self):
+        tree = self.javaParse.parse(self.java8SourceCode)
+
+        for subtree in [tree] + self.javaParse.seekAllNodes(tree, JavaParser.MethodBodyContext):
+            for nodeType in [JavaParser.ExpressionContext, TerminalNodeImpl, ParserRuleContext]:
+                expectedNodes = list()
+                nodeStack = [subtree]
+                while len(nodeStack) > 0:
+                    node = nodeStack.pop()
+                    if isinstance(node, nodeType):
+                        expectedNodes.append(node)
+                    nodeStack.extend(getattr(node, 'children', None) or [])
+
+                self.assertEqual(self.javaParse.seekAllNodes(subtree, nodeType), expectedNodes)
+
+    def test_distance(self):
+        tree = self.javaParse.parse(self.factorialSourceCode)
+        leaf = tree.children[0].children[1].children[2].children[2].children[2].children[0].children[3]
+
+        self.assertEqual(self.javaParse.distance(tree, tree.nodeIndex, leaf.nodeIndex), 7)
+        self.assertEqual(self.javaParse.distance(tree, leaf.nodeIndex, tree.nodeIndex), 7)
+        self.assertEqual(self.javaParse.distance(tree, leaf.nodeIndex, leaf.nodeIndex), 0)
+        self.assertEqual(self.javaParse.distance(tree, leaf.nodeIndex, tree.children[1].nodeIndex), -1)
+        self.assertIsNone(self.javaParse.seekNode(leaf, tree.children[1].nodeIndex))
+
     def test_numerifyWrongTree(self):
         tree = ['This is the wrong type for a tree']
         try:
@@ -8,6 +8,7 @@ import base64
 import zipfile
 import time
 from io import BytesIO
+from unittest import mock
 
 from littledarwin import LittleDarwin
 
@@ -60,6 +61,38 @@ class TestLittleDarwin(unittest.TestCase):
         except SystemExit as e:
             self.assertEqual(int(e.code), 0)
 
+    def test_VideoStoreGenerateTraditionalMutantsParallel(self):
+        argList = ['-m', '-p', self.videoStoreSourcePath, '-t', self.videoStoreBuildPath, '--jobs=2']
+        print("Running LittleDarwin with arguments:\n" + " ".join(argList))
+
+        try:
+            sys.exit(LittleDarwin.main(argList))
+
+        except Exception as e:
+            print(e)
+            self.fail("Irregular exit: exception occured.")
+
+        except SystemExit as e:
+            self.assertEqual(int(e.code), 0)
+
+    def test_VideoStoreGenerateTraditionalMutantsWithoutSymbolIndex(self):
+        argList = ['-m', '-p', self.videoStoreSourcePath, '-t', self.videoStoreBuildPath]
+        print("Running LittleDarwin with arguments:\n" + " ".join(argList))
+
+        # the traditional operators do not use the symbol index, so the files are not indexed.
+        with mock.patch.object(LittleDarwin, "indexFile", wraps=LittleDarwin.indexFile) as indexFile:
+            try:
+                sys.exit(LittleDarwin.main(argList))
+
+            except Exception as e:
+                print(e)
+                self.fail("Irregular exit: exception occured.")
+
+            except SystemExit as e:
+                self.assertEqual(int(e.code), 0)
+
+        indexFile.assert_not_called()
+
     def test_VideoStoreGenerateSecondOrderMutants(self):
         argList = ['-m', '-p', self.videoStoreSourcePath, '-t', self.videoStoreBuildPath,
                    "--higher-order=2", "--timeout=600"]
@@ -0,0 +1,115 @@
+import unittest
+
+from littledarwin.JavaParse import JavaParse
+from littledarwin.JavaMutate import JavaMutate
+from littledarwin.MutantSampler import MutantSampler
+
+
+class TestMutantSampler(unittest.TestCase):
+    def setUp(self):
+        self.javaParse = JavaParse()
+        self.sourceCode = """
+public class Shapes {
+    public int area(int a, int b) {
+        return a * b + a - b;
+    }
+
+    public int clamp(int x, int low, int high) {
+        if (x < low && low < high) {
+            return low;
+        } else if (x > high || high < low) {
+            return high;
+        }
+        return x;
+    }
+}
+
+class Counter {
+    private int count = 0;
+
+    public int next(int step) {
+        count = count + step * 2;
+        return count % 7;
+    }
+}
+"""
+
+    def test_uniform(self):
+        mutants = list(range(100))
+        sampler = MutantSampler("uniform", rate=0.25, seed=3)
+        sample = sampler.sample(mutants, "a/A.java")
+
+        self.assertEqual(len(sample), 25)
+        self.assertEqual(sample, sorted(sample))
+        self.assertEqual(sample, sampler.sample(mutants, "a/A.java"))
+        self.assertNotEqual(sample, sampler.sample(mutants, "a/B.java"))
+        self.assertNotEqual(sample, MutantSampler("uniform", rate=0.25, seed=4).sample(mutants, "a/A.java"))
+        self.assertEqual(len(MutantSampler("uniform", rate=0.01).sample(list(range(3)))), 1)
+        self.assertEqual(MutantSampler("uniform").sample([]), [])
+
+    def test_stratified(self):
+        mutants = list(range(30))
+        strata = ["a"] * 20 + ["b"] * 8 + ["c"] * 2
+
+        sample = MutantSampler("operator", rate=0.5).sample(mutants, strata=strata)
+        self.assertEqual([strata[mutant] for mutant in sample].count("a"), 10)
+        self.assertEqual([strata[mutant] for mutant in sample].count("b"), 4)
+        self.assertEqual([strata[mutant] for mutant in sample].count("c"), 1)
+
+        sample = MutantSampler("method", quota=3).sample(mutants, strata=strata)
+        self.assertEqual(len(sample), 8)
+        self.assertEqual([strata[mutant] for mutant in sample].count("c"), 2)
+
+    def test_weighted(self):
+        mutants = list(range(200))
+        weights = [100] * 10 + [1] * 190
+        sampler = MutantSampler("weighted", rate=0.05)
+        heavyCount = 0
+        for key in range(20):
+            sample = sampler.sample(mutants, str(key), weights=weights)
+            self.assertEqual(len(sample), 10)
+            heavyCount += len([mutant for mutant in sample if mutant < 10])
+
+        self.assertGreater(heavyCount, 100)
+
+    def test_iterateMutants(self):
+        javaMutate = JavaMutate(self.javaParse.parse(self.sourceCode), self.sourceCode, self.javaParse)
+        allTexts = [mutantText for _, mutantText in javaMutate.iterateMutants(["Traditional"])]
+        allTypeCount = javaMutate.mutantTypeCount
+
+        for strategy in MutantSampler.strategies:
+            sampler = MutantSampler(strategy, rate=0.3, quota=2, seed=1)
+            javaMutate = JavaMutate(self.javaParse.parse(self.sourceCode), self.sourceCode, self.javaParse)
+            sampledTexts = [mutantText for _, mutantText in
+                            javaMutate.iterateMutants(["Traditional"], 1, sampler, "Shapes.java")]
+
+            self.assertLess(len(sampledTexts), len(allTexts))
+            self.assertEqual(len(sampledTexts) + javaMutate.unsampledMutantCount, len(allTexts))
+            self.assertEqual(sum(javaMutate.mutantTypeCount.values()), len(sampledTexts))
+            self.assertEqual(javaMutate.mutantTypeCount.keys(), allTypeCount.keys())
+            self.assertEqual(sum(javaMutate.mutantsPerLine.values()), len(sampledTexts))
+            self.assertEqual([text for text in allTexts if text in sampledTexts], sampledTexts)
+
+            if strategy == "class":
+                self.assertEqual(len(sampledTexts), 4)
+            if strategy == "method":
+                self.assertEqual(len(sampledTexts), 6)
+
+        javaMutate = JavaMutate(self.javaParse.parse(self.sourceCode), self.sourceCode, self.javaParse)
+        higherOrderMutants = list(javaMutate.iterateMutants(["Traditional"], 2, MutantSampler(rate=0.5)))
+        self.assertEqual(javaMutate.unsampledMutantCount, len(allTexts) - len(allTexts) // 2)
+        self.assertEqual(javaMutate.mutantTypeCount, {"Higher-Order": len(higherOrderMutants)})
+
+    def test_getClassNameForNode(self):
+        tree = self.javaParse.parse(self.sourceCode)
+        javaMutate = JavaMutate(tree, self.sourceCode, self.javaParse)
+        javaMutate.gatherMutants(["Traditional"])
+        classNames = {self.javaParse.getClassNameForNode(tree, mutant.mutationList[0].nodeID)
+                      for mutant in javaMutate.mutants}
+
+        self.assertEqual(classNames, {"Shapes", "Counter"})
+        self.assertEqual(self.javaParse.getClassNameForNode(tree, 1), "***not in a class***")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from littledarwin.JavaMutate import JavaMutate
+from littledarwin.JavaParse import JavaParse
+from littledarwin.ParseCache import ParseCache
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.parseCache = ParseCache(os.path.join(self.tempDir.name, "ParseCache"))
+        self.factorialSourceCode = """
+public class Factorial {
+    public static void main(String[] args) {
+        final int NUM_FACTS = 100;
+        for(int i = 0; i < NUM_FACTS; i++)
+            System.out.println( i + "! is " + factorial(i) );
+        }
+
+    public static int factorial(int n) {
+         int result = 1;
+         for(int i = 2; i <= n; i++)
+            result *= i;
+         return result;
+    }
+
+    public Object nullable(Object a) {
+        if (a != null && a.hashCode() > 0) {
+            return new Object();
+        }
+        return null;
+    }
+}
+"""
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_serializeRoundTrip(self):
+        tree = JavaParse().parse(self.factorialSourceCode)
+        restoredTree = ParseCache.deserialize(ParseCache.serialize(tree))
+
+        self.assertEqual(ParseCache.serialize(tree), ParseCache.serialize(restoredTree))
+        self.assertEqual(tree.getText(), restoredTree.getText())
+        self.assertEqual(type(tree), type(restoredTree))
+
+    def test_hitsAndMisses(self):
+        javaParse = JavaParse(parseCache=self.parseCache)
+        javaParse.parse(self.factorialSourceCode)
+        self.assertEqual((self.parseCache.hits, self.parseCache.misses), (0, 1))
+
+        javaParse.parse(self.factorialSourceCode)
+        self.assertEqual((self.parseCache.hits, self.parseCache.misses), (1, 1))
+
+        javaParse.parse(self.factorialSourceCode.replace("100", "200"))
+        self.assertEqual((self.parseCache.hits, self.parseCache.misses), (1, 2))
+
+    def test_warmRunIdenticalMutants(self):
+        javaParse = JavaParse()
+        tree = javaParse.parse(self.factorialSourceCode)
+        javaMutate = JavaMutate(tree, self.factorialSourceCode, javaParse)
+        coldMutants, coldMutantTypes = javaMutate.gatherMutants(["All"])
+        coldComplexity = javaParse.getCyclomaticComplexityAllMethods(tree)
+
+        for i in range(2):
+            cachedJavaParse = JavaParse(parseCache=self.parseCache)
+            cachedTree = cachedJavaParse.parse(self.factorialSourceCode)
+            cachedJavaMutate = JavaMutate(cachedTree, self.factorialSourceCode, cachedJavaParse)
+            warmMutants, warmMutantTypes = cachedJavaMutate.gatherMutants(["All"])
+
+            self.assertEqual(coldMutants, warmMutants)
+            self.assertEqual(coldMutantTypes, warmMutantTypes)
+            self.assertEqual(coldComplexity, cachedJavaParse.getCyclomaticComplexityAllMethods(cachedTree))
+            self.assertEqual(javaMutate.inMethodLines, cachedJavaMutate.inMethodLines)
+
+        self.assertEqual(self.parseCache.hits, 1)
+
+    def test_corruptEntryIsAMiss(self):
+        entryPath = self.parseCache.getEntryPath(self.parseCache.getKey(self.factorialSourceCode))
+        os.makedirs(os.path.dirname(entryPath))
+        with open(entryPath, 'wb') as entryFile:
+            entryFile.write(b"not a pickle")
+
+        tree = JavaParse(parseCache=self.parseCache).parse(self.factorialSourceCode)
+        self.assertIsNotNone(tree)
+        self.assertEqual(self.parseCache.misses, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
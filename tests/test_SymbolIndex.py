@@ -0,0 +1,116 @@
+import unittest
+
+from littledarwin.JavaParse import JavaParse
+from littledarwin.JavaParser import JavaParser
+from littledarwin.SymbolIndex import SymbolIndex, TypeDeclaration, MethodSignature
+
+
+class TestSymbolIndex(unittest.TestCase):
+    def setUp(self):
+        self.javaParse = JavaParse()
+        self.shapesSourceCode = """
+package shapes;
+
+public interface Measure<T> {
+    double measure(T shape);
+}
+
+record Point(int x, int y) { }
+"""
+        self.registrySourceCode = """
+package shapes;
+
+import java.util.*;
+
+public class Registry {
+    protected List<String> names;
+    private int size;
+
+    public String[] getNames(int limit) {
+        String prefix = "name";
+        for (String name : names) {
+            int length = name.length();
+            boolean found = length > limit;
+            String label = found ? prefix + length : null;
+        }
+        Measure<Point> measure = point -> point.x() + size;
+        return new String[size];
+    }
+
+    public Point origin() {
+        return new Point(0, 0);
+    }
+}
+"""
+
+    def getNodes(self, tree, nodeType):
+        return self.javaParse.seekAllNodes(tree, nodeType)
+
+    def test_addTree(self):
+        symbolIndex = SymbolIndex()
+        shapesIndex = SymbolIndex()
+        shapesIndex.addTree(self.javaParse.parse(self.shapesSourceCode, frozenset()))
+        registryIndex = SymbolIndex()
+        registryIndex.addTree(self.javaParse.parse(self.registrySourceCode, frozenset()))
+        symbolIndex.update(shapesIndex)
+        symbolIndex.update(registryIndex)
+
+        self.assertEqual(symbolIndex.typeDeclarations["Measure"], TypeDeclaration("interface", ("T",), "double"))
+        self.assertEqual(symbolIndex.typeDeclarations["Point"], TypeDeclaration("record", (), None))
+        self.assertEqual(symbolIndex.typeDeclarations["Registry"], TypeDeclaration("class", (), None))
+        self.assertEqual(symbolIndex.methodSignatures["getNames"], {MethodSignature("String[]", ("int",))})
+        self.assertEqual(symbolIndex.methodSignatures["x"], {MethodSignature("int", ())})
+        self.assertEqual(symbolIndex.fieldTypes["names"], {"List<String>"})
+        self.assertEqual(symbolIndex.fieldTypes["y"], {"int"})
+
+        otherIndex = SymbolIndex()
+        otherIndex.addTree(self.javaParse.parse("class Point { }"))
+        symbolIndex.update(otherIndex)
+        self.assertIsNone(symbolIndex.typeDeclarations["Point"])
+
+    def test_getVariableType(self):
+        tree = self.javaParse.parse(self.registrySourceCode)
+        identifiers = {node.getText(): node for node in self.getNodes(tree, JavaParser.PrimaryContext)}
+        symbolIndex = SymbolIndex()
+
+        self.assertEqual(symbolIndex.getVariableType(identifiers["prefix"], "prefix"), "String")
+        self.assertEqual(symbolIndex.getVariableType(identifiers["length"], "length"), "int")
+        self.assertEqual(symbolIndex.getVariableType(identifiers["names"], "names"), "List<String>")
+        self.assertEqual(symbolIndex.getVariableType(identifiers["limit"], "limit"), "int")
+        self.assertEqual(symbolIndex.getVariableType(identifiers["name"], "name"), "String")
+        self.assertIsNone(symbolIndex.getVariableType(identifiers["point"], "point"))
+        self.assertIsNone(symbolIndex.getVariableType(identifiers["prefix"], "unknown"))
+
+    def test_getExpressionType(self):
+        tree = self.javaParse.parse(self.registrySourceCode)
+        symbolIndex = SymbolIndex()
+        expressionTypes = {expression.getText(): symbolIndex.getExpressionType(expression)
+                           for expression in self.getNodes(tree, JavaParser.ExpressionContext)}
+
+        self.assertEqual(expressionTypes["length>limit"], "boolean")
+        self.assertEqual(expressionTypes["prefix+length"], "String")
+        self.assertEqual(expressionTypes["found?prefix+length:null"], "String")
+        self.assertEqual(expressionTypes["newString[size]"], "String[]")
+        self.assertEqual(expressionTypes["newPoint(0,0)"], "Point")
+        self.assertEqual(expressionTypes["null"], "null")
+        self.assertEqual(expressionTypes['"name"'], "String")
+        self.assertIsNone(expressionTypes["name.length()"])
+
+        lambdaExpression = self.getNodes(tree, JavaParser.LambdaExpressionContext)[0]
+        self.assertIsNone(symbolIndex.getLambdaReturnType(lambdaExpression))
+        symbolIndex.addTree(self.javaParse.parse(self.shapesSourceCode))
+        self.assertEqual(symbolIndex.getLambdaReturnType(lambdaExpression), "double")
+
+    def test_isReifiableArray(self):
+        sourceCode = "class Box<T> { T[] get() { return null; } }"
+        tree = self.javaParse.parse(sourceCode)
+        methodBody = self.getNodes(tree, JavaParser.MethodBodyContext)[0]
+        symbolIndex = SymbolIndex()
+
+        self.assertFalse(symbolIndex.isReifiableArray(methodBody, "T[]"))
+        self.assertFalse(symbolIndex.isReifiableArray(methodBody, "List<T>[]"))
+        self.assertTrue(symbolIndex.isReifiableArray(methodBody, "String[][]"))
+
+
+if __name__ == '__main__':
+    unittest.main()